@@ -0,0 +1,305 @@
+"""Startup and import-time benchmarks.
+
+Measures what a user pays before the first ``get_data``:
+
+- ``import speasy`` with every provider disabled, cold (no bytecode cache) and warm, with the
+  ``-X importtime`` breakdown of the slowest modules,
+- each provider ``__init__`` against a local proxy stand-in, first with an empty index then with
+  the inventory already saved in the local index,
+- ``update_inventory`` from the local index and from the proxy stand-in,
+- ``flat_inventory`` registration of the provider tree.
+
+Every measurement runs in a fresh interpreter with its own cache, index and config paths, so
+neither the user's cache nor the real servers are ever involved. Results are written as JSON;
+``--baseline`` compares them to a previous run and exits non-zero on regressions, which is what
+release gating needs.
+
+Usage::
+
+    python benchmarks/startup.py -o startup.json
+    python benchmarks/startup.py --baseline startup.json --max-regression 1.25
+"""
+import argparse
+import json
+import os
+import pickle
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+PROVIDERS = {
+    'amda': 'speasy.data_providers.amda:AmdaWebservice',
+    'cda': 'speasy.data_providers.cda:CdaWebservice',
+    'csa': 'speasy.data_providers.csa:CsaWebservice',
+    'ssc': 'speasy.data_providers.ssc:SscWebservice',
+    'archive': 'speasy.data_providers.generic_archive:GenericArchive',
+    'uiowaephtool': 'speasy.data_providers.uiowa_eph_tool:UiowaEphTool',
+    'cdpp3dview': 'speasy.data_providers.cdpp3dview:Cdpp3dViewWebservice',
+}
+
+_ALL_PROVIDER_NAMES = "amda,cda,cdaweb,csa,ssc,sscweb,archive,generic_archive,uiowaephtool,UiowaEphTool,cdpp3dview"
+_IMPORTTIME_RX = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+_PROXY_VERSION = "0.14.0"
+
+
+def parse_importtime(stderr: str) -> List[Dict]:
+    """Parses the ``-X importtime`` report into a list of {module, self_us, cumulative_us, depth}."""
+    modules = []
+    for line in stderr.splitlines():
+        m = _IMPORTTIME_RX.match(line)
+        if m:
+            modules.append({'module': m.group(4), 'self_us': int(m.group(1)), 'cumulative_us': int(m.group(2)),
+                            'depth': (len(m.group(3)) - 1) // 2})
+    return modules
+
+
+def summarize_importtime(modules: List[Dict], top: int = 15) -> Dict:
+    """Totals per top level package plus the slowest modules by cumulative time."""
+    per_package = {}
+    for m in modules:
+        package = m['module'].split('.')[0]
+        per_package[package] = per_package.get(package, 0) + m['self_us']
+    return {
+        'total_us': sum(m['self_us'] for m in modules),
+        'per_package_us': dict(sorted(per_package.items(), key=lambda kv: kv[1], reverse=True)[:top]),
+        'slowest_modules': sorted(modules, key=lambda m: m['cumulative_us'], reverse=True)[:top],
+    }
+
+
+def _node(kind: str, name: str, provider: str, uid: str, **meta) -> Dict:
+    return {'__spz_type__': kind, '__spz_name__': name, '__spz_provider__': provider, '__spz_uid__': uid, **meta}
+
+
+def synthetic_inventory(provider: str, missions: int, datasets: int, parameters: int) -> Dict:
+    """A provider tree shaped like the real ones, missions > datasets > parameters with their usual metadata.
+
+    Built directly in the ``to_dict(..., version=2)`` layout the proxy serves, so the parent process never
+    imports speasy (which would initialize the user's real providers).
+    """
+    root = _node('SpeasyIndex', provider, provider, provider, build_date='2024-01-01T00:00:00+00:00')
+    for m in range(missions):
+        mission = root[f"mission_{m}"] = _node('SpeasyIndex', f"mission_{m}", provider, f"mission_{m}")
+        for d in range(datasets):
+            uid = f"M{m}_D{d}"
+            ds = mission[uid] = _node('DatasetIndex', uid, provider, uid, start_date='2001-01-01T00:00:00Z',
+                                      stop_date='2024-01-01T00:00:00Z', description=f"dataset {d} of mission {m}",
+                                      mastercdf=f"{uid}.cdf")
+            for p in range(parameters):
+                ds[f"param_{p}"] = _node('ParameterIndex', f"param_{p}", provider, f"{uid}/param_{p}",
+                                         start_date=ds['start_date'], stop_date=ds['stop_date'], dataset=uid,
+                                         UNITS='nT', CATDESC=f"parameter {p} of {uid}", FILLVAL='-1e31')
+    return root
+
+
+class _ProxyStandIn(BaseHTTPRequestHandler):
+    """Answers what provider initialization asks a speasy proxy (and AMDA's isAlive) with canned data."""
+    inventories: Dict[str, bytes] = {}
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, body: bytes, content_type='application/octet-stream'):
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_HEAD(self):
+        self._reply(b'')
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        if url.path.endswith('/get_version'):
+            self._reply(_PROXY_VERSION.encode(), 'text/plain')
+        elif url.path.endswith('/get_inventory'):
+            provider = query.get('provider', [''])[0]
+            body = self.inventories.get(provider)
+            if body is None:
+                self.send_error(400)
+                return
+            if query.get('zstd_compression', ['false'])[0] == 'true':
+                import pyzstd
+                body = pyzstd.compress(body)
+            self._reply(body)
+        elif url.path.endswith('isAlive.php'):
+            self._reply(b'{"alive": true}', 'application/json')
+        else:
+            self._reply(b'', 'text/html')
+
+
+def start_proxy_stand_in(missions: int, datasets: int, parameters: int) -> ThreadingHTTPServer:
+    _ProxyStandIn.inventories = {
+        name: pickle.dumps(synthetic_inventory(name, missions, datasets, parameters))
+        for name in PROVIDERS
+    }
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _ProxyStandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _isolated_env(workdir: str, proxy_url: Optional[str] = None, extra: Optional[Dict] = None) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.update({
+        'SPEASY_CACHE_PATH': os.path.join(workdir, 'cache'),
+        'SPEASY_INDEX_PATH': os.path.join(workdir, 'index'),
+        'SPEASY_CDAWEB_INVENTORY_DATA_PATH': os.path.join(workdir, 'cda_inventory'),
+        'SPEASY_CORE_DISABLED_PROVIDERS': _ALL_PROVIDER_NAMES,
+        'SPEASY_PROXY_ENABLED': 'true' if proxy_url else 'false',
+        'SPEASY_PROXY_URL': proxy_url or '',
+        'SPEASY_AMDA_ENTRY_POINT': proxy_url or '',
+        'XDG_CONFIG_HOME': os.path.join(workdir, 'config'),
+        'PYTHONWARNINGS': 'ignore',
+    })
+    env.update(extra or {})
+    return env
+
+
+def _run(args: List[str], env: Dict[str, str]) -> subprocess.CompletedProcess:
+    p = subprocess.run([sys.executable] + args, env=env, capture_output=True, text=True)
+    if p.returncode != 0:
+        raise RuntimeError(f"benchmark subprocess {args} failed:\n{p.stderr}")
+    return p
+
+
+def bench_import(workdir: str, repeat: int) -> Dict:
+    """``import speasy`` wall time and importtime breakdown, without then with a bytecode cache."""
+    results = {}
+    for kind in ('cold', 'warm'):
+        walls, last = [], None
+        for i in range(repeat):
+            pycache = os.path.join(workdir, f'pycache_{kind}_{i}' if kind == 'cold' else 'pycache_warm')
+            env = _isolated_env(workdir, extra={'PYTHONPYCACHEPREFIX': pycache})
+            if kind == 'warm' and i == 0:
+                _run(['-c', 'import speasy'], env)
+            start = time.perf_counter()
+            last = _run(['-X', 'importtime', '-c', 'import speasy'], env)
+            walls.append(time.perf_counter() - start)
+        results[kind] = {'wall_s': statistics.median(walls), 'runs_s': walls,
+                         'importtime': summarize_importtime(parse_importtime(last.stderr))}
+    return results
+
+
+_WORKER = """
+import importlib, json, sys, time
+t0 = time.perf_counter()
+import speasy
+from speasy.core.index import index
+from speasy.core.inventory import ProviderInventory
+from speasy.inventories import tree
+import_s = time.perf_counter() - t0
+name, target = sys.argv[1], sys.argv[2]
+module, cls = target.split(':')
+ws_class = getattr(importlib.import_module(module), cls)
+t0 = time.perf_counter()
+provider = ws_class()
+init_s = time.perf_counter() - t0
+t0 = time.perf_counter()
+provider.update_inventory()
+update_index_s = time.perf_counter() - t0
+if index.contains("proxy_inventories_save_date", name):
+    index.pop("proxy_inventories_save_date", name)
+t0 = time.perf_counter()
+provider.update_inventory()
+update_proxy_s = time.perf_counter() - t0
+flat = ProviderInventory()
+t0 = time.perf_counter()
+flat.update(tree.__dict__[name])
+flat_s = time.perf_counter() - t0
+print(json.dumps({'import_s': import_s, 'init_s': init_s, 'update_inventory_index_s': update_index_s,
+                  'update_inventory_proxy_s': update_proxy_s, 'flat_inventory_s': flat_s,
+                  'parameters': len(flat.parameters), 'datasets': len(flat.datasets)}))
+"""
+
+
+def bench_providers(workdir: str, proxy_url: str, providers: List[str]) -> Dict:
+    """Each provider twice in a fresh interpreter: with an empty local index, then with the one the first run left."""
+    results = {}
+    for name in providers:
+        provider_dir = os.path.join(workdir, f'provider_{name}')
+        env = _isolated_env(provider_dir, proxy_url=proxy_url)
+        runs = {}
+        for kind in ('empty_index', 'saved_index'):
+            runs[kind] = json.loads(_run(['-c', _WORKER, name, PROVIDERS[name]], env).stdout.strip().splitlines()[-1])
+        results[name] = runs
+    return results
+
+
+def _flatten(results: Dict, prefix='') -> Dict[str, float]:
+    flat = {}
+    for key, value in results.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{path}."))
+        elif isinstance(value, float) and path.endswith('_s'):
+            flat[path] = value
+    return flat
+
+
+def compare(results: Dict, baseline: Dict, max_regression: float, min_seconds: float = 0.005) -> List[str]:
+    """Timings that got slower than ``max_regression`` times their baseline, ignoring sub-``min_seconds`` noise."""
+    current, previous = _flatten(results['results']), _flatten(baseline['results'])
+    regressions = []
+    for key, value in current.items():
+        ref = previous.get(key)
+        if ref is not None and value > min_seconds and value > ref * max_regression:
+            regressions.append(f"{key}: {ref:.4f}s -> {value:.4f}s (x{value / ref if ref else float('inf'):.2f})")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-o', '--output', help="write JSON results to this file instead of stdout")
+    parser.add_argument('--repeat', type=int, default=3, help="import runs per measurement, the median is kept")
+    parser.add_argument('--providers', default=','.join(PROVIDERS), help="comma separated providers to benchmark")
+    parser.add_argument('--size', type=int, nargs=3, default=(20, 50, 20), metavar=('MISSIONS', 'DATASETS', 'PARAMS'),
+                        help="shape of the synthetic inventories served by the proxy stand-in")
+    parser.add_argument('--baseline', help="previous JSON results to compare against")
+    parser.add_argument('--max-regression', type=float, default=1.25,
+                        help="fail when a timing exceeds its baseline by this factor")
+    args = parser.parse_args(argv)
+
+    server = start_proxy_stand_in(*args.size)
+    proxy_url = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        with tempfile.TemporaryDirectory(prefix='speasy-bench-') as workdir:
+            results = {
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'inventory_size': list(args.size),
+                'results': {
+                    'import': bench_import(workdir, args.repeat),
+                    'providers': bench_providers(workdir, proxy_url,
+                                                 [p for p in args.providers.split(',') if p]),
+                },
+            }
+    finally:
+        server.shutdown()
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.max_regression)
+        for r in regressions:
+            print(f"REGRESSION {r}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,150 @@
+"""XML inventories parsing benchmarks.
+
+Compares, for AMDA/Impex obs data trees and CDAWeb ``all.xml``, building the inventory tree from a
+whole parsed DOM (``Et.fromstring``/``Et.parse`` then walking it, as speasy used to) with the
+streaming parsers speasy now uses. Reports the median wall time and the peak traced memory of both.
+
+Inputs are synthetic XML files shaped like the real ones unless real files are given with ``--amda``
+and ``--cdaweb``. speasy is imported with every provider disabled and its cache, index and config in a
+temporary directory, the user's ones are never touched.
+
+Usage::
+
+    python benchmarks/xml_inventories.py -o xml_inventories.json
+    python benchmarks/xml_inventories.py --amda obsdatatree.xml --cdaweb all.xml
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict
+from xml.sax.saxutils import quoteattr
+
+from startup import _isolated_env
+
+
+def synthetic_obs_data_tree(missions: int, datasets: int, parameters: int) -> str:
+    """An AMDA like obs data tree, missions > instruments > datasets > parameters > components."""
+    out = ['<?xml version="1.0"?>\n<dataRoot xml:id="DATAROOT"><dataCenter name="AMDA" xml:id="root">']
+    for m in range(missions):
+        out.append(f'<mission xml:id="M{m}" name="Mission {m}" desc="mission {m}"><instrument xml:id="M{m}_I" '
+                   f'name="Instrument" desc="instrument of mission {m}">')
+        for d in range(datasets):
+            ds = f"m{m}-d{d}"
+            out.append(f'<dataset xml:id="{ds}" name="Dataset {d}" dataStart="2001-01-01T00:00:00Z" '
+                       f'dataStop="2024-01-01T00:00:00Z" desc="dataset {d} of mission {m}">')
+            for p in range(parameters):
+                out.append(f'<parameter xml:id="{ds}_p{p}" name="param {p}" units="nT" size="3">')
+                out.extend(f'<component xml:id="{ds}_p{p}({c})" index1="{c}" name="{axis}"/>'
+                           for c, axis in enumerate('xyz'))
+                out.append('</parameter>')
+            out.append('</dataset>')
+        out.append('</instrument></mission>')
+    out.append('</dataCenter></dataRoot>')
+    return ''.join(out)
+
+
+def synthetic_cdaweb_catalog(missions: int, datasets: int) -> str:
+    """A CDAWeb like all.xml, datasets with their mission, observatory, instrument and master CDF."""
+    out = ['<?xml version="1.0" encoding="UTF-8"?>\n<sites xmlns="cdas"><datasite ID="CDAWeb_HTTPS" Name="CDAWeb">']
+    for m in range(missions):
+        for d in range(datasets):
+            uid = f"M{m}_D{d}"
+            out.append(
+                f'<dataset serviceprovider_ID="{uid}" ID="{uid.lower()}" timerange_start="2001-01-01 00:00:00" '
+                f'timerange_stop="2024-01-01 00:00:00"><mission_group serviceprovider_ID="Group{m}"/>'
+                f'<observatory serviceprovider_ID="Mission{m}" ID="m{m}"/>'
+                f'<instrument serviceprovider_ID="Instrument{d % 5}" ID="i{d % 5}"/>'
+                f'<description short={quoteattr(f"dataset {d} of mission {m}")}/>'
+                f'<mastercdf serviceprovider_ID="{uid.lower()}_00000000_v01.cdf" ID="masters/{uid.lower()}.cdf"/>'
+                f'<access subdividedby="%Y" filenaming="{uid.lower()}_%Y%M%D_v01.cdf">'
+                f'<URL>https://cdaweb.gsfc.nasa.gov/pub/data/{uid.lower()}</URL></access></dataset>')
+    out.append('</datasite></sites>')
+    return ''.join(out)
+
+
+def measure(func: Callable, repeat: int) -> Dict:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {'seconds': statistics.median(times), 'peak_bytes': peak}
+
+
+def bench_amda(xml: str, repeat: int) -> Dict:
+    import xml.etree.ElementTree as Et
+    from speasy.core.impex.parser import ImpexXMLParser
+    return {
+        'dom': measure(lambda: ImpexXMLParser.parse_element(Et.fromstring(xml), 'amda'), repeat),
+        'streaming': measure(lambda: ImpexXMLParser.parse(xml, 'amda'), repeat),
+    }
+
+
+def bench_cdaweb(path: str, repeat: int) -> Dict:
+    import xml.etree.ElementTree as Et
+    from speasy.core.inventory.indexes import SpeasyIndex
+    from speasy.data_providers.cda._inventory_builder._xml_catalogs_parser import load_xml_catalog, parse_dataset
+
+    def dom():
+        root = SpeasyIndex(name='root', provider='cda', uid='cda_root')
+        for site in Et.parse(path).getroot().iter('{cdas}datasite'):
+            if site.attrib['ID'] == 'CDAWeb_HTTPS':
+                for node in site.iter('{cdas}dataset'):
+                    parse_dataset(root, node)
+        return root
+
+    return {
+        'dom': measure(dom, repeat),
+        'streaming': measure(lambda: load_xml_catalog(path), repeat),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-o', '--output', help="write JSON results to this file instead of stdout")
+    parser.add_argument('--repeat', type=int, default=3, help="runs per measurement, the median is kept")
+    parser.add_argument('--amda', help="real AMDA obs data tree XML file to use instead of a synthetic one")
+    parser.add_argument('--cdaweb', help="real CDAWeb all.xml file to use instead of a synthetic one")
+    parser.add_argument('--size', type=int, nargs=3, default=(40, 50, 20), metavar=('MISSIONS', 'DATASETS', 'PARAMS'),
+                        help="shape of the synthetic inventories")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix='speasy-bench-') as workdir:
+        os.environ.update(_isolated_env(workdir))
+        if args.amda:
+            with open(args.amda) as f:
+                amda_xml = f.read()
+        else:
+            amda_xml = synthetic_obs_data_tree(*args.size)
+        cdaweb_path = args.cdaweb
+        if not cdaweb_path:
+            cdaweb_path = os.path.join(workdir, 'all.xml')
+            with open(cdaweb_path, 'w') as f:
+                f.write(synthetic_cdaweb_catalog(*args.size[:2]))
+        results = {
+            'amda': {'xml_bytes': len(amda_xml), **bench_amda(amda_xml, args.repeat)},
+            'cdaweb': {'xml_bytes': os.path.getsize(cdaweb_path), **bench_cdaweb(cdaweb_path, args.repeat)},
+        }
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -17,22 +17,73 @@ except _metadata.PackageNotFoundError:  # running from a source tree, never inst
 __all__ = ['amda', 'cda', 'ssc', 'csa', 'cdpp3dview', 'get_data', 'archive', 'SpeasyVariable', 'Catalog', 'Event', 'Dataset', 'TimeTable']
 __docformat__ = "numpy"
 
-from typing import List
+from concurrent.futures import Future
+from typing import List, Optional
 
-from speasy.core.inventory.indexes import SpeasyIndex
+from speasy.core.inventory.indexes import SpeasyIndex, AnyProductIndex
 from .products import SpeasyVariable, Catalog, Event, Dataset, TimeTable, MaybeAnyProduct
 
 # keep this import last
 from .core.requests_scheduling.request_dispatch import get_data, list_providers, amda, cda, csa, ssc, archive, uiowaephtool, cdpp3dview
 
 
-# @TODO implement me, this function should be able to look inside all servers
-# and return something that could be passed to get_data
-def find_product(name: str) -> List[str]:
-    raise NotImplementedError("Not implemented yet")
+def find_product(name: str, provider: Optional[str] = None, max_results: int = 20) -> List[AnyProductIndex]:
+    """Searches products by name, uid, description, units, mission or instrument across all providers inventories.
 
+    Words are matched exactly, by prefix or approximately so that small typos still find products, results are
+    ranked by the number of matched words first and then by where they were found, names and uids first.
 
-def update_inventories():
+    Parameters
+    ----------
+    name: str
+        the words to search for
+    provider: str or None
+        only search this provider inventory
+    max_results: int
+        maximum number of results
+
+    Returns
+    -------
+    List[AnyProductIndex]
+        the best matching products, best first, each of them can be passed to :func:`get_data`
+
+    Examples
+    --------
+    >>> spz.find_product("ace mag gse", provider="cda")  # doctest: +SKIP
+    [<ParameterIndex: BGSEc>, ...]
+    """
+    from .core.inventory.search import product_search
+    return product_search.search(name, provider=provider, max_results=max_results)
+
+
+def update_inventories(background: bool = False) -> Optional[Future]:
+    """Refreshes every provider inventory, each one is only replaced once its new version is complete.
+
+    Parameters
+    ----------
+    background: bool
+        refresh in a background thread and return immediately, inventories stay usable meanwhile
+
+    Returns
+    -------
+    Optional[Future]
+        with background, done once every inventory was refreshed, failures are logged and keep the previous
+        inventory
+
+    See Also
+    --------
+    speasy.config.inventories.refresh_period_minutes: to refresh them periodically in the background
+    """
+    if background:
+        from .core.inventory.refresh import inventory_refresher
+        return inventory_refresher.refresh()
     from .core.dataprovider import PROVIDERS
     for provider in PROVIDERS.values():
         provider.update_inventory()
+    return None
+
+
+# once every provider got its first inventory
+from .core.inventory.refresh import start_configured_refresh as _start_configured_inventory_refresh  # noqa: E402
+
+_start_configured_inventory_refresh()
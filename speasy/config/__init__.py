@@ -228,6 +228,9 @@ cdaweb = ConfigSection("CDAWEB",
                            "default": f'{appdirs.user_data_dir("speasy", "LPP")}/cda_inventory'},
                        preferred_access_method={"default": "BEST",
                                                 "description": "Preferred access method to CDAWeb, either REST API (API), dirtect files download (FILE) or BEST to let Speasy choose the fastest and most likely to work method based on the requested product."},
+                       masters_parsing_workers={"default": 0,
+                                                "description": "Number of processes used to parse master CDFs when building CDAWeb inventory, 0 uses one per CPU and 1 parses them in the current process.",
+                                                "type_ctor": int},
                        )
 
 amda = ConfigSection("AMDA",
@@ -253,12 +256,22 @@ amda = ConfigSection("AMDA",
 archive = ConfigSection("ARCHIVE",
                         extra_inventory_lookup_dirs={"default": "",
                                                      "description": """A comma separated list of directory path Archive provider will scann for YAML inventory files.""",
-                                                     "type_ctor": _parse_dir_set}
+                                                     "type_ctor": _parse_dir_set},
+                        decoding_workers={"default": 1,
+                                          "description": "Number of processes decoding CDF files when a direct archive request spans several of them, 1 decodes them one after the other in the current process and 0 uses one per CPU.",
+                                          "type_ctor": int},
                         )
 
 inventories = ConfigSection("INVENTORIES",
                             cache_retention_days={
                                 "default": 2,
                                 "description": "Maximum times in days speasy will keep inventories in cache before fetching newer version.",
-                                "type_ctor": int}
+                                "type_ctor": int},
+                            snapshots_path={
+                                "default": f'{appdirs.user_data_dir("speasy", "LPP")}/inventories',
+                                "description": "Where speasy stores the compact binary snapshots of the inventories it got from the proxy."},
+                            refresh_period_minutes={
+                                "default": 0,
+                                "description": "If not 0, speasy refreshes every provider inventory in a background thread with this period, in minutes. Useful for long running services.",
+                                "type_ctor": float}
                             )
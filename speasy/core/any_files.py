@@ -4,13 +4,14 @@ import os
 import re
 from datetime import timedelta, datetime
 from typing import List, Optional, Union
-from speasy.core.cache import CacheCall
 from speasy.core.cache import get_item, add_item, CacheItem, request_locker
 from . import http
 from .url_utils import is_local_file, extract_path, to_local_path
 
 log = logging.getLogger(__name__)
-_HREF_REGEX = re.compile('''href=['"]([A-Za-z0-9-_./]+)['"]>''')
+# matched on the raw page, file names are plain ASCII so the (large) index pages are never decoded
+_HREF_REGEX = re.compile(rb'''href=['"]([A-Za-z0-9-_./]+)['"]>''')
+_LISTING_MAX_AGE = timedelta(hours=12)
 
 
 class AnyFile(io.IOBase):
@@ -32,6 +33,15 @@ class AnyFile(io.IOBase):
     def seek(self, *args, **kwargs):
         return self._file_impl.seek(*args, **kwargs)
 
+    def tell(self):
+        return self._file_impl.tell()
+
+    def readable(self):
+        return self._file_impl.readable()
+
+    def seekable(self):
+        return self._file_impl.seekable()
+
     def close(self):
         return self._file_impl.close()
 
@@ -161,15 +171,50 @@ def _make_remote_files_relative(ref_path: str, path: str):
     return path
 
 
-@CacheCall(cache_retention=timedelta(hours=12), is_pure=True)
-def _list_remote_files(url: str) -> List[str]:
+def _parse_listing(url: str, page: bytes) -> List[str]:
+    path = extract_path(url)
+    return [_make_remote_files_relative(path, f.decode()) for f in _HREF_REGEX.findall(page)]
+
+
+def _fetch_listing(url: str, entry: Optional[CacheItem]) -> Optional[CacheItem]:
+    """GETs the listing, conditionally when a previous one is cached: on 304 the cached listing gets a new lifetime
+    instead of being downloaded and parsed again."""
+    headers = {}
+    if entry is not None:
+        etag, last_modified = entry.version
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+    response = http.get(url, headers=headers)
+    if response.status_code == 304 and entry is not None:
+        return entry.bump_creation_time()
+    if response.status_code != 200:
+        return None
+    return CacheItem(data=_parse_listing(url, response.bytes),
+                     version=(response.headers.get('etag'), response.headers.get('last-modified')),
+                     lifetime=_LISTING_MAX_AGE)
+
+
+def _list_remote_files(url: str, disable_cache=False, force_refresh=False) -> List[str]:
     if not url.endswith('/'):
         url += '/'
-    response = http.get(url)
-    if response.ok:
-        path = extract_path(url)
-        return list(map(lambda f: _make_remote_files_relative(path, f), _HREF_REGEX.findall(response.text)))
-    return []
+    if disable_cache:
+        response = http.get(url)
+        return _parse_listing(url, response.bytes) if response.ok else []
+    key = f"remote_listing/{url}"
+    # concurrent listings of the same folder wait for the first one instead of all fetching it
+    with request_locker(key):
+        entry = get_item(key)
+        entry = entry if isinstance(entry, CacheItem) else None
+        if entry is not None and not force_refresh and not entry.is_expired():
+            return entry.data
+        fetched = _fetch_listing(url, entry)
+        if fetched is None:
+            # never cache error pages, a transient failure would hide the folder content for hours
+            return []
+        add_item(key=key, item=fetched)
+        return fetched.data
 
 
 def list_files(url: str, file_regex: Union[re.Pattern, str], disable_cache=False, force_refresh=False) -> List[str]:
@@ -187,6 +232,13 @@ def list_files(url: str, file_regex: Union[re.Pattern, str], disable_cache=False
     force_refresh : bool
         Forces a refresh of the cache for remote file listings.
 
+    Notes
+    -----
+    Remote listings are cached per folder for 12 hours, then revalidated with a conditional request (ETag or
+    last-modified) so that unchanged folders are not downloaded nor parsed again. force_refresh revalidates the
+    listing right away. This function is thread safe, listing several folders concurrently is how callers should
+    scan large archives.
+
     Returns
     -------
     List[str]
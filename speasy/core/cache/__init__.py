@@ -2,7 +2,7 @@ from typing import Union, Optional
 import re
 from .cache import Cache, CacheItem, migration_backups, delete_migration_backups
 from ._function_cache import CacheCall
-from ._providers_caches import CACHE_ALLOWED_KWARGS, Cacheable, UnversionedProviderCache
+from ._providers_caches import CACHE_ALLOWED_KWARGS, Cacheable, UnversionedProviderCache, group_fragments_if
 from ._instance import _cache
 from ._request_locker import request_locker, PendingRequest
 import logging
@@ -38,7 +38,7 @@ def round_for_cache(dt_range: DateTimeRange, fragment_hours: int):
 
 
 def is_up_to_date(item: CacheItem, version):
-    return (item.version is None) or (item.version >= version)
+    return ((item.version is None) or (item.version >= version)) and not item.is_expired()
 
 
 def group_fragments_if(fragments, predicate):
@@ -87,11 +87,12 @@ class _Cacheable:
                  stop_time_arg='stop_time',
                  version=None,
                  fragment_hours=lambda x: 1, cache_margins=1.2, leak_cache=False, entry_name=default_cache_entry_name,
-                 deduplication_timeout=600
+                 deduplication_timeout=600, retention=None
                  ):
         self.start_time_arg = start_time_arg
         self.stop_time_arg = stop_time_arg
         self.version = (lambda x, y: 0) if version is None else version
+        self.retention = (lambda x, y: None) if retention is None else retention
         self.fragment_hours = fragment_hours
         self.cache_margins = cache_margins
         self.cache: Cache = cache_instance or _cache
@@ -273,18 +274,55 @@ class _Cacheable:
 
 
 class Cacheable(object):
+    """Caches what the decorated provider method returns by fragments of fragment_hours, each one stored with the
+    product version(provider, product), and requests only the missing or outdated ones.
+
+    With retention(provider, product) giving a timedelta, fragments are also outdated that long after being stored,
+    for products without a meaningful version.
+    """
+
     def __init__(self, prefix, cache_instance=None, start_time_arg='start_time', stop_time_arg='stop_time',
                  version=None, fragment_hours=lambda x: 1, cache_margins=1.2, leak_cache=False,
-                 entry_name=default_cache_entry_name, deduplication_timeout=600
+                 entry_name=default_cache_entry_name, deduplication_timeout=600, retention=None
                  ):
         self._cache = _Cacheable(prefix, cache_instance=cache_instance, start_time_arg=start_time_arg,
                                  stop_time_arg=stop_time_arg,
                                  version=version,
                                  fragment_hours=fragment_hours, cache_margins=cache_margins, leak_cache=leak_cache,
                                  entry_name=entry_name,
-                                 deduplication_timeout=deduplication_timeout)
+                                 deduplication_timeout=deduplication_timeout, retention=retention)
         self._disable_cache = is_running_on_wasm()
 
+    @property
+    def enabled(self) -> bool:
+        return not self._disable_cache
+
+    def fragments(self, product, start_time: datetime, stop_time: datetime) -> Tuple[timedelta, List[datetime]]:
+        """The duration and start times of the fragments [start_time, stop_time) of product is cached by."""
+        return self._cache.fragment_list(product_name(product), DateTimeRange(start_time, stop_time))
+
+    def fragments_to_fetch(self, wrapped_self, product, fragments: List[datetime], **kwargs) -> List[datetime]:
+        """The fragments, from :meth:`fragments`, product has no up-to-date entry for and the decorated method would
+        request. Fragments another thread is fetching are left out.
+
+        Together with :meth:`store`, lets a provider fetch several products at once before calling the decorated
+        method, which then finds them in cache.
+        """
+        product = product_name(product)
+        version = self._cache.version(wrapped_self, product)
+        entries = self._cache.get_cache_entries(fragments, product, **kwargs)
+        return [fragment for fragment, entry in zip(fragments, entries)
+                if entry is None or (isinstance(entry, CacheItem) and not is_up_to_date(entry, version))]
+
+    def store(self, wrapped_self, product, variable: Optional[SpeasyVariable], fragments: List[datetime],
+              fragment_duration: timedelta, **kwargs):
+        """Stores variable in the given fragments of product, as the decorated method would once it got it."""
+        product = product_name(product)
+        self._cache.add_to_cache(variable, fragments=fragments, product=product,
+                                 fragment_duration=fragment_duration,
+                                 version=self._cache.version(wrapped_self, product),
+                                 lifetime=self._cache.retention(wrapped_self, product), **kwargs)
+
     def _get_and_wb_fragment_group(self, fragments: List[datetime], fragment_duration: timedelta, get_data,
                                    wrapped_self, product, version, **kwargs) -> Optional[SpeasyVariable]:
         try:
@@ -293,7 +331,7 @@ class Cacheable(object):
                     wrapped_self, product=product, start_time=fragments[0],
                     stop_time=fragments[-1] + fragment_duration, **kwargs),
                 fragments=fragments, product=product, fragment_duration=fragment_duration,
-                version=version, **kwargs)
+                version=version, lifetime=self._cache.retention(wrapped_self, product), **kwargs)
         except Exception as e:
             # In case of exception, drop all cache entries for the fragments we tried to write and forward the exception
             for fragment in fragments:
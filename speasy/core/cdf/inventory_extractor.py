@@ -1,13 +1,15 @@
 import logging
 from datetime import timedelta
-from typing import List, Optional, Union
+from typing import TYPE_CHECKING, List, Optional, Union
 
-import pyistp
-from pyistp.loader import DataVariable, ISTPLoader
 from speasy.core.any_files import any_loc_open
 from speasy.core.cache import CacheCall
 from speasy.core.inventory.indexes import ParameterIndex, DatasetIndex
 
+if TYPE_CHECKING:
+    # pyistp (and pycdfpp) are only imported once a file is actually parsed
+    from pyistp.loader import DataVariable, ISTPLoader
+
 log = logging.getLogger(__name__)
 
 DEFAULT_UUID_FMT = "{var_name}"
@@ -29,7 +31,7 @@ def _fix_value_type(value):
     return str(value)
 
 
-def filter_variable_meta(datavar: DataVariable) -> dict:
+def filter_variable_meta(datavar: "DataVariable") -> dict:
     keep_list = ['CATDESC', 'FIELDNAM', 'UNITS', 'UNIT_PTR', 'DISPLAY_TYPE', 'LABLAXIS', 'LABL_PTR_1', 'LABL_PTR_2',
                  'LABL_PTR_3', 'VIRTUAL', 'FUNCT', 'FILLVAL']
     base = {key: _fix_value_type(value) for key, value in datavar.attributes.items() if key in keep_list}
@@ -48,12 +50,12 @@ def _attribute_value(attr):
         return _fix_value_type(list(attr))
 
 
-def filter_dataset_meta(dataset: ISTPLoader) -> dict:
+def filter_dataset_meta(dataset: "ISTPLoader") -> dict:
     keep_list = ['Caveats', 'Rules_of_use', 'Time_resolution', 'spase_DatasetResourceID', 'HTTP_LINK', 'Data_type',
                  'Acknowledgement']
     return {key: _attribute_value(dataset.attribute(key)) for key in dataset.attributes() if key in keep_list}
 
-def _apply_cda_trick(datavar: DataVariable, meta: dict) -> dict:
+def _apply_cda_trick(datavar: "DataVariable", meta: dict) -> dict:
     VIRTUAL = (datavar.attributes.get('VIRTUAL', 'false').lower() == 'true')
     if not VIRTUAL:
         for depend in datavar.axes:
@@ -62,7 +64,7 @@ def _apply_cda_trick(datavar: DataVariable, meta: dict) -> dict:
         meta['VIRTUAL'] = "TRUE"
     return meta
 
-def extract_parameter(cdf: ISTPLoader, var_name: str, provider: str, uid_fmt: str = DEFAULT_UUID_FMT, meta=None, enable_cda_trick=False) -> \
+def extract_parameter(cdf: "ISTPLoader", var_name: str, provider: str, uid_fmt: str = DEFAULT_UUID_FMT, meta=None, enable_cda_trick=False) -> \
     Optional[ParameterIndex]:
     try:
         datavar = cdf.data_variable(var_name)
@@ -78,7 +80,7 @@ def extract_parameter(cdf: ISTPLoader, var_name: str, provider: str, uid_fmt: st
     return None
 
 
-def _extract_parameters_impl(cdf: ISTPLoader, provider: str, uid_fmt: str = DEFAULT_UUID_FMT, meta=None, enable_cda_trick=False) -> List[
+def _extract_parameters_impl(cdf: "ISTPLoader", provider: str, uid_fmt: str = DEFAULT_UUID_FMT, meta=None, enable_cda_trick=False) -> List[
     ParameterIndex]:
     return list(filter(lambda p: p is not None,
                        [
@@ -89,10 +91,11 @@ def _extract_parameters_impl(cdf: ISTPLoader, provider: str, uid_fmt: str = DEFA
                 )
 
 
-def extract_parameters(url_or_istp_loader: Union[str,ISTPLoader], provider: str, uid_fmt: str = DEFAULT_UUID_FMT, meta=None, enable_cda_trick=False) -> List[ParameterIndex]:
+def extract_parameters(url_or_istp_loader: Union[str,"ISTPLoader"], provider: str, uid_fmt: str = DEFAULT_UUID_FMT, meta=None, enable_cda_trick=False) -> List[ParameterIndex]:
     indexes: List[ParameterIndex] = []
     try:
         if isinstance(url_or_istp_loader, str):
+            import pyistp
             with any_loc_open(url_or_istp_loader) as remote_cdf:
                 cdf = pyistp.load(buffer=remote_cdf.read())
                 return _extract_parameters_impl(cdf, provider=provider, uid_fmt=uid_fmt, meta=meta, enable_cda_trick=enable_cda_trick)
@@ -108,6 +111,7 @@ def extract_parameters(url_or_istp_loader: Union[str,ISTPLoader], provider: str,
 def extract_from_master(url: str, provider: str, params_uid_format: str = "{var_name}",
                         params_meta=None) -> Optional[tuple]:
     # pyistp transparently handles any ISTP master (CDF or NetCDF), so this is format-agnostic.
+    import pyistp
     try:
         with any_loc_open(url, cache_remote_files=True) as remote_file:
             params_meta = params_meta or {}
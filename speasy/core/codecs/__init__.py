@@ -1,9 +1,10 @@
 from .codec_interface import CodecInterface, Buffer
-from .codecs_registry import register_codec, get_codec, user_codecs_dir, load_extra_codecs
+from .codecs_registry import register_codec, register_lazy_codec, get_codec, user_codecs_dir, load_extra_codecs
 
-__all__ = ['CodecInterface', 'register_codec', 'get_codec', 'user_codecs_dir']
+__all__ = ['CodecInterface', 'register_codec', 'register_lazy_codec', 'get_codec', 'sniff_codec', 'user_codecs_dir']
 
 from . import bundled_codecs
+from .sniffing import sniff_codec
 from ..plugins import load_plugins
 
 load_extra_codecs()
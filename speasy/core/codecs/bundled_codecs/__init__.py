@@ -1,10 +1,17 @@
-from .istp.cdf import IstpCdf  # noqa: F401
-try:
-    import netCDF4  # noqa: F401  -- the NetCDF codec needs it (used lazily via pyistp)
-    from .istp.netcdf import IstpNetCDF  # noqa: F401
-except ImportError:  # pragma: no cover - platform-specific (WASM has no netCDF4 wheel)
-    # netCDF4 is unavailable (e.g. WASM/Pyodide, which has no wheel for it):
-    # skip the NetCDF codec. CDF reading (pycdfpp) and the rest still work.
-    pass
-from .hapi.csv import HapiCsv  # noqa: F401
-from .hapi.binary import HapiBinary  # noqa: F401
+"""Codecs shipped with speasy. They are registered as descriptors, each codec module and the libraries it needs
+(pycdfpp, pyistp, netCDF4, pyarrow...) are only imported the first time the codec is looked up."""
+from ..codecs_registry import register_lazy_codec
+
+register_lazy_codec("IstpCdf", f"{__name__}.istp.cdf", extensions=["cdf"], mimetypes=["application/x-cdf"])
+# netCDF4 is unavailable on some platforms (e.g. WASM/Pyodide, which has no wheel for it), the NetCDF codec is then
+# dropped and CDF reading (pycdfpp) and the rest still work.
+register_lazy_codec("IstpNetCDF", f"{__name__}.istp.netcdf", extensions=["nc", "nc4"],
+                    mimetypes=["application/x-netcdf", "application/netcdf"], requires=["netCDF4"])
+register_lazy_codec("hapi/csv", f"{__name__}.hapi.csv")
+register_lazy_codec("hapi/binary", f"{__name__}.hapi.binary")
+register_lazy_codec("ZarrStore", f"{__name__}.zarr_store.codec", extensions=["zarr"])
+# pyarrow is optional, only needed by the Arrow IPC and Parquet codecs
+register_lazy_codec("ArrowIpc", f"{__name__}.arrow.ipc", extensions=["arrow", "feather"],
+                    mimetypes=["application/vnd.apache.arrow.file"], requires=["pyarrow"])
+register_lazy_codec("Parquet", f"{__name__}.arrow.parquet", extensions=["parquet"],
+                    mimetypes=["application/vnd.apache.parquet"], requires=["pyarrow"])
@@ -0,0 +1,185 @@
+"""Apache Arrow tables <-> SpeasyVariables, shared by the Arrow IPC and Parquet codecs.
+
+Variables sharing one time axis are stored as one table: a timestamp column for the time axis, one column per
+variable, multidimensional values as nested fixed size lists, and one column per time dependent axis. Everything
+else (meta, columns, shape and time independent axes) goes in the fields metadata, under the ``speasy`` key, so
+tables written by other tools can be loaded too.
+"""
+import json
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pyarrow as pa
+
+from speasy.core import AnyDateTimeType, make_utc_datetime64
+from speasy.core.any_files import any_loc_open
+from speasy.core.url_utils import is_local_file, to_local_path
+from speasy.core.data_containers import DataContainer, VariableAxis, VariableTimeAxis
+from speasy.products.variable import SpeasyVariable, same_time_axis
+
+_SPEASY_KEY = b"speasy"
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, bytes):
+        return value.decode('latin-1')
+    return str(value)
+
+
+def _field(name: str, array: pa.Array, **metadata) -> pa.Field:
+    return pa.field(name, array.type, metadata={_SPEASY_KEY: json.dumps(metadata, default=_json_default)})
+
+
+def _field_metadata(field: pa.Field) -> Dict[str, Any]:
+    if field.metadata and _SPEASY_KEY in field.metadata:
+        return json.loads(field.metadata[_SPEASY_KEY])
+    return {}
+
+
+def _to_arrow(values: np.ndarray) -> pa.Array:
+    """Wraps values into an Arrow array, without copy as long as they are contiguous native numbers or datetime64.
+    Single component values, shaped (n, 1), are stored as a plain column."""
+    values = np.ascontiguousarray(values)
+    if not values.dtype.isnative:
+        # Arrow buffers are little endian, big endian values are byte swapped first
+        values = values.astype(values.dtype.newbyteorder('='))
+    if values.ndim == 2 and values.shape[1] == 1:
+        values = values.reshape(-1)
+    flat = values.reshape(-1)
+    if flat.dtype.kind in "iufM":
+        array = pa.Array.from_buffers(pa.from_numpy_dtype(flat.dtype), len(flat), [None, pa.py_buffer(flat)])
+    else:
+        array = pa.array(flat)
+    for size in reversed(values.shape[1:]):
+        array = pa.FixedSizeListArray.from_arrays(array, size)
+    return array
+
+
+def _to_numpy(column: pa.ChunkedArray, shape: Optional[List[int]] = None, copy: bool = False) -> np.ndarray:
+    """Values of column, a read-only view of its buffers whenever possible, unless copy is set."""
+    array = column.combine_chunks() if column.num_chunks != 1 else column.chunk(0)
+    inner_shape = []
+    while pa.types.is_fixed_size_list(array.type):
+        inner_shape.append(array.type.list_size)
+        array = array.flatten()
+    if pa.types.is_timestamp(array.type):
+        array = array.cast(pa.timestamp("ns"))
+    values = array.to_numpy(zero_copy_only=False, writable=copy)
+    return values.reshape([len(column)] + (inner_shape if shape is None else shape))
+
+
+def _variables_to_table(variables: List[SpeasyVariable]) -> pa.Table:
+    if len(variables) == 0:
+        raise ValueError("No variables to save")
+    if not all(isinstance(variable, SpeasyVariable) for variable in variables):
+        raise ValueError(f"Expected SpeasyVariables, got {[type(v) for v in variables]}")
+    if not same_time_axis(variables):
+        raise ValueError("All variables must have the same time axis")
+    time_axis = variables[0].axes[0]
+    time_column = _to_arrow(time_axis.values)
+    fields, columns = [_field(time_axis.name, time_column, meta=time_axis.meta)], [time_column]
+    for variable in variables:
+        axes = []
+        for axis in variable.axes[1:]:
+            if axis.is_time_dependent:
+                column = _to_arrow(axis.values)
+                name = f"{variable.name}/{axis.name}"
+                fields.append(_field(name, column, meta=axis.meta, shape=list(axis.values.shape[1:])))
+                columns.append(column)
+                axes.append({"name": axis.name, "meta": axis.meta, "column": name})
+            else:
+                axes.append({"name": axis.name, "meta": axis.meta, "values": axis.values,
+                             "dtype": axis.values.dtype.str})
+        column = _to_arrow(variable.values)
+        fields.append(_field(variable.name, column, meta=variable.meta, columns=variable.columns,
+                             shape=list(variable.values.shape[1:]), axes=axes))
+        columns.append(column)
+    metadata = {_SPEASY_KEY: json.dumps({"time": time_axis.name, "variables": [v.name for v in variables]})}
+    return pa.Table.from_arrays(columns, schema=pa.schema(fields, metadata=metadata))
+
+
+def _time_column(schema: pa.Schema) -> Optional[str]:
+    if schema.metadata and _SPEASY_KEY in schema.metadata:
+        return json.loads(schema.metadata[_SPEASY_KEY])["time"]
+    return next((field.name for field in schema if pa.types.is_timestamp(field.type)), None)
+
+
+def _list_variables(schema: pa.Schema) -> List[str]:
+    if schema.metadata and _SPEASY_KEY in schema.metadata:
+        return json.loads(schema.metadata[_SPEASY_KEY])["variables"]
+    time = _time_column(schema)
+    return [name for name in schema.names if name != time]
+
+
+def _columns_to_read(schema: pa.Schema, variables: List[str]) -> List[str]:
+    """The time column, the requested variables and their time dependent axes, in the table order."""
+    wanted = {_time_column(schema)}
+    for variable in variables:
+        if variable in schema.names:
+            wanted.add(variable)
+            wanted.update(axis["column"] for axis in _field_metadata(schema.field(variable)).get("axes", [])
+                          if "column" in axis)
+    return [name for name in schema.names if name in wanted]
+
+
+def _time_filter_bounds(start_time: Optional[AnyDateTimeType], stop_time: Optional[AnyDateTimeType]):
+    return (None if start_time is None else make_utc_datetime64(start_time),
+            None if stop_time is None else make_utc_datetime64(stop_time))
+
+
+def _slice_by_time(table: pa.Table, time: np.ndarray, start_time: Optional[np.datetime64],
+                   stop_time: Optional[np.datetime64]) -> pa.Table:
+    start = 0 if start_time is None else int(np.searchsorted(time, start_time, side="left"))
+    stop = len(time) if stop_time is None else int(np.searchsorted(time, stop_time, side="left"))
+    return table.slice(start, max(stop - start, 0))
+
+
+def _make_axis(table: pa.Table, axis: Dict[str, Any], copy: bool = False) -> VariableAxis:
+    if "column" in axis:
+        field = table.schema.field(axis["column"])
+        return VariableAxis(values=_to_numpy(table.column(axis["column"]), _field_metadata(field).get("shape"), copy),
+                            meta=axis.get("meta"), name=axis["name"], is_time_dependent=True)
+    return VariableAxis(values=np.array(axis["values"], dtype=axis.get("dtype")), meta=axis.get("meta"),
+                        name=axis["name"], is_time_dependent=False)
+
+
+def _table_to_variables(table: pa.Table, variables: List[str], start_time: Optional[AnyDateTimeType] = None,
+                        stop_time: Optional[AnyDateTimeType] = None, copy: bool = False) -> Dict[str, SpeasyVariable]:
+    time_name = _time_column(table.schema)
+    if time_name is None:
+        raise ValueError("No time column found")
+    if start_time is not None or stop_time is not None:
+        table = _slice_by_time(table, _to_numpy(table.column(time_name), []),
+                               *_time_filter_bounds(start_time, stop_time))
+    time = _to_numpy(table.column(time_name), [], copy)
+    time_axis = VariableTimeAxis(values=time, meta=_field_metadata(table.schema.field(time_name)).get("meta"),
+                                 name=time_name)
+    loaded = {}
+    for name in variables:
+        if name not in table.schema.names:
+            continue
+        metadata = _field_metadata(table.schema.field(name))
+        loaded[name] = SpeasyVariable(
+            axes=[time_axis] + [_make_axis(table, axis, copy) for axis in metadata.get("axes", [])],
+            values=DataContainer(_to_numpy(table.column(name), metadata.get("shape"), copy), meta=metadata.get("meta"),
+                                 name=name),
+            columns=metadata.get("columns"))
+    return loaded
+
+
+def _source(file, cache_remote_files=True):
+    """A local path or an in memory Arrow buffer reader, what both pyarrow readers accept."""
+    if type(file) is str:
+        if is_local_file(file):
+            return to_local_path(file)
+        with any_loc_open(file, mode='rb', cache_remote_files=cache_remote_files) as f:
+            return pa.BufferReader(f.read())
+    if isinstance(file, (bytes, bytearray, memoryview)):
+        return pa.BufferReader(file)
+    if hasattr(file, 'read'):
+        return pa.BufferReader(file.read())
+    raise ValueError(f"Unsupported file type {type(file)}")
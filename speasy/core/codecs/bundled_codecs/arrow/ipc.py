@@ -0,0 +1,81 @@
+from typing import List, AnyStr, Optional, Mapping, Union
+import io
+from datetime import timedelta
+
+import pyarrow as pa
+
+from speasy.core import AnyDateTimeType
+from speasy.core.codecs import CodecInterface, register_codec, Buffer
+from speasy.core.cache import CacheCall
+from speasy.products import SpeasyVariable
+
+from . import _variables_to_table, _table_to_variables, _columns_to_read, _list_variables, _source
+
+
+def _open(file, cache_remote_files=True) -> pa.ipc.RecordBatchFileReader:
+    source = _source(file, cache_remote_files=cache_remote_files)
+    # memory mapped, reading the table or a subset of its columns does not copy anything
+    return pa.ipc.open_file(pa.memory_map(source) if type(source) is str else source)
+
+
+@register_codec
+class ArrowIpc(CodecInterface):
+    """Codec for Apache Arrow IPC files (Feather v2). Variables sharing the same time axis are saved as one table,
+    see :mod:`speasy.core.codecs.bundled_codecs.arrow` for the layout."""
+
+    def load_variables(self,
+                       variables: List[AnyStr],
+                       file: Union[Buffer, str, io.IOBase],
+                       cache_remote_files=True,
+                       start_time: Optional[AnyDateTimeType] = None,
+                       stop_time: Optional[AnyDateTimeType] = None,
+                       copy: bool = False,
+                       **kwargs
+                       ) -> Optional[Mapping[AnyStr, SpeasyVariable]]:
+        """See :meth:`CodecInterface.load_variables`, only the columns of the requested variables are read and
+        with start_time and/or stop_time only the records within [start_time, stop_time) are converted.
+
+        Values are read-only views of the Arrow buffers, of the memory mapped file for local files, unless copy is
+        set."""
+        reader = _open(file, cache_remote_files=cache_remote_files)
+        table = reader.read_all().select(_columns_to_read(reader.schema, variables))
+        return _table_to_variables(table, variables, start_time=start_time, stop_time=stop_time, copy=copy)
+
+    @CacheCall(cache_retention=timedelta(seconds=120), is_pure=True)
+    def load_variable(self,
+                      variable: AnyStr, file: Union[Buffer, str, io.IOBase],
+                      cache_remote_files=True,
+                      **kwargs
+                      ) -> Optional[SpeasyVariable]:
+        return self.load_variables(variables=[variable], file=file, cache_remote_files=cache_remote_files,
+                                   **kwargs).get(variable)
+
+    def save_variables(self,
+                       variables: List[SpeasyVariable],
+                       file: Optional[Union[str, io.IOBase]] = None,
+                       compression: Optional[str] = None,
+                       **kwargs
+                       ) -> Union[bool, Buffer]:
+        """See :meth:`CodecInterface.save_variables`, compression can be 'lz4' or 'zstd'."""
+        table = _variables_to_table(variables)
+        sink = pa.BufferOutputStream() if file is None else file
+        with pa.ipc.new_file(sink, table.schema, options=pa.ipc.IpcWriteOptions(compression=compression)) as writer:
+            writer.write_table(table)
+        if file is None:
+            return memoryview(sink.getvalue())
+        return True
+
+    def list_variables(self, file: Union[Buffer, str, io.IOBase]) -> List[str]:
+        return _list_variables(_open(file).schema)
+
+    @property
+    def supported_extensions(self) -> List[str]:
+        return ["arrow", "feather"]
+
+    @property
+    def supported_mimetypes(self) -> List[str]:
+        return ["application/vnd.apache.arrow.file"]
+
+    @property
+    def name(self) -> str:
+        return self.__class__.__name__
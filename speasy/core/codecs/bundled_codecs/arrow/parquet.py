@@ -0,0 +1,90 @@
+from typing import List, AnyStr, Optional, Mapping, Union
+import io
+from datetime import timedelta
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from speasy.core import AnyDateTimeType
+from speasy.core.codecs import CodecInterface, register_codec, Buffer
+from speasy.core.cache import CacheCall
+from speasy.products import SpeasyVariable
+
+from . import (_variables_to_table, _table_to_variables, _columns_to_read, _list_variables, _source,
+               _time_column, _time_filter_bounds)
+
+
+def _time_filters(schema: pa.Schema, start_time, stop_time):
+    start_time, stop_time = _time_filter_bounds(start_time, stop_time)
+    time = _time_column(schema)
+    filters = []
+    if start_time is not None:
+        filters.append((time, '>=', pa.scalar(start_time, type=pa.timestamp('ns'))))
+    if stop_time is not None:
+        filters.append((time, '<', pa.scalar(stop_time, type=pa.timestamp('ns'))))
+    return filters or None
+
+
+@register_codec
+class Parquet(CodecInterface):
+    """Codec for Apache Parquet files. Variables sharing the same time axis are saved as one table, see
+    :mod:`speasy.core.codecs.bundled_codecs.arrow` for the layout."""
+
+    def load_variables(self,
+                       variables: List[AnyStr],
+                       file: Union[Buffer, str, io.IOBase],
+                       cache_remote_files=True,
+                       start_time: Optional[AnyDateTimeType] = None,
+                       stop_time: Optional[AnyDateTimeType] = None,
+                       copy: bool = False,
+                       **kwargs
+                       ) -> Optional[Mapping[AnyStr, SpeasyVariable]]:
+        """See :meth:`CodecInterface.load_variables`, only the columns of the requested variables are read and
+        with start_time and/or stop_time row groups outside [start_time, stop_time) are skipped using their
+        statistics.
+
+        Values are read-only views of the decoded Arrow buffers, unless copy is set."""
+        source = _source(file, cache_remote_files=cache_remote_files)
+        schema = pq.read_schema(source)
+        table = pq.read_table(source, columns=_columns_to_read(schema, variables),
+                              filters=_time_filters(schema, start_time, stop_time))
+        return _table_to_variables(table, variables, copy=copy)
+
+    @CacheCall(cache_retention=timedelta(seconds=120), is_pure=True)
+    def load_variable(self,
+                      variable: AnyStr, file: Union[Buffer, str, io.IOBase],
+                      cache_remote_files=True,
+                      **kwargs
+                      ) -> Optional[SpeasyVariable]:
+        return self.load_variables(variables=[variable], file=file, cache_remote_files=cache_remote_files,
+                                   **kwargs).get(variable)
+
+    def save_variables(self,
+                       variables: List[SpeasyVariable],
+                       file: Optional[Union[str, io.IOBase]] = None,
+                       compression: Optional[str] = 'snappy',
+                       row_group_size: Optional[int] = None,
+                       **kwargs
+                       ) -> Union[bool, Buffer]:
+        """See :meth:`CodecInterface.save_variables`, smaller row groups make time filtering on load finer."""
+        table = _variables_to_table(variables)
+        sink = pa.BufferOutputStream() if file is None else file
+        pq.write_table(table, sink, compression=compression, row_group_size=row_group_size)
+        if file is None:
+            return memoryview(sink.getvalue())
+        return True
+
+    def list_variables(self, file: Union[Buffer, str, io.IOBase]) -> List[str]:
+        return _list_variables(pq.read_schema(_source(file)))
+
+    @property
+    def supported_extensions(self) -> List[str]:
+        return ["parquet"]
+
+    @property
+    def supported_mimetypes(self) -> List[str]:
+        return ["application/vnd.apache.parquet"]
+
+    @property
+    def name(self) -> str:
+        return self.__class__.__name__
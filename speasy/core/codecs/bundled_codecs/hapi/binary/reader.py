@@ -3,10 +3,12 @@ from typing import Optional, Union, Dict, Any
 
 import numpy as np
 
-from speasy.core.codecs.bundled_codecs.hapi.reader import _load_hapi
+from speasy.core.codecs.bundled_codecs.hapi.reader import _load_hapi, _parse_isotimes
 from speasy.core.codecs.bundled_codecs.hapi.hapi_file import HapiFile
 from speasy.core.codecs.codec_interface import Buffer
 
+# records are read and split into per parameter arrays by chunks of about this size
+_CHUNK_BYTES = 1 << 24
 
 
 def _hapi_header_to_parameters(header):
@@ -38,10 +40,60 @@ def _hapi_parameters_to_dtype(hapi_parameters):
 
     return np.dtype(fields)
 
-def _extract_data_binary(file: io.IOBase, headers: Dict[str, Any]) -> np.ndarray:
+
+def _remaining_bytes(file: io.IOBase) -> Optional[int]:
+    try:
+        position = file.tell()
+        end = file.seek(0, io.SEEK_END)
+        file.seek(position)
+        return end - position
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+def _read_chunks(file: io.IOBase, dtype: np.dtype, count: int):
+    chunk_records = max(1, _CHUNK_BYTES // dtype.itemsize)
+    for start in range(0, count, chunk_records):
+        wanted = min(chunk_records, count - start) * dtype.itemsize
+        chunk = file.read(wanted)
+        while len(chunk) < wanted:
+            more = file.read(wanted - len(chunk))
+            if not more:
+                raise ValueError(f"HAPI binary data ended after {start * dtype.itemsize + len(chunk)} bytes")
+            chunk += more
+        yield np.frombuffer(chunk, dtype=dtype)
+
+
+def _extract_data_binary(file: io.IOBase, headers: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    """Reads the records into one contiguous array per parameter, isotimes already parsed as datetime64[ns].
+
+    Records are read by chunks and split straight into the final arrays, only these and one chunk are in memory at
+    once.
+    """
     _params = _hapi_header_to_parameters(headers)
     _dtype = _hapi_parameters_to_dtype(_params)
-    return np.frombuffer(file.read(), dtype=_dtype)
+    size = _remaining_bytes(file)
+    if size is None:
+        records = np.frombuffer(file.read(), dtype=_dtype)
+        count, chunks = len(records), (records,)
+    else:
+        if size % _dtype.itemsize:
+            raise ValueError(f"HAPI binary data size ({size} bytes) is not a multiple of its records size "
+                             f"({_dtype.itemsize} bytes)")
+        count = size // _dtype.itemsize
+        chunks = _read_chunks(file, _dtype, count)
+    isotimes = {p["name"] for p in _params if p["type"] == "isotime"}
+    data = {name: np.empty((count,) + _dtype[name].shape,
+                           dtype='datetime64[ns]' if name in isotimes else _dtype[name].base)
+            for name in _dtype.names}
+    position = 0
+    for records in chunks:
+        for name, values in data.items():
+            values[position:position + len(records)] = \
+                _parse_isotimes(records[name]) if name in isotimes else records[name]
+        position += len(records)
+    return data
+
 
 def load_hapi_binary(file: Union[Buffer, str, io.IOBase]) -> Optional[HapiFile]:
     data, headers = _load_hapi(file, _extract_data_binary)
@@ -49,13 +101,8 @@ def load_hapi_binary(file: Union[Buffer, str, io.IOBase]) -> Optional[HapiFile]:
     if data is not None and headers is not None:
         time_header = headers["parameters"][0]
         assert time_header["type"] == "isotime"
-        # Widen to whatever length the server declared, truncating loses precision silently.
-        data_time = np.char.rstrip(data["Time"].astype(f"U{data['Time'].dtype.itemsize}"), "Z").astype(
-            "datetime64[ns]")
-        hapi_binary_file.create_parameter(data_time,
-                                       meta=time_header)
-        for i, param_meta in enumerate(headers["parameters"][1:]):
-            hapi_binary_file.create_parameter(data[param_meta["name"]]
-                , meta=param_meta)
+        hapi_binary_file.create_parameter(data[time_header["name"]], meta=time_header)
+        for param_meta in headers["parameters"][1:]:
+            hapi_binary_file.create_parameter(data[param_meta["name"]], meta=param_meta)
         return hapi_binary_file
-    return None
\ No newline at end of file
+    return None
@@ -5,7 +5,7 @@ import logging
 import numpy as np
 import pandas as pds
 
-from speasy.core.codecs.bundled_codecs.hapi.reader import _extract_headers, _load_hapi
+from speasy.core.codecs.bundled_codecs.hapi.reader import _load_hapi, _parse_isotimes
 from speasy.core.codecs.bundled_codecs.hapi.hapi_file import HapiFile
 from speasy.core.codecs.codec_interface import Buffer
 from speasy.core.any_files import any_loc_open
@@ -13,11 +13,59 @@ from speasy.core.any_files import any_loc_open
 log = logging.getLogger(__name__)
 
 
-def _extract_data_csv(file: io.IOBase, headers: Dict[str, Any]) -> pds.DataFrame:
-    data = io.BytesIO(file.read())
-    return pds.read_csv(data, comment='#', sep=',', header=None, skiprows=0, parse_dates=[0], index_col=0)
+# rows parsed at once, each chunk is copied into the final arrays before the next one is read
+_CHUNK_ROWS = 1 << 16
 
 
+def _hapi_parameters_columns(headers: Dict[str, Any]):
+    columns = []
+    for param in headers["parameters"][1:]:
+        _type = param.get("type")
+        if _type == "double":
+            dtype = np.float64
+        elif _type == "integer":
+            dtype = np.int64
+        else:
+            dtype = object
+        columns.append((param["name"], int(np.prod(param.get("size", [1]))), dtype))
+    return columns
+
+
+def _append(values: np.ndarray, count: int, chunk: np.ndarray) -> np.ndarray:
+    if not np.can_cast(chunk.dtype, values.dtype, casting='same_kind'):
+        values = values.astype(np.result_type(values.dtype, chunk.dtype))
+    if count + len(chunk) > len(values):
+        values.resize((max(2 * len(values), count + len(chunk)),) + values.shape[1:], refcheck=False)
+    values[count:count + len(chunk)] = chunk
+    return values
+
+
+def _extract_data_csv(file: io.IOBase, headers: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    """Reads the records into one contiguous array per parameter, isotimes already parsed as datetime64[ns].
+
+    Rows are parsed by chunks straight from ``file``, which can be a stream being downloaded, and copied into arrays
+    which double their capacity when full. Parameters are 2D arrays, one column per flattened component.
+    """
+    time_name = headers["parameters"][0]["name"]
+    columns = _hapi_parameters_columns(headers)
+    data = {time_name: np.empty(0, dtype='datetime64[ns]')}
+    data.update({name: np.empty((0, width), dtype=dtype) for name, width, dtype in columns})
+    count = 0
+    try:
+        chunks = pds.read_csv(file, comment='#', sep=',', header=None, dtype={0: object}, chunksize=_CHUNK_ROWS)
+    except pds.errors.EmptyDataError:
+        chunks = ()
+    for chunk in chunks:
+        data[time_name] = _append(data[time_name], count, _parse_isotimes(chunk[0].to_numpy(dtype='S')))
+        column_offset = 1
+        for name, width, _ in columns:
+            data[name] = _append(data[name], count, chunk.iloc[:, column_offset:column_offset + width].to_numpy())
+            column_offset += width
+        count += len(chunk)
+    for values in data.values():
+        values.resize((count,) + values.shape[1:], refcheck=False)
+    return data
+
 
 def load_hapi_csv(file: Union[Buffer, str, io.IOBase]) -> Optional[HapiFile]:
     data, headers = _load_hapi(file, _extract_data_csv)
@@ -25,14 +73,10 @@ def load_hapi_csv(file: Union[Buffer, str, io.IOBase]) -> Optional[HapiFile]:
     if data is not None and headers is not None:
         time_header = headers["parameters"][0]
         assert time_header["type"] == "isotime"
-        hapi_csv_file.create_parameter(data.index.to_numpy(dtype="datetime64[ns]"),
-                                       meta=time_header)
-        column_offset = 0
-        for i, param_meta in enumerate(headers["parameters"][1:]):
-            shape = param_meta.get("size", [1])
-            flatten_shape = np.prod(shape)
-            hapi_csv_file.create_parameter(data.iloc[:, column_offset:column_offset + flatten_shape].to_numpy().reshape(
-                [len(data.index)] + shape), meta=param_meta)
-            column_offset += flatten_shape
+        hapi_csv_file.create_parameter(data[time_header["name"]], meta=time_header)
+        for param_meta in headers["parameters"][1:]:
+            values = data[param_meta["name"]]
+            hapi_csv_file.create_parameter(values.reshape([len(values)] + param_meta.get("size", [1])),
+                                           meta=param_meta)
         return hapi_csv_file
     return None
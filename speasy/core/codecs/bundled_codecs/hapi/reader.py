@@ -4,22 +4,114 @@ import io
 import json
 from typing import Any, Dict, Optional, Tuple, Union
 
+import numpy as np
 import pandas as pd
 
 from speasy.core.any_files import any_loc_open
 from speasy.core.codecs.codec_interface import Buffer
 
 
+def _digits(chars: np.ndarray, start: int, stop: int) -> np.ndarray:
+    value = chars[:, start].astype(np.int64)
+    for column in range(start + 1, stop):
+        value *= 10
+        value += chars[:, column]
+    # the '0' of every digit, subtracted once
+    return value - ord('0') * ((10 ** (stop - start) - 1) // 9)
+
+
+def _isotime_layout(first: bytes) -> Optional[tuple]:
+    """(ordinal date, date length, time length) of a fixed width isotime like first, None if not supported."""
+    text = first.rstrip(b'\x00 ').rstrip(b'Z')
+    if text[4:5] != b'-':
+        return None
+    if text[7:8] == b'-':
+        ordinal, date_length = False, 10
+    elif len(text) == 8 or text[8:9] == b'T':
+        ordinal, date_length = True, 8
+    else:
+        return None
+    time_length = len(text) - date_length
+    if time_length not in (0, 3, 6, 9) and not (time_length > 10 and text[date_length + 9:date_length + 10] == b'.'):
+        return None
+    return ordinal, date_length, time_length
+
+
+def _day_numbers(periods: np.ndarray, unit: str) -> np.ndarray:
+    """Days since 1970-01-01 of the first day of periods (years or months since 1970), through a table of the few
+    distinct periods, which is much faster than converting every value."""
+    first = periods.min()
+    table = np.arange(first, periods.max() + 1).astype(f'datetime64[{unit}]').astype('datetime64[D]').astype(np.int64)
+    return table[periods - first]
+
+
+def _parse_isotimes(times: np.ndarray) -> np.ndarray:
+    """Fixed width HAPI isotimes (a 'S<length>' array) to datetime64[ns].
+
+    Every field is read at once from the characters columns, assuming all the timestamps are laid out like the
+    first one (YYYY-MM-DD or YYYY-DDD, then as many of Thh, :mm, :ss and .fraction as it has). When they are not,
+    they are left to numpy datetime parser.
+    """
+    if len(times) == 0:
+        return np.empty(0, dtype='datetime64[ns]')
+    layout = _isotime_layout(times[0])
+    if layout is not None:
+        ordinal, date_length, time_length = layout
+        length = date_length + time_length
+        chars = np.ascontiguousarray(times).view(np.uint8).reshape(len(times), times.dtype.itemsize)
+        separators = {4: b'-', **({} if ordinal else {7: b'-'}), date_length: b'T', date_length + 3: b':',
+                      date_length + 6: b':', date_length + 9: b'.'}
+        expected = np.full(length, -1, dtype=np.int16)
+        for position, c in separators.items():
+            if position < length:
+                expected[position] = ord(c)
+        # per column bounds, one pass over the characters instead of one per check
+        low, high = chars.min(axis=0), chars.max(axis=0)
+        is_digit = expected == -1
+        tail = chars[:, length:]
+        tail_padding = np.all((low[length:] == high[length:]) & np.isin(low[length:], (ord('Z'), 0, ord(' '))))
+        if (np.all(low[:length][is_digit] >= ord('0')) and np.all(high[:length][is_digit] <= ord('9'))
+            and np.all(low[:length][~is_digit] == expected[~is_digit])
+            and np.all(high[:length][~is_digit] == expected[~is_digit])
+            and (tail_padding or np.all((tail == ord('Z')) | (tail == 0) | (tail == ord(' '))))):
+            years = _digits(chars, 0, 4) - 1970
+            if ordinal:
+                days = _day_numbers(years, 'Y') + _digits(chars, 5, 8) - 1
+            else:
+                months = _digits(chars, 5, 7)
+                days = _day_numbers(years * 12 + months - 1, 'M') + _digits(chars, 8, 10) - 1
+                if months.min() < 1 or months.max() > 12:
+                    days = None
+            if days is not None:
+                seconds = days * 86400
+                for start, factor in ((date_length + 1, 3600), (date_length + 4, 60), (date_length + 7, 1)):
+                    if start < length:
+                        seconds += _digits(chars, start, start + 2) * factor
+                nanoseconds = seconds * 1_000_000_000
+                if time_length > 10:
+                    fraction = min(time_length - 10, 9)
+                    nanoseconds += _digits(chars, date_length + 10, date_length + 10 + fraction) * 10 ** (9 - fraction)
+                return nanoseconds.view('datetime64[ns]')
+    # Widen to whatever length the server declared, truncating loses precision silently.
+    return np.char.rstrip(times.astype(f"U{times.dtype.itemsize}"), "Z").astype("datetime64[ns]")
+
+
 def _extract_headers(file: io.IOBase) -> Dict[str, Any]:
-    file.seek(0)
+    if file.seekable():
+        file.seek(0)
     header_lines = []
-    while True:
-        pos = file.tell()
-        line = file.readline()
-        if not line.startswith(b"#"):
-            file.seek(pos)  # set pos to data start
-            break
-        header_lines.append(line[1:])
+    if hasattr(file, "peek"):
+        # works on streams too, the data start is never consumed
+        while file.peek(1)[:1] == b"#":
+            header_lines.append(file.readline()[1:])
+    else:
+        while True:
+            pos = file.tell()
+            line = file.readline()
+            if not line.startswith(b"#"):
+                file.seek(pos)  # set pos to data start
+                break
+            header_lines.append(line[1:])
     if not header_lines:
         return {}
     return json.loads(b"".join(header_lines).decode("utf-8"))
@@ -7,6 +7,7 @@ import numpy as np
 import pyistp
 from pyistp.support_data_variable import SupportDataVariable
 
+from speasy.core import make_utc_datetime
 from speasy.core.any_files import any_loc_open
 from speasy.core.url_utils import urlparse, is_local_file, to_local_path
 from speasy.products import SpeasyVariable, VariableAxis, VariableTimeAxis, DataContainer
@@ -47,9 +48,56 @@ def _display_type(variable: pyistp.loader.DataVariable) -> str:
     return ''
 
 
-def _make_axis(axis, time_axis_name):
-    return VariableAxis(values=axis.values.copy(), meta=_fix_attributes_types(axis.attributes), name=axis.name,
-                        is_time_dependent=_is_time_dependent(axis, time_axis_name))
+def _records_in_range(time: np.ndarray, start_time=None, stop_time=None) -> slice:
+    """Records of time within [start_time, stop_time), the same ones SpeasyVariable[start_time:stop_time] keeps."""
+    if len(time) <= 1:
+        # left whole so that _valid_variable_or_none still sees a lone fill value epoch
+        return slice(None)
+    start = None if start_time is None else int(
+        np.searchsorted(time, np.datetime64(make_utc_datetime(start_time).replace(tzinfo=None), 'ns'), side='left'))
+    stop = None if stop_time is None else int(
+        np.searchsorted(time, np.datetime64(make_utc_datetime(stop_time).replace(tzinfo=None), 'ns'), side='left'))
+    return slice(start, stop)
+
+
+def _buffer_owner(values: np.ndarray):
+    """The object at the end of values base chain, the one actually owning its memory."""
+    while isinstance(values.base, np.ndarray):
+        values = values.base
+    return values if values.base is None else values.base
+
+
+def _can_be_handed_over(values: np.ndarray, records: slice, taken: dict) -> bool:
+    """Whether values can be given to a SpeasyVariable as is instead of being copied.
+
+    Only contiguous plain arrays taken whole, which memory was allocated for them alone, either by numpy or by
+    a pycdfpp conversion (to_datetime64) returning a capsule owned buffer. Views on a pycdfpp.Variable are
+    always copied since keeping one would keep the whole decoded CDF in memory, and so are arrays already
+    handed over to another axis or variable of the same load.
+    """
+    if type(values) is not np.ndarray or not values.flags.c_contiguous:
+        return False
+    if records != slice(None) and len(values[records]) != len(values):
+        return False
+    owner = _buffer_owner(values)
+    if not (owner is values or type(owner).__name__ == 'PyCapsule') or id(owner) in taken:
+        return False
+    taken[id(owner)] = owner
+    return True
+
+
+def _take(values: np.ndarray, records: slice = slice(None), taken: Optional[dict] = None) -> np.ndarray:
+    """values[records], without copying values when the loader does not share its buffer."""
+    if taken is not None and _can_be_handed_over(values, records, taken):
+        return values
+    return values[records].copy()
+
+
+def _make_axis(axis, time_axis_name, records: slice = slice(None), taken: Optional[dict] = None):
+    is_time_dependent = _is_time_dependent(axis, time_axis_name)
+    values = _take(axis.values, records if is_time_dependent else slice(None), taken)
+    return VariableAxis(values=values, meta=_fix_attributes_types(axis.attributes), name=axis.name,
+                        is_time_dependent=is_time_dependent)
 
 
 def _build_labels(variable: pyistp.loader.DataVariable):
@@ -72,7 +120,13 @@ def _valid_variable_or_none(variable: SpeasyVariable) -> Optional[SpeasyVariable
     return variable
 
 
-def _load_variable(istp_loader: pyistp.loader.ISTPLoader, variable) -> SpeasyVariable or None:
+def _load_variable(istp_loader: pyistp.loader.ISTPLoader, variable, start_time=None,
+                   stop_time=None, taken: Optional[dict] = None) -> SpeasyVariable or None:
+    """Builds a SpeasyVariable from variable in istp_loader, only with the records in [start_time, stop_time) when
+    given, the others are never copied out of the file.
+
+    When the caller drops istp_loader afterwards it can pass the same taken dict for all the variables it loads,
+    arrays owned by no one else are then handed over to the SpeasyVariable instead of being copied (see _take)."""
     if variable in istp_loader.data_variables():
         var = istp_loader.data_variable(variable)
     elif variable.replace('-', '_') in istp_loader.data_variables():  # THX CSA/ISTP
@@ -85,11 +139,12 @@ def _load_variable(istp_loader: pyistp.loader.ISTPLoader, variable) -> SpeasyVar
             return None
     if (var is not None) and (var.values.shape[0] == var.axes[0].values.shape[0]):
         time_axis_name = var.axes[0].name
+        records = _records_in_range(var.axes[0].values, start_time, stop_time)
         return _valid_variable_or_none(SpeasyVariable(
-            axes=[VariableTimeAxis(values=var.axes[0].values.copy(),
+            axes=[VariableTimeAxis(values=_take(var.axes[0].values, records, taken),
                                    meta=_fix_attributes_types(var.axes[0].attributes))] + [
-                     _make_axis(axis, time_axis_name) for axis in _filter_extra_axes(var)],
-            values=DataContainer(values=var.values.copy(), meta=_fix_attributes_types(var.attributes),
+                     _make_axis(axis, time_axis_name, records, taken) for axis in _filter_extra_axes(var)],
+            values=DataContainer(values=_take(var.values, records, taken), meta=_fix_attributes_types(var.attributes),
                                  name=var.name,
                                  is_time_dependent=True),
             columns=_build_labels(var)))
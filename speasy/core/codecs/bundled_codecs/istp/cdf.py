@@ -1,14 +1,22 @@
-from typing import List, AnyStr, Optional, Mapping, Union
+from typing import List, AnyStr, Optional, Mapping, Union, Tuple, Dict, Any
 import io
+import os
 import logging
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
 from datetime import timedelta
 
 import numpy as np
 import pycdfpp
 import pyistp
 
+from speasy.core import AnyDateTimeType
 from speasy.core.codecs import CodecInterface, register_codec, Buffer
-from speasy.core.cache import CacheCall
+from speasy.core.cache import CacheCall, CacheItem, get_item
+from speasy.core.url_utils import is_local_file, to_local_path
 from speasy.products import SpeasyVariable, VariableAxis
 
 import re
@@ -21,13 +29,111 @@ _PTR_rx = re.compile(r".*_PTR(_\d+)?")
 # for a week before re-checking, matching extract_from_master's retention
 # (speasy/core/cdf/inventory_extractor.py) for the same kind of file.
 _MASTER_CDF_MAX_AGE = timedelta(days=7)
+# Variables of a file are often read one after the other (e.g. b_gse then b_gsm), each one being its own request:
+# opened files are kept that long, up to that many bytes of files, so that they are parsed once.
+_OPENED_FILES_LIFETIME = timedelta(seconds=60)
+_OPENED_FILES_BUDGET = 1 << 28
 
 
-def _load_variables(variables, file=None, buffer=None, master_file=None, master_buffer=None):
-    istp_loader = pyistp.load(file=file, buffer=buffer, master_file=master_file, master_buffer=master_buffer)
-    if istp_loader is not None:
-        return {variable: _load_variable(istp_loader, variable) for variable in variables}
-    return None
+class _OpenedFile:
+    def __init__(self, loader, validators: Tuple, size: int):
+        self.loader = loader
+        self.validators = validators
+        self.size = size
+        # variables are extracted from a loader one request at a time
+        self.lock = threading.Lock()
+        self.expires = time.monotonic() + _OPENED_FILES_LIFETIME.total_seconds()
+
+
+class _OpenedFiles:
+    """pyistp loaders of the recently read files, by file and master CDF URLs, the least recently used ones are
+    dropped past the bytes budget."""
+
+    def __init__(self, budget: int):
+        self._budget = budget
+        self._size = 0
+        self._files: "OrderedDict[Tuple[str, Optional[str]], _OpenedFile]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[str, Optional[str]], validators: Optional[Tuple] = None) -> Optional[_OpenedFile]:
+        """The file opened for key while it is fresh, or once expired if it was opened from files matching
+        validators, it is then fresh again."""
+        with self._lock:
+            opened = self._files.get(key)
+            if opened is None:
+                return None
+            if opened.expires < time.monotonic():
+                if validators is None or validators != opened.validators:
+                    return None
+                opened.expires = time.monotonic() + _OPENED_FILES_LIFETIME.total_seconds()
+            self._files.move_to_end(key)
+            return opened
+
+    def put(self, key: Tuple[str, Optional[str]], opened: _OpenedFile) -> _OpenedFile:
+        with self._lock:
+            previous = self._files.pop(key, None)
+            if previous is not None:
+                self._size -= previous.size
+            if opened.size <= self._budget:
+                self._files[key] = opened
+                self._size += opened.size
+            while self._size > self._budget:
+                self._size -= self._files.popitem(last=False)[1].size
+            return opened
+
+    def clear(self):
+        with self._lock:
+            self._files.clear()
+            self._size = 0
+
+
+_opened_files = _OpenedFiles(_OPENED_FILES_BUDGET)
+
+
+def _validator(url: Optional[str], cache_remote_files: bool) -> Optional[Tuple]:
+    """What tells whether url changed: size and modification time of local files, version (last-modified) of the
+    cached copy of remote ones. None when it can't be told."""
+    if url is None:
+        return ()
+    if is_local_file(url):
+        stat = os.stat(to_local_path(url))
+        return stat.st_mtime_ns, stat.st_size
+    entry = get_item(url) if cache_remote_files else None
+    return (entry.version,) if isinstance(entry, CacheItem) else None
+
+
+def _resolved_size(resolved: Dict[str, Any]) -> int:
+    return sum(len(value) if isinstance(value, bytes) else os.path.getsize(value)
+               for value in resolved.values() if value is not None)
+
+
+def _open(file, master_cdf_url, cache_remote_files=True) -> Optional[_OpenedFile]:
+    """Opens file with its master CDF, files given by URL (or path) are only parsed again once they changed or
+    haven't been read for a while."""
+    key = (file, master_cdf_url) if type(file) is str and type(master_cdf_url) in (str, type(None)) else None
+    opened = _opened_files.get(key) if key is not None else None
+    if opened is not None:
+        return opened
+    # fetches (or revalidates the cached copy of) remote files
+    resolved = dict((_resolve_url_type(file, prefix="", cache_remote_files=cache_remote_files),
+                     _resolve_url_type(master_cdf_url, prefix="master_", cache_remote_files=cache_remote_files,
+                                       max_age=_MASTER_CDF_MAX_AGE)))
+    validators = None
+    if key is not None:
+        file_validator = _validator(file, cache_remote_files)
+        master_validator = _validator(master_cdf_url, cache_remote_files)
+        if file_validator is not None and master_validator is not None:
+            validators = file_validator + master_validator
+            opened = _opened_files.get(key, validators)
+            if opened is not None:
+                return opened
+    loader = pyistp.load(**resolved)
+    if loader is None:
+        return None
+    opened = _OpenedFile(loader, validators, _resolved_size(resolved))
+    if validators is not None:
+        _opened_files.put(key, opened)
+    return opened
 
 
 def _convert_attributes_to_variables(variable_name: str, attrs: Mapping, cdf: pycdfpp.CDF):
@@ -45,8 +151,17 @@ def _convert_attributes_to_variables(variable_name: str, attrs: Mapping, cdf: py
     return clean_attrs
 
 
+def _can_borrow(values: np.ndarray) -> bool:
+    # pycdfpp saves straight from C contiguous native numbers, sparing a copy of each variable
+    return values.dtype.kind in "iuf" and values.dtype.isnative and values.flags.c_contiguous
+
+
+def _compression(compress_variables: bool) -> pycdfpp.CompressionType:
+    return pycdfpp.CompressionType.gzip_compression if compress_variables else pycdfpp.CompressionType.no_compression
+
+
 def _write_axis(ax: VariableAxis, cdf: pycdfpp.CDF, compress_variables=False,
-                time_axis_name: Optional[str] = None) -> bool:
+                time_axis_name: Optional[str] = None, compression_level: int = 6) -> bool:
     data_type = None
     if ax.values.dtype == np.dtype("datetime64[ns]"):
         data_type = pycdfpp.DataType.CDF_TIME_TT2000
@@ -54,18 +169,21 @@ def _write_axis(ax: VariableAxis, cdf: pycdfpp.CDF, compress_variables=False,
     # record varying axis from a fixed one, and without it a grid spanning every dimension comes
     # back time independent and then matches none of them
     attributes = {"DEPEND_0": time_axis_name} if time_axis_name is not None and ax.is_time_dependent else None
+    values = _simplify_shape(ax.values)
     cdf.add_variable(
         name=ax.name,
-        values=_simplify_shape(ax.values),
+        values=values,
         data_type=data_type,
         attributes=attributes,
-        compression=pycdfpp.CompressionType.gzip_compression if compress_variables else pycdfpp.CompressionType.no_compression
+        compression=_compression(compress_variables),
+        copy=not _can_borrow(values),
+        compression_level=compression_level
     )
     return True
 
 
 def _write_variable(v: SpeasyVariable, cdf: pycdfpp.CDF, already_saved_axes: List[VariableAxis],
-                    compress_variables=False) -> None:
+                    compress_variables=False, compression_level: int = 6) -> None:
     def _already_in_cdf(ax: VariableAxis):
         for _ax in already_saved_axes:
             if _ax == ax:
@@ -76,18 +194,22 @@ def _write_variable(v: SpeasyVariable, cdf: pycdfpp.CDF, already_saved_axes: Lis
     for index, ax in enumerate(v.axes):
         a = _already_in_cdf(ax)
         if a is None:
-            _write_axis(ax, cdf, compress_variables, time_axis_name=v.axes[0].name if index else None)
+            _write_axis(ax, cdf, compress_variables, time_axis_name=v.axes[0].name if index else None,
+                        compression_level=compression_level)
             depends[f"DEPEND_{index}"] = ax.name
             already_saved_axes.append(ax)
         else:
             depends[f"DEPEND_{index}"] = a
     attributes = v.meta
     attributes.update(depends)
+    values = _simplify_shape(v.values)
     cdf.add_variable(
         name=v.name,
-        values=_simplify_shape(v.values),
+        values=values,
         attributes=_convert_attributes_to_variables(variable_name=v.name, attrs=attributes, cdf=cdf),
-        compression=pycdfpp.CompressionType.gzip_compression if compress_variables else pycdfpp.CompressionType.no_compression
+        compression=_compression(compress_variables),
+        copy=not _can_borrow(values),
+        compression_level=compression_level
     )
 
 
@@ -100,13 +222,23 @@ class IstpCdf(CodecInterface):
                        file: Union[Buffer, str, io.IOBase],
                        cache_remote_files=True,
                        master_cdf_url: Optional[Union[Buffer, str, io.IOBase]] = None,
+                       start_time: Optional[AnyDateTimeType] = None,
+                       stop_time: Optional[AnyDateTimeType] = None,
                        **kwargs
                        ) -> Optional[Mapping[AnyStr, SpeasyVariable]]:
-        kwargs["variables"] = variables
-        kwargs.update((_resolve_url_type(file, prefix="", cache_remote_files=cache_remote_files),
-                       _resolve_url_type(master_cdf_url, prefix="master_", cache_remote_files=cache_remote_files,
-                                         max_age=_MASTER_CDF_MAX_AGE)))
-        return _load_variables(**kwargs)
+        """See :meth:`CodecInterface.load_variables`, with start_time and/or stop_time only the records within
+        [start_time, stop_time) are loaded, as if the variables were sliced afterward.
+
+        Files given by URL or path stay opened for a minute after being read (within a 256MB budget), reading
+        other variables from them meanwhile doesn't parse them again, nor after as long as they didn't change."""
+        opened = _open(file, master_cdf_url, cache_remote_files=cache_remote_files)
+        if opened is None:
+            return None
+        taken = {}
+        with opened.lock:
+            return {variable: _load_variable(opened.loader, variable, start_time=start_time, stop_time=stop_time,
+                                             taken=taken)
+                    for variable in variables}
 
     @CacheCall(cache_retention=timedelta(seconds=120), is_pure=True)
     def load_variable(self,
@@ -125,19 +257,34 @@ class IstpCdf(CodecInterface):
                        variables: List[SpeasyVariable],
                        file: Optional[Union[str, io.IOBase]] = None,
                        compress_variables=False,
+                       compression_level: int = 6,
                        **kwargs
                        ) -> Union[bool, Buffer]:
+        """See :meth:`CodecInterface.save_variables`, with compress_variables every variable is gzip compressed at
+        compression_level (1 is about twice as fast as the default 6 for slightly bigger files).
+
+        Variables values are not copied, the file is written straight from them to a path. File objects get the
+        file through a temporary one, copied in blocks, so that it is never held in memory as a whole.
+
+        pycdfpp compresses variables one after the other while saving, holding the GIL, and doesn't let callers
+        choose how records are split into blocks: compression runs on a single core and there is no record chunking
+        control.
+        """
         cdf = pycdfpp.CDF()
         axes = []
         for variable in variables:
             if not isinstance(variable, SpeasyVariable):
                 raise ValueError(f"Expected SpeasyVariable, got {type(variable)}")
-            _write_variable(variable, cdf, axes, compress_variables)
-        if type(file) is str:
+            _write_variable(variable, cdf, axes, compress_variables, compression_level)
+        if isinstance(file, (str, os.PathLike)):
             pycdfpp.save(cdf, file)
             return True
         elif isinstance(file, io.IOBase):
-            file.write(pycdfpp.save(cdf))
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, "variables.cdf")
+                pycdfpp.save(cdf, path)
+                with open(path, "rb") as saved:
+                    shutil.copyfileobj(saved, file)
             return True
         elif file is None:
             return memoryview(pycdfpp.save(cdf))
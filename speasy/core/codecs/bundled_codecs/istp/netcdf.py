@@ -1,13 +1,12 @@
 from typing import List, AnyStr, Optional, Mapping, Union
 import io
-import os
-import tempfile
 import logging
 from datetime import timedelta
 
 import numpy as np
 import pyistp
 
+from speasy.core import AnyDateTimeType
 from speasy.core.codecs import CodecInterface, register_codec, Buffer
 from speasy.core.cache import CacheCall
 from speasy.products import SpeasyVariable
@@ -17,10 +16,13 @@ from . import _load_variable, _resolve_url_type, _list_variables
 log = logging.getLogger(__name__)
 
 
-def _load_variables(variables, file=None, buffer=None):
+def _load_variables(variables, file=None, buffer=None, start_time=None, stop_time=None):
     istp_loader = pyistp.load(file=file, buffer=buffer)
     if istp_loader is not None:
-        return {variable: _load_variable(istp_loader, variable) for variable in variables}
+        taken = {}
+        return {variable: _load_variable(istp_loader, variable, start_time=start_time, stop_time=stop_time,
+                                         taken=taken)
+                for variable in variables}
     return None
 
 
@@ -34,6 +36,18 @@ def _nc_dtype(arr: np.ndarray) -> str:
     return 'f8'
 
 
+def _storage_options(shape, compression: Optional[str] = None, complevel: int = 4,
+                     chunk_records: Optional[int] = None) -> dict:
+    """createVariable compression and chunking arguments for a time dependent variable shaped shape."""
+    options = {}
+    if compression is not None:
+        options.update(compression=compression, complevel=complevel, shuffle=True)
+    if chunk_records is not None:
+        # netCDF refuses chunks larger than a fixed dimension
+        options["chunksizes"] = (min(chunk_records, max(1, shape[0])),) + tuple(max(1, s) for s in shape[1:])
+    return options
+
+
 def _try_set_attr(nc_var, key, value):
     try:
         setattr(nc_var, key, value)
@@ -41,12 +55,12 @@ def _try_set_attr(nc_var, key, value):
         log.debug("Could not set netCDF attribute '%s': %s", key, e)
 
 
-def _write_time_axis(axis, ds) -> str:
+def _write_time_axis(axis, ds, storage: dict) -> str:
     dim_name = axis.name
     if dim_name not in ds.dimensions:
         ds.createDimension(dim_name, len(axis.values))
     if dim_name not in ds.variables:
-        var = ds.createVariable(dim_name, 'f8', (dim_name,))
+        var = ds.createVariable(dim_name, 'f8', (dim_name,), **_storage_options(axis.values.shape, **storage))
         var.units = "seconds since 1970-01-01T00:00:00"
         var.VAR_TYPE = "support_data"
         var[:] = axis.values.astype('int64') / 1e9
@@ -81,9 +95,10 @@ def _axis_dimensions(axis, axis_index: int, data_dims: List[str], data_shape) ->
     return (data_dims[axis_index],)
 
 
-def _write_extra_axis(axis, dims: tuple, time_dim_name: str, ds):
+def _write_extra_axis(axis, dims: tuple, time_dim_name: str, ds, storage: dict):
     if axis.name not in ds.variables:
-        var = ds.createVariable(axis.name, _nc_dtype(axis.values), dims)
+        options = _storage_options(axis.values.shape, **storage) if dims[0] == time_dim_name else {}
+        var = ds.createVariable(axis.name, _nc_dtype(axis.values), dims, **options)
         var[:] = axis.values
         for k, val in axis.meta.items():
             _try_set_attr(var, k, val)
@@ -92,14 +107,16 @@ def _write_extra_axis(axis, dims: tuple, time_dim_name: str, ds):
             var.DEPEND_0 = time_dim_name
 
 
-def _write_variable_nc(v: SpeasyVariable, ds, written_axes: list):
-    time_dim_name = _write_time_axis(v.axes[0], ds)
+def _write_variable_nc(v: SpeasyVariable, ds, written_axes: list, storage: dict):
+    time_dim_name = _write_time_axis(v.axes[0], ds, storage)
     var_dims = _data_dimensions(v, time_dim_name, ds)
     for index, ax in enumerate(v.axes[1:], start=1):
         if ax.name not in written_axes:
-            _write_extra_axis(ax, _axis_dimensions(ax, index, var_dims, v.values.shape), time_dim_name, ds)
+            _write_extra_axis(ax, _axis_dimensions(ax, index, var_dims, v.values.shape), time_dim_name, ds,
+                              storage)
             written_axes.append(ax.name)
-    var = ds.createVariable(v.name, _nc_dtype(v.values), tuple(var_dims))
+    var = ds.createVariable(v.name, _nc_dtype(v.values), tuple(var_dims),
+                            **_storage_options(v.values.shape, **storage))
     var[:] = v.values
     for k, val in v.meta.items():
         _try_set_attr(var, k, val)
@@ -110,12 +127,12 @@ def _write_variable_nc(v: SpeasyVariable, ds, written_axes: list):
         var.setncattr(f"DEPEND_{i}", ax.name)
 
 
-def _fill_dataset(ds, variables: List[SpeasyVariable]):
+def _fill_dataset(ds, variables: List[SpeasyVariable], **storage):
     written_axes = []
     for v in variables:
         if not isinstance(v, SpeasyVariable):
             raise ValueError(f"Expected SpeasyVariable, got {type(v)}")
-        _write_variable_nc(v, ds, written_axes)
+        _write_variable_nc(v, ds, written_axes, storage)
 
 
 @register_codec
@@ -126,9 +143,15 @@ class IstpNetCDF(CodecInterface):
                        variables: List[AnyStr],
                        file: Union[Buffer, str, io.IOBase],
                        cache_remote_files=True,
+                       start_time: Optional[AnyDateTimeType] = None,
+                       stop_time: Optional[AnyDateTimeType] = None,
                        **kwargs
                        ) -> Optional[Mapping[AnyStr, SpeasyVariable]]:
+        """See :meth:`CodecInterface.load_variables`, with start_time and/or stop_time only the records within
+        [start_time, stop_time) are loaded, as if the variables were sliced afterward."""
         kwargs["variables"] = variables
+        kwargs["start_time"] = start_time
+        kwargs["stop_time"] = stop_time
         kwargs.update((_resolve_url_type(file, prefix="", cache_remote_files=cache_remote_files),))
         return _load_variables(**kwargs)
 
@@ -145,30 +168,35 @@ class IstpNetCDF(CodecInterface):
         return None
 
     def save_variables(self, variables: List[SpeasyVariable], file: Optional[Union[str, io.IOBase]] = None,
+                       compression: Optional[str] = None, complevel: int = 4, chunk_records: Optional[int] = None,
                        **kwargs) -> Union[bool, Buffer]:
+        """See :meth:`CodecInterface.save_variables`, buffers and streams are written from an in memory dataset,
+        without going through a temporary file.
+
+        compression (any netCDF4 compression, e.g. 'zlib' or 'zstd') with complevel, and chunk_records (records per
+        chunk along time) apply to the time dependent variables.
+        """
         import netCDF4
 
+        storage = {"compression": compression, "complevel": complevel, "chunk_records": chunk_records}
         if isinstance(file, str):
             ds = netCDF4.Dataset(file, "w")
-            _fill_dataset(ds, variables)
+            _fill_dataset(ds, variables, **storage)
             ds.close()
             return True
 
-        tmp_fd, tmp_path = tempfile.mkstemp(suffix='.nc')
+        # the memory argument is only the initial size of the in memory file, it grows as needed
+        ds = netCDF4.Dataset("speasy.nc", "w", memory=sum(int(v.nbytes) for v in variables
+                                                          if isinstance(v, SpeasyVariable)) + (1 << 16))
         try:
-            os.close(tmp_fd)
-            ds = netCDF4.Dataset(tmp_path, "w")
-            _fill_dataset(ds, variables)
-            ds.close()
-            with open(tmp_path, 'rb') as f:
-                data = f.read()
+            _fill_dataset(ds, variables, **storage)
         finally:
-            os.unlink(tmp_path)
+            data = ds.close()
 
         if isinstance(file, io.IOBase):
             file.write(data)
             return True
-        return memoryview(data)
+        return data
 
     def list_variables(self, file: Union[Buffer, str, io.IOBase]) -> List[str]:
         return _list_variables(file)
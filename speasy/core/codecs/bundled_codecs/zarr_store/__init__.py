@@ -0,0 +1,185 @@
+"""Zarr v2 directory stores of SpeasyVariables, chunked along time, to keep local analysis ready archives.
+
+Each variable is a group holding a ``time`` array, a ``values`` array and one ``axis_<n>`` array per extra axis. All
+time dependent arrays of a variable share the same chunk length, so chunk ``i`` of each of them holds the same
+records. The ``time`` array attributes keep the first and last time of each chunk, this index is what lets loading a
+time range read only the chunks intersecting it and saving to an existing store append after its last record.
+
+Arrays are plain Zarr v2 arrays with zlib, zstd or uncompressed chunks, the latter being memory mapped when read, so
+stores can be opened with zarr or xarray too.
+"""
+import json
+import os
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+try:
+    import pyzstd
+except ImportError:
+    pyzstd = None
+
+# default chunk length is chosen so values chunks hold about this many (uncompressed) bytes
+_CHUNK_BYTES = 1 << 22
+_MAX_WORKERS = min(8, os.cpu_count() or 1)
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, bytes):
+        return value.decode('latin-1')
+    return str(value)
+
+
+def _read_json(path: str) -> Dict[str, Any]:
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def _write_json(path: str, content: Dict[str, Any]):
+    # metadata is rewritten on each append, readers must never see a partially written file
+    with open(f"{path}.tmp", 'w') as f:
+        json.dump(content, f, default=_json_default)
+    os.replace(f"{path}.tmp", path)
+
+
+def _compressor(compression: Optional[str]) -> Optional[Dict[str, Any]]:
+    if compression is None:
+        return None
+    if compression == "zlib":
+        return {"id": "zlib", "level": 1}
+    if compression == "zstd":
+        if pyzstd is None:
+            raise ValueError("zstd compression requires pyzstd")
+        return {"id": "zstd", "level": 3}
+    raise ValueError(f"Unsupported compression {compression}, expected 'zlib', 'zstd' or None")
+
+
+def _map(function, items) -> list:
+    items = list(items)
+    if len(items) < 2:
+        return list(map(function, items))
+    # zlib and zstd release the GIL, chunks are (de)compressed in parallel
+    with ThreadPoolExecutor(max_workers=_MAX_WORKERS) as pool:
+        return list(pool.map(function, items))
+
+
+def _make_group(path: str, attributes: Optional[Dict[str, Any]] = None):
+    os.makedirs(path, exist_ok=True)
+    _write_json(os.path.join(path, ".zgroup"), {"zarr_format": 2})
+    if attributes is not None:
+        _write_json(os.path.join(path, ".zattrs"), attributes)
+
+
+def _default_chunk_records(values: np.ndarray) -> int:
+    return max(1, _CHUNK_BYTES // max(1, values[:1].nbytes))
+
+
+class _ZarrArray:
+    """A Zarr v2 array chunked along its first dimension only."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.metadata = _read_json(os.path.join(path, ".zarray"))
+        attributes_path = os.path.join(path, ".zattrs")
+        self.attributes = _read_json(attributes_path) if os.path.exists(attributes_path) else {}
+        self.dtype = np.dtype(self.metadata["dtype"])
+
+    @staticmethod
+    def create(path: str, values: np.ndarray, chunk_records: int, compressor: Optional[Dict[str, Any]],
+               attributes: Dict[str, Any]) -> "_ZarrArray":
+        os.makedirs(path, exist_ok=True)
+        _write_json(os.path.join(path, ".zarray"), {
+            "zarr_format": 2, "shape": [0] + list(values.shape[1:]), "chunks": [chunk_records] + list(values.shape[1:]),
+            "dtype": values.dtype.str, "compressor": compressor, "fill_value": None, "order": "C", "filters": None})
+        _write_json(os.path.join(path, ".zattrs"), attributes)
+        array = _ZarrArray(path)
+        array.append(values)
+        return array
+
+    @property
+    def records(self) -> int:
+        return self.metadata["shape"][0]
+
+    @property
+    def record_shape(self) -> List[int]:
+        return self.metadata["shape"][1:]
+
+    @property
+    def chunk_records(self) -> int:
+        return self.metadata["chunks"][0]
+
+    def _chunk_path(self, index: int) -> str:
+        return os.path.join(self.path, ".".join([str(index)] + ["0"] * len(self.record_shape)))
+
+    def _write_chunk(self, index: int, values: np.ndarray):
+        if len(values) < self.chunk_records:
+            # Zarr v2 stores edge chunks full sized
+            padded = np.zeros([self.chunk_records] + self.record_shape, dtype=self.dtype)
+            padded[:len(values)] = values
+            values = padded
+        data = np.ascontiguousarray(values, dtype=self.dtype).tobytes()
+        compressor = self.metadata["compressor"]
+        if compressor is not None:
+            if compressor["id"] == "zlib":
+                data = zlib.compress(data, compressor["level"])
+            else:
+                data = pyzstd.compress(data, compressor["level"])
+        with open(self._chunk_path(index), 'wb') as f:
+            f.write(data)
+
+    def _read_chunk(self, index: int, out: np.ndarray):
+        """Reads the first len(out) records of the chunk into out."""
+        shape = [self.chunk_records] + self.record_shape
+        compressor = self.metadata["compressor"]
+        if compressor is None:
+            out[:] = np.memmap(self._chunk_path(index), dtype=self.dtype, mode='r', shape=tuple(shape))[:len(out)]
+            return
+        with open(self._chunk_path(index), 'rb') as f:
+            data = f.read()
+        if compressor["id"] == "zlib":
+            data = zlib.decompress(data)
+        elif compressor["id"] == "zstd":
+            if pyzstd is None:
+                raise ValueError(f"Reading {self.path} requires pyzstd")
+            data = pyzstd.decompress(data)
+        else:
+            raise ValueError(f"Unsupported compressor {compressor['id']} in {self.path}")
+        out[:] = np.frombuffer(data, dtype=self.dtype).reshape(shape)[:len(out)]
+
+    def read(self, first_chunk: int, last_chunk: int, records: Optional[int] = None) -> np.ndarray:
+        """Reads the records of chunks [first_chunk, last_chunk), records being the array length to consider."""
+        records = self.records if records is None else records
+        start = first_chunk * self.chunk_records
+        stop = min(max(last_chunk, first_chunk) * self.chunk_records, records)
+        out = np.empty([max(stop - start, 0)] + self.record_shape, dtype=self.dtype)
+        chunks = range(first_chunk, first_chunk + len(range(0, len(out), self.chunk_records)))
+        _map(lambda index: self._read_chunk(
+            index, out[(index - first_chunk) * self.chunk_records:(index - first_chunk + 1) * self.chunk_records]),
+             chunks)
+        return out
+
+    def append(self, values: np.ndarray):
+        if list(values.shape[1:]) != self.record_shape:
+            raise ValueError(f"Can't append records shaped {list(values.shape[1:])} to {self.path}, "
+                             f"its records are shaped {self.record_shape}")
+        if not np.can_cast(values.dtype, self.dtype, casting='same_kind'):
+            raise ValueError(f"Can't append {values.dtype} values to {self.path}, it holds {self.dtype} values")
+        first_chunk, partial = divmod(self.records, self.chunk_records)
+        if partial:
+            values = np.concatenate([self.read(first_chunk, first_chunk + 1), values.astype(self.dtype)])
+        chunk_records = self.chunk_records
+        _map(lambda index: self._write_chunk(
+            first_chunk + index, values[index * chunk_records:(index + 1) * chunk_records]),
+             range(len(range(0, len(values), chunk_records))))
+        self.metadata["shape"][0] = first_chunk * chunk_records + len(values)
+        _write_json(os.path.join(self.path, ".zarray"), self.metadata)
+
+    def set_attributes(self, attributes: Dict[str, Any]):
+        self.attributes = attributes
+        _write_json(os.path.join(self.path, ".zattrs"), attributes)
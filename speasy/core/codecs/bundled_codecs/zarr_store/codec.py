@@ -0,0 +1,197 @@
+from typing import List, AnyStr, Optional, Mapping, Union, Dict, Any
+import io
+import os
+
+import numpy as np
+
+from speasy.core import AnyDateTimeType, make_utc_datetime64
+from speasy.core.codecs import CodecInterface, register_codec, Buffer
+from speasy.core.url_utils import is_local_file, to_local_path
+from speasy.core.data_containers import DataContainer, VariableAxis, VariableTimeAxis
+from speasy.products import SpeasyVariable
+
+from . import _ZarrArray, _compressor, _default_chunk_records, _make_group, _read_json
+
+
+def _store_path(file) -> str:
+    if type(file) is str and is_local_file(file):
+        return to_local_path(file)
+    raise ValueError(f"Zarr stores are local directories, got {file}")
+
+
+def _storable(values: np.ndarray) -> np.ndarray:
+    if values.dtype.kind == 'O':
+        return values.astype(str)
+    return values
+
+
+def _index_time(attributes: Dict[str, Any], time: np.ndarray, offset: int, chunk_records: int) -> Dict[str, Any]:
+    """Updates the first and last time of each chunk once time has been appended after offset records."""
+    first = attributes["chunk_first"][:-(-offset // chunk_records)]
+    last = attributes["chunk_last"][:offset // chunk_records]
+    if len(time):
+        rows = np.arange(offset, offset + len(time))
+        ns = time.astype('datetime64[ns]').view(np.int64)
+        first += ns[rows % chunk_records == 0].tolist()
+        last += ns[(rows % chunk_records == chunk_records - 1) | (rows == rows[-1])].tolist()
+    return {**attributes, "chunk_first": first, "chunk_last": last}
+
+
+def _create_variable(group: str, variable: SpeasyVariable, compressor: Optional[Dict[str, Any]],
+                     chunk_records: Optional[int]):
+    values = _storable(variable.values)
+    chunk_records = chunk_records or _default_chunk_records(values)
+    axes = [f"axis_{index}" for index in range(1, len(variable.axes))]
+    _make_group(group, {"name": variable.name, "meta": variable.meta, "columns": variable.columns, "axes": axes})
+    _ZarrArray.create(os.path.join(group, "values"), values, chunk_records, compressor, {})
+    for name, axis in zip(axes, variable.axes[1:]):
+        axis_values = _storable(axis.values)
+        _ZarrArray.create(os.path.join(group, name), axis_values,
+                          chunk_records if axis.is_time_dependent else max(1, len(axis_values)), compressor,
+                          {"name": axis.name, "meta": axis.meta, "is_time_dependent": axis.is_time_dependent})
+    # time goes last, readers only consider the records it holds
+    time_axis = variable.axes[0]
+    time = _ZarrArray.create(os.path.join(group, "time"), time_axis.values, chunk_records, compressor,
+                             {"name": time_axis.name, "meta": time_axis.meta, "chunk_first": [], "chunk_last": []})
+    time.set_attributes(_index_time(time.attributes, time_axis.values, 0, chunk_records))
+
+
+def _append_variable(group: str, variable: SpeasyVariable):
+    """Appends the records after the last stored one, overlapping records are assumed to be already stored."""
+    attributes = _read_json(os.path.join(group, ".zattrs"))
+    if len(attributes["axes"]) != len(variable.axes) - 1:
+        raise ValueError(f"Can't append {variable.name} with {len(variable.axes)} axes to {group}, "
+                         f"it has {len(attributes['axes']) + 1} axes")
+    time = _ZarrArray(os.path.join(group, "time"))
+    start = 0
+    if time.records:
+        start = int(np.searchsorted(variable.time, np.datetime64(time.attributes["chunk_last"][-1], 'ns'),
+                                    side='right'))
+    if start == len(variable):
+        return
+    _ZarrArray(os.path.join(group, "values")).append(_storable(variable.values[start:]))
+    for name, axis in zip(attributes["axes"], variable.axes[1:]):
+        if axis.is_time_dependent:
+            _ZarrArray(os.path.join(group, name)).append(_storable(axis.values[start:]))
+    offset = time.records
+    time.append(variable.time[start:])
+    time.set_attributes(_index_time(time.attributes, variable.time[start:], offset, time.chunk_records))
+
+
+def _chunks_range(time: _ZarrArray, start_time: Optional[np.datetime64], stop_time: Optional[np.datetime64]):
+    first = np.array(time.attributes["chunk_first"], dtype=np.int64).view('datetime64[ns]')
+    last = np.array(time.attributes["chunk_last"], dtype=np.int64).view('datetime64[ns]')
+    first_chunk = 0 if start_time is None else int(np.searchsorted(last, start_time, side='left'))
+    last_chunk = len(first) if stop_time is None else int(np.searchsorted(first, stop_time, side='left'))
+    return first_chunk, max(first_chunk, last_chunk)
+
+
+def _load_variable(group: str, start_time: Optional[np.datetime64],
+                   stop_time: Optional[np.datetime64]) -> SpeasyVariable:
+    attributes = _read_json(os.path.join(group, ".zattrs"))
+    time_array = _ZarrArray(os.path.join(group, "time"))
+    records = time_array.records
+    first_chunk, last_chunk = _chunks_range(time_array, start_time, stop_time)
+    time = time_array.read(first_chunk, last_chunk, records)
+    start = 0 if start_time is None else int(np.searchsorted(time, start_time, side='left'))
+    stop = len(time) if stop_time is None else int(np.searchsorted(time, stop_time, side='left'))
+
+    def _read(array: _ZarrArray) -> np.ndarray:
+        return array.read(first_chunk, last_chunk, records)[start:stop]
+
+    axes = [VariableTimeAxis(values=time[start:stop], meta=time_array.attributes.get("meta"),
+                             name=time_array.attributes.get("name", "time"))]
+    for name in attributes["axes"]:
+        array = _ZarrArray(os.path.join(group, name))
+        is_time_dependent = array.attributes.get("is_time_dependent", False)
+        axes.append(VariableAxis(values=_read(array) if is_time_dependent else array.read(0, 1),
+                                 meta=array.attributes.get("meta"), name=array.attributes.get("name", name),
+                                 is_time_dependent=is_time_dependent))
+    return SpeasyVariable(
+        axes=axes,
+        values=DataContainer(_read(_ZarrArray(os.path.join(group, "values"))), meta=attributes.get("meta"),
+                             name=attributes.get("name")),
+        columns=attributes.get("columns"))
+
+
+def _list_variables(root: str) -> List[str]:
+    attributes_path = os.path.join(root, ".zattrs")
+    if not os.path.exists(attributes_path):
+        return []
+    return _read_json(attributes_path).get("variables", [])
+
+
+@register_codec
+class ZarrStore(CodecInterface):
+    """Codec for local Zarr v2 directory stores, chunked along time and growing as variables are saved to them,
+    see :mod:`speasy.core.codecs.bundled_codecs.zarr_store` for the layout."""
+
+    def load_variables(self,
+                       variables: List[AnyStr],
+                       file: Union[Buffer, str, io.IOBase],
+                       cache_remote_files=True,
+                       start_time: Optional[AnyDateTimeType] = None,
+                       stop_time: Optional[AnyDateTimeType] = None,
+                       **kwargs
+                       ) -> Optional[Mapping[AnyStr, SpeasyVariable]]:
+        """See :meth:`CodecInterface.load_variables`, with start_time and/or stop_time only the chunks intersecting
+        [start_time, stop_time) are read."""
+        root = _store_path(file)
+        stored = _list_variables(root)
+        start_time = None if start_time is None else make_utc_datetime64(start_time)
+        stop_time = None if stop_time is None else make_utc_datetime64(stop_time)
+        return {name: _load_variable(os.path.join(root, name), start_time, stop_time)
+                for name in variables if name in stored}
+
+    def load_variable(self,
+                      variable: AnyStr, file: Union[Buffer, str, io.IOBase],
+                      cache_remote_files=True,
+                      **kwargs
+                      ) -> Optional[SpeasyVariable]:
+        """See :meth:`CodecInterface.load_variable`, not cached since stores are local and may have been appended
+        to since the last read."""
+        return self.load_variables(variables=[variable], file=file, cache_remote_files=cache_remote_files,
+                                   **kwargs).get(variable)
+
+    def save_variables(self,
+                       variables: List[SpeasyVariable],
+                       file: Optional[Union[str, io.IOBase]] = None,
+                       compression: Optional[str] = "zlib",
+                       chunk_records: Optional[int] = None,
+                       **kwargs
+                       ) -> Union[bool, Buffer]:
+        """See :meth:`CodecInterface.save_variables`, file is the store directory and must be given.
+
+        Variables already in the store get the records after their last stored time appended, others are added.
+        compression ('zlib', 'zstd' or None) and chunk_records (records per chunk, by default about 4MB of values)
+        only apply to newly added variables, uncompressed chunks are memory mapped when read.
+        """
+        if not all(isinstance(variable, SpeasyVariable) for variable in variables):
+            raise ValueError(f"Expected SpeasyVariables, got {[type(v) for v in variables]}")
+        root = _store_path(file)
+        compressor = _compressor(compression)
+        stored = _list_variables(root)
+        for variable in variables:
+            group = os.path.join(root, variable.name)
+            if variable.name in stored:
+                _append_variable(group, variable)
+            else:
+                _create_variable(group, variable, compressor, chunk_records)
+                stored.append(variable.name)
+                _make_group(root, {"variables": stored})
+        return True
+
+    def list_variables(self, file: Union[Buffer, str, io.IOBase]) -> List[str]:
+        return _list_variables(_store_path(file))
+
+    @property
+    def supported_extensions(self) -> List[str]:
+        return ["zarr"]
+
+    @property
+    def supported_mimetypes(self) -> List[str]:
+        return []
+
+    @property
+    def name(self) -> str:
+        return self.__class__.__name__
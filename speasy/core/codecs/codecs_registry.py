@@ -1,4 +1,5 @@
-from typing import Optional
+import importlib
+from typing import List, Optional
 from .codec_interface import CodecInterface
 from speasy.config import core as cfg
 import logging
@@ -29,7 +30,26 @@ def user_codecs_dir():
     """
     return __USER_CODECS_DIR__
 
+class _LazyCodec:
+    """Stands for a codec in the registry until it is first looked up, its module is only imported then."""
+
+    def __init__(self, name: str, module: str, extensions: List[str], mimetypes: List[str], requires: List[str]):
+        self.name = name
+        self.module = module
+        self.supported_extensions = extensions
+        self.supported_mimetypes = mimetypes
+        self.requires = requires
+
+
+def _unregister_codec(codec):
+    for key in [key for key, registered in __CODECS__.items() if registered is codec]:
+        del __CODECS__[key]
+
+
 def _register_codec(codec: CodecInterface):
+    if isinstance(__CODECS__.get(codec.name), _LazyCodec) and not isinstance(codec, _LazyCodec):
+        # the codec a descriptor stood for is being imported
+        _unregister_codec(__CODECS__[codec.name])
     if codec.name in __CODECS__:
         raise ValueError(f"codec {codec.name} already registered")
     __CODECS__[codec.name] = codec
@@ -60,6 +80,40 @@ def register_codec(cls):
     return cls
 
 
+def register_lazy_codec(name: str, module: str, extensions: Optional[List[str]] = None,
+                        mimetypes: Optional[List[str]] = None, requires: Optional[List[str]] = None):
+    """Register a codec without importing it, module is imported the first time the codec is looked up and must
+    register a codec with the same name
+
+    Parameters
+    ----------
+    name : str
+        The codec name
+    module : str
+        The absolute name of the module defining the codec
+    extensions : List[str], optional
+        The file extensions the codec supports
+    mimetypes : List[str], optional
+        The mimetypes the codec supports
+    requires : List[str], optional
+        Optional modules the codec needs, it is dropped from the registry when one of them can't be imported
+    """
+    _register_codec(_LazyCodec(name, module, extensions or [], mimetypes or [], requires or []))
+
+
+def _resolve(codec: _LazyCodec) -> Optional[CodecInterface]:
+    try:
+        for module in codec.requires + [codec.module]:
+            importlib.import_module(module)
+    except ImportError as e:
+        log.debug(f"Codec {codec.name} is not available: {e}")
+    resolved = __CODECS__.get(codec.name)
+    if resolved is codec:
+        _unregister_codec(codec)
+        return None
+    return resolved
+
+
 def _list_dir_abs(path: str):
     return [os.path.join(path, f) for f in os.listdir(path) if f.endswith('.py')]
 
@@ -93,4 +147,7 @@ def get_codec(codec: str) -> Optional[CodecInterface]:
     Optional[CodecInterface]
         The codec that matches the given name, extension or mimetype, or None if no codec is found
     """
-    return __CODECS__.get(codec, None)
+    found = __CODECS__.get(codec, None)
+    if isinstance(found, _LazyCodec):
+        return _resolve(found)
+    return found
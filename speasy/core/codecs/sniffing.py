@@ -0,0 +1,73 @@
+"""Guess the codec able to read some content from its first bytes, without decoding it."""
+import io
+import re
+from typing import Optional, Union
+
+from speasy.core.any_files import any_loc_open
+
+from .codec_interface import CodecInterface, Buffer
+from .codecs_registry import get_codec
+
+_HEADER_BYTES = 4096
+
+# the first magic number gives the CDF version (3, 2.6 and older ones), the second whether the file is compressed
+_CDF_MAGIC = (b"\xcd\xf3\x00\x01", b"\xcd\xf2\x60\x02", b"\x00\x00\xff\xff")
+_CDF_COMPRESSION_MAGIC = (b"\x00\x00\xff\xff", b"\xcc\xcc\x00\x01")
+# classic, 64-bit offset and 64-bit data NetCDF, NetCDF4 files are HDF5 files
+_NETCDF_MAGIC = (b"CDF\x01", b"CDF\x02", b"CDF\x05")
+_HDF5_MAGIC = b"\x89HDF\r\n\x1a\n"
+_HAPI_FORMAT = re.compile(rb'"format"\s*:\s*"(\w+)"')
+
+
+def _codec_key(header: bytes) -> Optional[str]:
+    if header[:4] in _CDF_MAGIC and header[4:8] in _CDF_COMPRESSION_MAGIC:
+        return "cdf"
+    if header[:4] in _NETCDF_MAGIC or header[:8] == _HDF5_MAGIC:
+        return "nc"
+    if header[:6] == b"ARROW1":
+        return "arrow"
+    if header[:4] == b"PAR1":
+        return "parquet"
+    if header[:1] == b"#" and b'"HAPI"' in header:
+        # HAPI data written with its header, which only spells the format when it is not csv
+        hapi_format = _HAPI_FORMAT.search(header)
+        return "hapi/binary" if hapi_format is not None and hapi_format.group(1) == b"binary" else "hapi/csv"
+    return None
+
+
+def _read_header(file: Union[Buffer, str, io.IOBase], cache_remote_files=True) -> bytes:
+    if type(file) is str:
+        with any_loc_open(file, mode='rb', cache_remote_files=cache_remote_files) as f:
+            return f.read(_HEADER_BYTES)
+    if isinstance(file, (bytes, bytearray, memoryview)):
+        return bytes(memoryview(file)[:_HEADER_BYTES])
+    if hasattr(file, 'read'):
+        if file.seekable():
+            position = file.tell()
+            header = file.read(_HEADER_BYTES)
+            file.seek(position)
+            return header
+        if hasattr(file, 'peek'):
+            return file.peek(_HEADER_BYTES)[:_HEADER_BYTES]
+        raise ValueError("Can't sniff a stream that can't be rewound")
+    raise ValueError(f"Unsupported file type {type(file)}")
+
+
+def sniff_codec(file: Union[Buffer, str, io.IOBase], cache_remote_files=True) -> Optional[CodecInterface]:
+    """Get the codec able to read a file from its magic bytes: CDF, NetCDF (classic and HDF5 based NetCDF4), HAPI CSV
+    and binary with their header, Arrow IPC and Parquet.
+
+    Parameters
+    ----------
+    file : Buffer or str or io.IOBase
+        A file path or URL, an in memory file or a file object, which is left at the same position
+    cache_remote_files : bool
+        Whether remote files are cached, as they are by the codecs
+
+    Returns
+    -------
+    Optional[CodecInterface]
+        The codec for that content, or None if the content is not recognized or its codec is not available
+    """
+    key = _codec_key(_read_header(file, cache_remote_files=cache_remote_files))
+    return None if key is None else get_codec(key)
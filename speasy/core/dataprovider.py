@@ -6,8 +6,11 @@ from typing import Callable, List, Optional
 
 from speasy.core.datetime_range import DateTimeRange
 from speasy.core.inventory import ProviderInventory
-from speasy.core.inventory.indexes import (DatasetIndex, ParameterIndex,
-                                           SpeasyIndex, inventory_has_changed)
+from speasy.core.inventory.indexes import (DatasetIndex, InventoryDiff, ParameterIndex,
+                                           SpeasyIndex, detach_inventory, inventory_hash, merge_inventories,
+                                           track_children_changes)
+from speasy.core.inventory.search import product_search
+from speasy.core.inventory.snapshot import snapshot_of
 from speasy.core.proxy import GetInventory, Proxyfiable, MINIMUM_REQUIRED_PROXY_VERSION
 from speasy.inventories import flat_inventories, tree
 
@@ -58,6 +61,7 @@ class DataProvider:
         self.provider_alt_names = provider_alt_names or []
         self.flat_inventory = ProviderInventory()
         self.min_proxy_version = min_proxy_version
+        self._inventory_lock = Lock()
         flat_inventories.__dict__[provider_name] = self.flat_inventory
         for alt_name in self.provider_alt_names:
             flat_inventories.__dict__[alt_name] = self.flat_inventory
@@ -80,19 +84,58 @@ class DataProvider:
     def _update_private_inventory(self, root: SpeasyIndex):
         return self.build_private_inventory(root)
 
+    def _publish_inventory(self, root: SpeasyIndex, flat_inventory: ProviderInventory,
+                           changes: Optional[InventoryDiff] = None):
+        # each is swapped in one assignment, readers get either the previous or the new inventory, never a
+        # partially updated one
+        tree.__dict__[self.provider_name] = root
+        self.flat_inventory = flat_inventory
+        for name in (self.provider_name, *self.provider_alt_names):
+            flat_inventories.__dict__[name] = flat_inventory
+        product_search.inventory_updated(self.provider_name, root, flat_inventory, aliases=self.provider_alt_names,
+                                         diff=changes)
+
     def update_inventory(self):
-        lock = Lock()
-        with lock:
+        """Fetches or rebuilds the inventory and publishes it, keeping the current nodes wherever nothing changed.
+
+        The new inventory is built aside and then swapped in, so that this can run in a background thread (see
+        :func:`speasy.update_inventories`) while the current inventory is still being used. Concurrent updates of
+        the same provider run one after the other.
+        """
+        with self._inventory_lock:
             new_inventory = self._inventory(provider_name=self.provider_name,
                                             disable_proxy=self._inventory_disable_proxy,
                                             min_proxy_version=self.min_proxy_version)
-            if inventory_has_changed(tree.__dict__.get(self.provider_name, SpeasyIndex("", "", "")), new_inventory):
-                if self.provider_name in tree.__dict__:
-                    tree.__dict__[self.provider_name].clear()
-                tree.__dict__[self.provider_name] = new_inventory
-            self._update_private_inventory(tree.__dict__[self.provider_name])
-            self.flat_inventory.clear()
-            self.flat_inventory.update(tree.__dict__[self.provider_name])
+            # hashed as built, before the private inventory gets added
+            inventory_hash(new_inventory)
+            current = tree.__dict__.get(self.provider_name)
+            root, flat_inventory = current, self.flat_inventory
+            # what changed from the published tree, unknown when it gets replaced as a whole
+            changes: Optional[InventoryDiff] = InventoryDiff()
+            if current is None or ((snapshot_of(current) is not None or snapshot_of(new_inventory) is not None)
+                                   and inventory_hash(current) != inventory_hash(new_inventory)):
+                # the flat inventory of a snapshot backed tree is built from its uid tables, rebuilding it is cheap
+                # while merging would load both trees
+                root, flat_inventory = new_inventory, ProviderInventory()
+                flat_inventory.update(new_inventory)
+                changes = None
+            elif snapshot_of(current) is None and snapshot_of(new_inventory) is None:
+                changes = diff = merge_inventories(current, new_inventory)
+                if diff:
+                    root, flat_inventory = new_inventory, flat_inventory.copy()
+                    flat_inventory.apply_diff(diff)
+            # root may be the published tree, or share subtrees with it, the private inventory goes to a copy
+            root = detach_inventory(root)
+            with track_children_changes() as private_changes:
+                self._update_private_inventory(root)
+            if private_changes:
+                if flat_inventory is self.flat_inventory:
+                    flat_inventory = flat_inventory.copy()
+                flat_inventory.apply_diff(private_changes)
+                if changes is not None:
+                    changes.removed += private_changes.removed
+                    changes.added += private_changes.added
+            self._publish_inventory(root, flat_inventory, changes)
 
     def _to_dataset_index(self, index_or_str) -> DatasetIndex:
         if type(index_or_str) is str:
@@ -1 +1 @@
-from .direct_archive_downloader import get_product, first_file
+from .direct_archive_downloader import get_product, get_products, first_file
@@ -3,20 +3,34 @@
 
    from speasy.core.direct_archive_downloader.direct_archive_downloader import *
 """
+import contextvars
+import inspect
+import itertools
 import logging
+import multiprocessing
+import os
+import pickle
+import random
 import re
+import threading
+import weakref
 from collections import defaultdict
+from concurrent.futures import BrokenExecutor, Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import timedelta, datetime
-from functools import partial
-from typing import Dict, Optional, List, Callable, Union, Tuple
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Dict, Optional, List, Callable, Union, Tuple
 
+import numpy as np
 from dateutil.relativedelta import relativedelta
 
-from speasy.core import make_utc_datetime, AnyDateTimeType
+from speasy.config import archive as archive_cfg
+from speasy.core import make_utc_datetime, make_utc_datetime64, AnyDateTimeType
 from speasy.core.cache import CacheCall
-from speasy.core.any_files import list_files as list_remote_files
+from speasy.core.platform import DECODING_WORKER_NAME
+from speasy.core.any_files import any_loc_open, list_files as list_remote_files
 from speasy.core.codecs import get_codec
 from speasy.core.span_utils import intersects
+from speasy.core.url_utils import is_local_file
 from speasy.products import SpeasyVariable
 from speasy.products.variable import merge
 from speasy.core.algorithms import randomized_map
@@ -27,6 +41,9 @@ log = logging.getLogger(__name__)
 # FileLoaderCallable = Callable[[Optional[str], str, ...], Optional[SpeasyVariable]]
 FileLoaderCallable = Callable[..., Optional[SpeasyVariable]]
 
+_LISTING_WORKERS = 8
+_ALWAYS = np.datetime64(np.iinfo(np.int64).max, 'ns')
+
 
 def apply_date_format(txt: str, date: datetime) -> str:
     if date.hour // 12:
@@ -38,12 +55,264 @@ def apply_date_format(txt: str, date: datetime) -> str:
                       p=p)
 
 
-@CacheCall(cache_retention=timedelta(hours=12), is_pure=True)
-def _read_cdf(url: Optional[str], variable: str, master_cdf_url: Optional[str] = None) -> Optional[SpeasyVariable]:
+# process pool _read_cdf_variables hands decoding over to, set by _read_files for the files of one request
+_decoding_pool: contextvars.ContextVar[Optional[Executor]] = contextvars.ContextVar('_decoding_pool', default=None)
+# the long-lived pool itself, (workers, pool), started on first use, False once it failed
+_decoding_executor: Union[None, bool, Tuple[int, ProcessPoolExecutor]] = None
+_decoding_executor_lock = threading.Lock()
+
+
+def _unlink_shared_memory(name: str):
+    try:
+        shm = SharedMemory(name=name)
+    except FileNotFoundError:
+        return
+    shm.close()
+    shm.unlink()
+
+
+def _to_shared_memory(variable: SpeasyVariable) -> Tuple[bytes, str, List[int]]:
+    """Pickles variable with its arrays out-of-band, copied once into a new shared memory block.
+
+    Only the small pickle, the block name and the arrays sizes go back to the parent process through the pool pipe.
+    """
+    buffers = []
+    meta = pickle.dumps(variable, protocol=5, buffer_callback=buffers.append)
+    raw_buffers = [buffer.raw() for buffer in buffers]
+    sizes = [raw.nbytes for raw in raw_buffers]
+    shm = SharedMemory(create=True, size=max(1, sum(sizes)))
+    try:
+        position = 0
+        for raw in raw_buffers:
+            shm.buf[position:position + raw.nbytes] = raw
+            position += raw.nbytes
+    except BaseException:
+        shm.close()
+        shm.unlink()
+        raise
+    shm.close()
+    return meta, shm.name, sizes
+
+
+class _SharedBlock:
+    """Closes a shared memory block once the last of the buffers handed out of it is released."""
+
+    def __init__(self, shm: SharedMemory, buffers_count: int):
+        self._shm = shm
+        self._remaining = buffers_count
+        self._lock = threading.Lock()
+
+    def released(self):
+        with self._lock:
+            self._remaining -= 1
+            if self._remaining == 0:
+                self._shm.close()
+
+
+def _shared_buffers(shm: SharedMemory, sizes: List[int]) -> List[pickle.PickleBuffer]:
+    """Buffers over consecutive chunks of shm, which is closed once all of them are released."""
+    if not sizes:
+        shm.close()
+        return []
+    block = _SharedBlock(shm, len(sizes))
+    buffers = []
+    position = 0
+    for size in sizes:
+        chunk = shm.buf[position:position + size]
+        # a memoryview releases its buffer before calling back, the block can then be closed
+        weakref.finalize(chunk, block.released)
+        # numpy keeps what it gets a buffer from, a PickleBuffer hands out chunk itself where a memoryview would
+        # give a view of the whole block
+        buffers.append(pickle.PickleBuffer(chunk))
+        position += size
+    return buffers
+
+
+def _from_shared_memory(meta: bytes, name: str, sizes: List[int]) -> SpeasyVariable:
+    """Rebuilds a variable sent by _to_shared_memory, its arrays are backed by the shared memory block itself.
+
+    The block is unlinked right away, it stays mapped until the arrays are freed and then goes with them.
+    """
+    shm = SharedMemory(name=name)
+    shm.unlink()
+    return pickle.loads(meta, buffers=_shared_buffers(shm, sizes))
+
+
+def _from_shared_memory_all(decoded: Dict[str, Optional[Tuple[bytes, str, List[int]]]]) \
+    -> Dict[str, Optional[SpeasyVariable]]:
+    """_from_shared_memory for every variable decoded from a file, if one fails the blocks of the variables not
+    rebuilt are unlinked as well."""
+    variables = {}
+    try:
+        for name, shared in decoded.items():
+            variables[name] = None if shared is None else _from_shared_memory(*shared)
+    finally:
+        for name, shared in decoded.items():
+            if name not in variables and shared is not None:
+                _unlink_shared_memory(shared[1])
+    return variables
+
+
+def _decode_cdf(file: Union[str, bytes], variables: List[str], master_cdf: Optional[Union[str, bytes]],
+                start_time: Optional[AnyDateTimeType] = None,
+                stop_time: Optional[AnyDateTimeType] = None) -> Dict[str, Optional[Tuple[bytes, str, List[int]]]]:
+    """Runs in the decoding worker processes, on files already fetched by the parent, which owns the caches."""
+    loaded = get_codec('application/x-cdf').load_variables(variables=variables, file=file, master_cdf_url=master_cdf,
+                                                           start_time=start_time, stop_time=stop_time) or {}
+    shared = {}
+    try:
+        for name in variables:
+            shared[name] = None if loaded.get(name) is None else _to_shared_memory(loaded[name])
+    except BaseException:
+        # the parent only gets the error, not the blocks already made
+        for block in shared.values():
+            if block is not None:
+                _unlink_shared_memory(block[1])
+        raise
+    return shared
+
+
+def _decode_in_pool(pool: Executor, url: str, variables: List[str], master_cdf_url: Optional[str],
+                    start_time: Optional[AnyDateTimeType],
+                    stop_time: Optional[AnyDateTimeType]) -> Optional[Dict[str, Optional[SpeasyVariable]]]:
+    """Decodes variables of the CDF file at url in the decoding pool, None if the pool can't be used anymore, it is
+    then dropped and files are decoded in the calling thread for the rest of the session."""
+    from speasy.core.codecs.bundled_codecs.istp.cdf import _MASTER_CDF_MAX_AGE
+    # fetched here, in one of _read_files threads, so that files go through this process cache
+    file, master_cdf = _fetch(url), _fetch(master_cdf_url, max_age=_MASTER_CDF_MAX_AGE)
+    try:
+        decoded = pool.submit(_decode_cdf, file, variables, master_cdf, start_time, stop_time).result()
+    except BrokenExecutor as e:
+        _discard_decoding_pool(pool, e)
+        return None
+    return _from_shared_memory_all(decoded)
+
+
+def _fetch(url: Optional[str], max_age: Optional[timedelta] = None) -> Optional[Union[str, bytes]]:
+    if url is None or is_local_file(url):
+        return url
+    return any_loc_open(url, mode='rb', cache_remote_files=True, max_age=max_age).read()
+
+
+def _read_cdf(url: Optional[str], variable: str, master_cdf_url: Optional[str] = None,
+              start_time: Optional[AnyDateTimeType] = None,
+              stop_time: Optional[AnyDateTimeType] = None, **kwargs) -> Optional[SpeasyVariable]:
+    """variable from the CDF file at url, only its records within [start_time, stop_time) when given.
+
+    Only those records are copied out of the file. The CDF codec keeps recently read files opened, so reading
+    another range or variable of the same file doesn't parse it again.
+    """
+    loaded = _read_cdf_variables(url, [variable], master_cdf_url, start_time, stop_time, **kwargs)
+    return None if loaded is None else loaded.get(variable)
+
+
+def _read_cdf_variables(url: Optional[str], variables: List[str], master_cdf_url: Optional[str] = None,
+                        start_time: Optional[AnyDateTimeType] = None,
+                        stop_time: Optional[AnyDateTimeType] = None,
+                        **kwargs) -> Optional[Dict[str, SpeasyVariable]]:
+    """Same as _read_cdf for several variables, all of them are extracted once the file is parsed."""
     if url is None:
         return None
-    return get_codec('application/x-cdf').load_variable(file=url, variable=variable, master_cdf_url=master_cdf_url,
-                                                        cache_remote_files=True)
+    pool = _decoding_pool.get()
+    if pool is not None:
+        decoded = _decode_in_pool(pool, url, variables, master_cdf_url, start_time, stop_time)
+        if decoded is not None:
+            return decoded
+    return get_codec('application/x-cdf').load_variables(variables=variables, file=url, master_cdf_url=master_cdf_url,
+                                                         cache_remote_files=True, start_time=start_time,
+                                                         stop_time=stop_time)
+
+
+def _decoding_workers() -> int:
+    return archive_cfg.decoding_workers() or os.cpu_count() or 1
+
+
+class _DecodingWorkersContext(type(multiprocessing.get_context('spawn'))):
+    """Spawn context naming its processes after DECODING_WORKER_NAME.
+
+    A spawned process gets its name before it imports anything, speasy then skips providers initialization
+    whether it is imported by the work items or along with the main module.
+    """
+    _workers_count = itertools.count(1)
+
+    def Process(self, *args, **kwargs):
+        process = super().Process(*args, **kwargs)
+        process.name = f"{DECODING_WORKER_NAME}-{next(self._workers_count)}"
+        return process
+
+
+def _cdf_decoding_pool(workers: int) -> Optional[ProcessPoolExecutor]:
+    """The process pool decoding CDF files, started on first use and kept for the next requests, None once it
+    failed.
+
+    Workers are spawned rather than forked from this process, which has threads by then (fetching threads,
+    connection pools, the inventory refresher...), they start when first needed and each of them imports speasy
+    once, without initializing any provider. A new pool is only made when the decoding_workers config entry changes.
+    """
+    global _decoding_executor
+    with _decoding_executor_lock:
+        if _decoding_executor is False:
+            return None
+        if _decoding_executor is not None and _decoding_executor[0] != workers:
+            _decoding_executor[1].shutdown(wait=False)
+            _decoding_executor = None
+        if _decoding_executor is None:
+            _decoding_executor = (workers, ProcessPoolExecutor(max_workers=workers,
+                                                               mp_context=_DecodingWorkersContext()))
+        return _decoding_executor[1]
+
+
+def _discard_decoding_pool(pool: Executor, error: BaseException):
+    global _decoding_executor
+    with _decoding_executor_lock:
+        if _decoding_executor and _decoding_executor[1] is pool:
+            log.warning(f"CDF decoding worker processes failed ({error}), files are now decoded one after the "
+                        f"other, see archive decoding_workers config entry")
+            pool.shutdown(wait=False)
+            _decoding_executor = False
+
+
+def _read_files(file_reader: FileLoaderCallable, files: List[Any], **kwargs) -> List[Optional[SpeasyVariable]]:
+    """file_reader(file, **kwargs) for every file, in a randomized order like randomized_map, results in files order.
+
+    With more than one decoding worker (see archive decoding_workers config entry) and the CDF readers, files
+    are fetched by threads while the previously fetched ones get decoded by a pool of worker processes. Other
+    readers are called one at a time, in this thread, as they may not be thread safe.
+    """
+    workers = _decoding_workers()
+    pool = None
+    if file_reader in (_read_cdf, _read_cdf_variables) and min(workers, len(files)) > 1:
+        pool = _cdf_decoding_pool(workers)
+    if pool is None:
+        return randomized_map(file_reader, files, **kwargs)
+    order = list(range(len(files)))
+    random.shuffle(order)
+    results = [None] * len(files)
+    token = _decoding_pool.set(pool)
+    try:
+        # twice as many threads as workers, so that while every worker decodes a file the next ones get fetched
+        with ThreadPoolExecutor(max_workers=min(2 * workers, len(files))) as fetchers:
+            futures = {i: fetchers.submit(contextvars.copy_context().run, file_reader, files[i], **kwargs)
+                       for i in order}
+            for i, future in futures.items():
+                results[i] = future.result()
+    finally:
+        _decoding_pool.reset(token)
+    return results
+
+
+def _time_range_kwargs(file_reader: FileLoaderCallable, start_time: AnyDateTimeType,
+                       stop_time: AnyDateTimeType) -> Dict[str, AnyDateTimeType]:
+    """start_time/stop_time for readers that take them, to only load the records of the requested range, older
+    custom readers may not."""
+    try:
+        parameters = inspect.signature(file_reader).parameters.values()
+    except (TypeError, ValueError):
+        return {}
+    names = {p.name for p in parameters}
+    if any(p.kind is p.VAR_KEYWORD for p in parameters) or {'start_time', 'stop_time'} <= names:
+        return {'start_time': start_time, 'stop_time': stop_time}
+    return {}
 
 
 _DIGITS = re.compile(r'(\d+)')
@@ -62,6 +331,16 @@ def _natural_order(file_name: str) -> List[Tuple[int, Union[int, str]]]:
     return [(1, int(chunk)) if chunk.isdigit() else (0, chunk) for chunk in _DIGITS.split(file_name)]
 
 
+def _list_concurrently(function: Callable, items: List[Any]) -> List[Any]:
+    """function(item) for every item, results in items order. Listing a remote folder is mostly waiting for the
+    server, a few threads list a range spanning many folders in about the time of the slowest one."""
+    if len(items) < 2:
+        return list(map(function, items))
+    with ThreadPoolExecutor(max_workers=min(_LISTING_WORKERS, len(items))) as pool:
+        return [future.result() for future in
+                [pool.submit(contextvars.copy_context().run, function, item) for item in items]]
+
+
 def _build_url(url_pattern: str, date: datetime, use_file_list=False, force_refresh=False) -> Optional[str]:
     base_ulr = apply_date_format(url_pattern, date)
     if not use_file_list:
@@ -155,8 +434,7 @@ def _drop_superseded_versions(files: List[re.Match]) -> List[re.Match]:
             for group in grouped.values()]
 
 
-@CacheCall(cache_retention=timedelta(hours=24), is_pure=True)
-def map_ranges(url, fname_regex: Union[str, re.Pattern], date_format: Optional[str] = None) -> List[
+def _map_ranges(url, fname_regex: Union[str, re.Pattern], date_format: Optional[str] = None) -> List[
     Tuple[str, Tuple[datetime, datetime]]]:
     if type(fname_regex) is str:
         fname_regex = re.compile(fname_regex)
@@ -182,6 +460,47 @@ def map_ranges(url, fname_regex: Union[str, re.Pattern], date_format: Optional[s
     return sorted(ranges, key=lambda r: r[1][0])
 
 
+@CacheCall(cache_retention=timedelta(hours=24), is_pure=True)
+def map_ranges(url, fname_regex: Union[str, re.Pattern], date_format: Optional[str] = None) -> List[
+    Tuple[str, Tuple[datetime, datetime]]]:
+    return _map_ranges(url, fname_regex=fname_regex, date_format=date_format)
+
+
+class RangeIndex:
+    """Files of a folder sorted by start time, with their start and stop times as numpy arrays so that files
+    overlapping a time range are found with binary searches instead of a scan of every file."""
+
+    def __init__(self, ranges: List[Tuple[str, Tuple[datetime, Optional[datetime]]]]):
+        self.files = [f for f, _ in ranges]
+        self.starts = np.array([make_utc_datetime64(s) for _, (s, _) in ranges], dtype='datetime64[ns]')
+        # the last file of a folder without stop times has no end
+        self.stops = np.array([_ALWAYS if e is None else make_utc_datetime64(e) for _, (_, e) in ranges],
+                              dtype='datetime64[ns]')
+        # latest stop of each file and those before it, files before the first one reaching a range start can't
+        # overlap it even when bursts overlap each other
+        self.latest_stops = np.maximum.accumulate(self.stops) if len(self.stops) else self.stops
+
+    def __len__(self):
+        return len(self.files)
+
+    def overlapping(self, start: AnyDateTimeType, stop: AnyDateTimeType) -> List[str]:
+        """Files overlapping [start, stop], bounds included like :func:`filter_ranges`, in start time order."""
+        start = make_utc_datetime64(start).astype('datetime64[ns]')
+        stop = make_utc_datetime64(stop).astype('datetime64[ns]')
+        first = int(np.searchsorted(self.latest_stops, start, side='left'))
+        last = int(np.searchsorted(self.starts, stop, side='right'))
+        if first >= last:
+            return []
+        return [self.files[i] for i in np.flatnonzero(self.stops[first:last] >= start) + first]
+
+
+@CacheCall(cache_retention=timedelta(hours=12), is_pure=True)
+def range_index(url, fname_regex: Union[str, re.Pattern], date_format: Optional[str] = None) -> RangeIndex:
+    """:class:`RangeIndex` of the files of url folder matching fname_regex, built from the folder listing and kept
+    as long as it is, a forced refresh of the listing must force a refresh of the index too."""
+    return RangeIndex(_map_ranges(url, fname_regex=fname_regex, date_format=date_format))
+
+
 def filter_ranges(ranges: List[Tuple[str, Tuple[datetime, datetime]]], start: AnyDateTimeType,
                   stop: AnyDateTimeType) -> List[str]:
     """Given a list of (file, (start, stop)) tuples, filter those that overlap with the specified time range.
@@ -225,23 +544,28 @@ class RandomSplitDirectDownload:
     def list_files(split_frequency, url_pattern: str, start_time: AnyDateTimeType, stop_time: AnyDateTimeType,
                    fname_regex: str, date_format=None, force_refresh=False) -> List[str]:
 
-        keep = []
         start_time = make_utc_datetime(start_time)
         stop_time = make_utc_datetime(stop_time)
-        for start in spilt_range(split_frequency, start_time, stop_time):
-
-            base_ulr = apply_date_format(url_pattern, start)
-            folder_url, folder_regex = base_ulr.rsplit('/', 1)
+        base_urls = [apply_date_format(url_pattern, start)
+                     for start in spilt_range(split_frequency, start_time, stop_time)]
 
+        def _map_folder(base_ulr: str):
             if force_refresh:
-                # map_ranges cannot pass it on: CacheCall owns the force_refresh keyword and keeps
-                # it for itself, so the listing map_ranges reads is refreshed from here instead.
+                folder_url, folder_regex = base_ulr.rsplit('/', 1)
+                # range_index cannot pass it on: CacheCall owns the force_refresh keyword and keeps
+                # it for itself, so the listing range_index reads is refreshed from here instead.
                 list_remote_files(folder_url, re.compile(folder_regex), force_refresh=True)
+            return range_index(base_ulr, fname_regex=fname_regex, date_format=date_format,
+                               force_refresh=force_refresh)
 
-            files = filter_ranges(
-                map_ranges(base_ulr, fname_regex=fname_regex, date_format=date_format, force_refresh=force_refresh),
-                start_time, stop_time)
+        # folders are listed concurrently, each of them once
+        unique_urls = list(dict.fromkeys(base_urls))
+        indexes = dict(zip(unique_urls, _list_concurrently(_map_folder, unique_urls)))
 
+        keep = []
+        for base_ulr in base_urls:
+            folder_url = base_ulr.rsplit('/', 1)[0]
+            files = indexes[base_ulr].overlapping(start_time, stop_time)
             if len(files):
                 keep.extend([f'{folder_url}/{f}' for f in files])
         return keep
@@ -253,16 +577,18 @@ class RandomSplitDirectDownload:
 
         # kept in kwargs on purpose: it must also reach the file reader's own cache
         force_refresh = kwargs.get('force_refresh', False)
+        # each file only gives the records of the requested range
         downloader = lambda force_refresh: merge(
-            randomized_map(
-                partial(file_reader, variable=variable, **kwargs),
+            _read_files(
+                file_reader,
                 RandomSplitDirectDownload.list_files(split_frequency=split_frequency,
                                                      url_pattern=url_pattern,
                                                      start_time=start_time, stop_time=stop_time,
                                                      fname_regex=fname_regex,
                                                      date_format=date_format,
                                                      force_refresh=force_refresh
-                                                     )
+                                                     ),
+                variable=variable, **_time_range_kwargs(file_reader, start_time, stop_time), **kwargs
             )
         )
 
@@ -282,6 +608,16 @@ class RandomSplitDirectDownload:
 
 class RegularSplitDirectDownload:
 
+    @staticmethod
+    def list_files(url_pattern: str, start_time: AnyDateTimeType, stop_time: AnyDateTimeType,
+                   use_file_list: bool = False, split_frequency: str = "daily", force_refresh=False) -> List[
+        Optional[str]]:
+        dates = list(spilt_range(split_frequency=split_frequency, start_time=start_time, stop_time=stop_time))
+        build_url = lambda date: _build_url(url_pattern, date, use_file_list=use_file_list,
+                                            force_refresh=force_refresh)
+        # with use_file_list each date lists its folder, they are listed concurrently
+        return _list_concurrently(build_url, dates) if use_file_list else list(map(build_url, dates))
+
     @staticmethod
     def get_product(url_pattern: str, variable: str, start_time: AnyDateTimeType,
                     stop_time: AnyDateTimeType, use_file_list: bool = False, split_frequency: str = "daily",
@@ -290,11 +626,11 @@ class RegularSplitDirectDownload:
         Optional[SpeasyVariable]:
         # kept in kwargs on purpose: it must also reach the file reader's own cache
         force_refresh = kwargs.get('force_refresh', False)
-        v = merge(randomized_map(
-            lambda date: file_reader(_build_url(url_pattern, date, use_file_list=use_file_list,
-                                                force_refresh=force_refresh),
-                                     variable=variable, **kwargs),
-            spilt_range(split_frequency=split_frequency, start_time=start_time, stop_time=stop_time)))
+        # each file only gives the records of the requested range
+        range_kwargs = _time_range_kwargs(file_reader, start_time, stop_time)
+        urls = RegularSplitDirectDownload.list_files(url_pattern, start_time, stop_time, use_file_list=use_file_list,
+                                                     split_frequency=split_frequency, force_refresh=force_refresh)
+        v = merge(_read_files(file_reader, urls, variable=variable, **range_kwargs, **kwargs))
         if v is not None:
             return v[make_utc_datetime(start_time):make_utc_datetime(stop_time)]
         return None
@@ -339,3 +675,49 @@ def get_product(url_pattern: str, split_rule: str, variable: str, start_time: An
                                                      file_reader=file_reader, **kwargs)
 
     return None
+
+
+def get_products(url_pattern: str, split_rule: str, variables: List[str], start_time: AnyDateTimeType,
+                 stop_time: AnyDateTimeType, use_file_list: bool = False, split_frequency: str = "daily",
+                 fname_regex: Optional[str] = None, date_format=None, **kwargs) -> Dict[
+    str, Optional[SpeasyVariable]]:
+    """Same as :func:`get_product` for several variables of the same CDF files: each file is downloaded and parsed
+    once and every variable is extracted from it in the same pass.
+
+    Returns
+    -------
+    Dict[str, Optional[SpeasyVariable]]
+        The variables by name, None for those not found
+    """
+    # kept in kwargs on purpose: it must also reach the file reader's own cache
+    force_refresh = kwargs.get('force_refresh', False)
+    range_kwargs = _time_range_kwargs(_read_cdf_variables, start_time, stop_time)
+
+    def download(force_refresh: bool) -> List[Optional[Dict[str, SpeasyVariable]]]:
+        if split_rule.lower() == "regular":
+            files = RegularSplitDirectDownload.list_files(url_pattern, start_time, stop_time,
+                                                          use_file_list=use_file_list,
+                                                          split_frequency=split_frequency,
+                                                          force_refresh=force_refresh)
+        elif split_rule.lower() == "random":
+            files = RandomSplitDirectDownload.list_files(split_frequency=split_frequency, url_pattern=url_pattern,
+                                                         start_time=start_time, stop_time=stop_time,
+                                                         fname_regex=fname_regex, date_format=date_format,
+                                                         force_refresh=force_refresh)
+        else:
+            return []
+        return _read_files(_read_cdf_variables, files, variables=list(variables), **range_kwargs, **kwargs)
+
+    try:
+        decoded = download(force_refresh=force_refresh)
+    except IOError as e:
+        if '404' in str(e) and split_rule.lower() == "random":
+            # file names may have changed since they were listed, see RandomSplitDirectDownload.get_product
+            decoded = download(force_refresh=True)
+        else:
+            raise e
+    products = {}
+    for name in variables:
+        v = merge([None if file_variables is None else file_variables.get(name) for file_variables in decoded])
+        products[name] = None if v is None else v[make_utc_datetime(start_time):make_utc_datetime(stop_time)]
+    return products
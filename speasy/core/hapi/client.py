@@ -1,18 +1,40 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
 from enum import Enum
 import io
 from json import JSONDecodeError
+import re
 from typing import Dict, List, Mapping, Optional
 from urllib.parse import urlencode
 
+import numpy as np
+
 from speasy.core import http
-from speasy.core.hapi.parser import _parse_hapi_csv
-from speasy.products.variable import SpeasyVariable
+from speasy.core.cache import CacheCall
+from speasy.core.codecs.bundled_codecs.hapi.reader import _parse_isotimes
+from speasy.core.datetime_range import DateTimeRange
+from speasy.core.hapi.parser import _parse_hapi_data
+from speasy.products.variable import SpeasyVariable, merge
 
 from .exceptions import (
     HapiRequestError, HapiServerError, HapiNoData
 )
 
 
+# output formats speasy can decode, by order of preference
+_SUPPORTED_FORMATS = ("binary", "csv")
+
+# requests longer than a dataset maxRequestDuration are split and up to this many fragments are fetched at once
+_MAX_PARALLEL_REQUESTS = 4
+
+# months and years are taken at their shortest so fragments never exceed the server limit
+_ISO8601_DURATION = re.compile(
+    r"^P(?:(?P<years>\d+(?:\.\d+)?)Y)?(?:(?P<months>\d+(?:\.\d+)?)M)?(?:(?P<weeks>\d+(?:\.\d+)?)W)?"
+    r"(?:(?P<days>\d+(?:\.\d+)?)D)?(?:T(?:(?P<hours>\d+(?:\.\d+)?)H)?(?:(?P<minutes>\d+(?:\.\d+)?)M)?"
+    r"(?:(?P<seconds>\d+(?:\.\d+)?)S)?)?$")
+_DURATION_DAYS = {"years": 365, "months": 28, "weeks": 7, "days": 1}
+
+
 class HapiEndpoint(Enum):
     CAPABILITIES = "capabilities"
     CATALOG      = "catalog"
@@ -27,6 +49,40 @@ def _fetch_response(url: str):
     return response
 
 
+@CacheCall(cache_retention=timedelta(minutes=15), is_pure=True)
+def _cached_json(url: str) -> Dict:
+    return _fetch_response(url).json()
+
+
+def _parse_duration(duration: str) -> Optional[timedelta]:
+    match = _ISO8601_DURATION.match(duration or "")
+    if match is None or duration in ("P", "PT") or duration.endswith("T"):
+        return None
+    fields = {name: float(value) for name, value in match.groupdict().items() if value}
+    return timedelta(days=sum(fields.get(name, 0.) * days for name, days in _DURATION_DAYS.items()),
+                     hours=fields.get("hours", 0.), minutes=fields.get("minutes", 0.),
+                     seconds=fields.get("seconds", 0.)) or None
+
+
+def _parse_hapi_time(time: str) -> Optional[np.datetime64]:
+    try:
+        parsed = _parse_isotimes(np.array([time.encode()]))[0]
+    except ValueError:
+        return None
+    return None if np.isnat(parsed) else parsed
+
+
+def _hapi_time_range(start: str, stop: str) -> Optional[DateTimeRange]:
+    start, stop = _parse_hapi_time(start), _parse_hapi_time(stop)
+    if start is None or stop is None:
+        return None
+    return DateTimeRange(start, stop)
+
+
+def _hapi_time(dt) -> str:
+    return dt.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
 def _check_hapi_status(data: Dict) -> None:
     code = data["status"]["code"]
     message = data["status"]["message"]
@@ -52,6 +108,10 @@ def _check_response(response) -> None:
         _check_http_status(response.status_code, response.text)
 
 
+def _is_json(response) -> bool:
+    return response.headers.get("Content-Type", "").split(';')[0].strip().lower() == "application/json"
+
+
 class HapiClient:
     def __init__(self, server_url: str):
         self.server_url = server_url.rstrip('/')
@@ -78,8 +138,36 @@ class HapiClient:
     def _fetch_variables(self, query_parameters: Dict) -> Mapping[str, SpeasyVariable]:
         parameters = query_parameters.get("parameters", [])
         url = self._build_url(HapiEndpoint.DATA, query_parameters)
-        f = io.BytesIO(_fetch_response(url).text.encode("utf-8"))
-        return _parse_hapi_csv(f, parameters)
+        response = http.get(url, preload_content=False)
+        try:
+            # servers may also answer 200 with a JSON status, 1201 when there is no data in the time range
+            if response.status_code != 200 or _is_json(response):
+                _check_response(response)
+                if response.status_code == 200:
+                    raise HapiServerError(response.status_code, f"Unexpected JSON response: {response.text}")
+            # parsed while it downloads, the body is never held in memory as a whole
+            response.raw.auto_close = False  # required to wrap it into an io.BufferedReader
+            return _parse_hapi_data(io.BufferedReader(response.raw), parameters,
+                                    query_parameters.get("format", "csv"))
+        finally:
+            response.close()
+
+    def _fetch_fragment(self, query_parameters: Dict) -> Optional[Mapping[str, SpeasyVariable]]:
+        try:
+            return self._fetch_variables(query_parameters)
+        except HapiNoData:
+            return None
+
+    def _output_format(self) -> str:
+        available = self.get_capabilities().get("outputFormats", ["csv"])
+        return next((f for f in _SUPPORTED_FORMATS if f in available), "csv")
+
+    def _dataset_info(self, dataset: str) -> Dict:
+        """Dataset info with all its parameters, cached for 15 minutes."""
+        return _cached_json(self._build_url(HapiEndpoint.INFO, {self._dataset_param_name: dataset}))
+
+    def _max_request_duration(self, dataset: str) -> Optional[timedelta]:
+        return _parse_duration(self._dataset_info(dataset).get("maxRequestDuration"))
 
     def _build_url(
         self,
@@ -117,7 +205,8 @@ class HapiClient:
         return html_page
 
     def get_capabilities(self) -> Dict:
-        return self._endpoint_to_json(HapiEndpoint.CAPABILITIES)
+        """Server capabilities, cached for 15 minutes."""
+        return _cached_json(self._build_url(HapiEndpoint.CAPABILITIES))
 
     def get_catalog(self) -> Dict:
         return self._endpoint_to_json(HapiEndpoint.CATALOG)
@@ -137,12 +226,27 @@ class HapiClient:
     def get_data(
         self, dataset: str, start: str, stop: str, parameters: List[str]
     ) -> Mapping[str, SpeasyVariable]:
+        """Gets parameters data, in binary when the server supports it.
+
+        Time ranges longer than the dataset ``maxRequestDuration`` are split into as many requests, fetched
+        concurrently and merged back.
+        """
         query_params = {
             self._dataset_param_name: dataset,
             "parameters": parameters,
             "start": start,
             "stop": stop,
-            "format": "csv",
+            "format": self._output_format(),
             "include": "header",
         }
-        return self._fetch_variables(query_params)
+        max_duration = self._max_request_duration(dataset)
+        time_range = _hapi_time_range(start, stop)
+        if max_duration is None or time_range is None or time_range.duration <= max_duration:
+            return self._fetch_variables(query_params)
+        fragments = [{**query_params, "start": _hapi_time(fragment.start_time), "stop": _hapi_time(fragment.stop_time)}
+                     for fragment in time_range.split(max_duration)]
+        with ThreadPoolExecutor(max_workers=min(_MAX_PARALLEL_REQUESTS, len(fragments))) as pool:
+            results = [r for r in pool.map(self._fetch_fragment, fragments) if r is not None]
+        if not results:
+            raise HapiNoData()
+        return {name: merge([r[name] for r in results]) for name in results[0]}
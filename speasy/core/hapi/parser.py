@@ -6,16 +6,17 @@ from speasy.core.hapi.exceptions import HapiError
 from speasy.products.variable import SpeasyVariable
 
 
-def _parse_hapi_csv(
-    file: io.IOBase, parameters: List[str]
+def _parse_hapi_data(
+    file: io.IOBase, parameters: List[str], output_format: str = "csv"
 ) -> Mapping[str, SpeasyVariable]:
-    """Converts the CSV returned by /data into a SpeasyVariable.
+    """Converts the CSV or binary returned by /data into SpeasyVariables.
     """
     if not parameters:
         raise HapiError(
             f"Wrong 'parameters' argument to hapi.load_variables: {parameters}"
         )
-    hapi_csv_codec: CodecInterface = get_codec('hapi/csv')
-    variables = hapi_csv_codec.load_variables(file=file, variables=parameters,
-                                              disable_cache=True)
+    hapi_codec: CodecInterface = get_codec(f'hapi/{output_format}')
+    variables = hapi_codec.load_variables(file=file, variables=parameters,
+                                          disable_cache=True)
     return variables
+
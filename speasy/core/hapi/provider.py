@@ -1,8 +1,20 @@
+from datetime import datetime, timedelta
 from typing import List, Mapping, Optional
 
+from speasy.core.cache import Cacheable, group_fragments_if
+from speasy.core.datetime_range import DateTimeRange
 from speasy.products.variable import SpeasyVariable
 
-from .client import HapiClient
+from .client import HapiClient, _hapi_time, _hapi_time_range, _parse_hapi_time
+from .exceptions import HapiNoData
+
+# Datasets without modificationDate give no way to know when their data changed, their cached fragments are
+# refreshed once they are this old instead.
+_UNVERSIONED_FRAGMENTS_RETENTION = timedelta(days=1)
+
+
+def _hapi_cache_entry_name(prefix: str, product: str, start_time: str, **kwargs):
+    return f"{prefix}/{kwargs.get('server_url')}/{product}/{start_time}"
 
 
 class HapiProvider:
@@ -25,5 +37,81 @@ class HapiProvider:
         return self.hapi_client.get_info(dataset, parameters)
 
     def data(self, dataset: str, start: str, stop: str,
-             parameters: List[str]) -> Mapping[str, SpeasyVariable]:
-        return self.hapi_client.get_data(dataset, start, stop, parameters)
+             parameters: List[str], disable_cache=False) -> Mapping[str, SpeasyVariable]:
+        """Gets parameters data, each parameter is cached by fragments and only the missing ones are requested, in a
+        single request for all the parameters.
+
+        Cached fragments are outdated once the dataset info modificationDate is more recent than when they were
+        stored, or after a day for datasets without modificationDate.
+        """
+        time_range = _hapi_time_range(start, stop)
+        if time_range is None or disable_cache or not self._fragments.enabled:
+            return self.hapi_client.get_data(dataset, start, stop, parameters)
+        if not self._fetch_missing_fragments(dataset, parameters, time_range):
+            raise HapiNoData()
+        variables = {parameter: self._get_parameter(f"{dataset}/{parameter}", time_range.start_time,
+                                                    time_range.stop_time, server_url=self.hapi_client.server_url)
+                     for parameter in parameters}
+        if all(v is None for v in variables.values()):
+            raise HapiNoData()
+        return variables
+
+    def _dataset_modification_date(self, dataset: str) -> Optional[datetime]:
+        return _parse_hapi_time(self.hapi_client._dataset_info(dataset).get("modificationDate") or "")
+
+    def product_version(self, product: str) -> str:
+        modification_date = self._dataset_modification_date(product.rsplit('/', 1)[0])
+        return str(modification_date) if modification_date is not None else ""
+
+    def product_retention(self, product: str) -> Optional[timedelta]:
+        if self._dataset_modification_date(product.rsplit('/', 1)[0]) is None:
+            return _UNVERSIONED_FRAGMENTS_RETENTION
+        return None
+
+    def _fetch_missing_fragments(self, dataset: str, parameters: List[str], time_range: DateTimeRange) -> bool:
+        """Fetches the fragments that are missing or outdated for any of the parameters, with one request for all
+        of them per group of contiguous fragments, and stores each parameter fragments in cache.
+
+        Returns False when nothing was cached and the server has no data for the whole range.
+        """
+        server_url = self.hapi_client.server_url
+        fragment_duration, fragments = self._fragments.fragments(dataset, time_range.start_time, time_range.stop_time)
+        missing = {fragment: [] for fragment in fragments}
+        for parameter in parameters:
+            # pending entries are being fetched by another thread, _get_parameter waits for them
+            for fragment in self._fragments.fragments_to_fetch(self, f"{dataset}/{parameter}", fragments,
+                                                               server_url=server_url):
+                missing[fragment].append(parameter)
+        groups = group_fragments_if(
+            [(fragment, missing_parameters) for fragment, missing_parameters in missing.items() if missing_parameters],
+            lambda previous, current: previous[1] == current[1] and previous[0] + fragment_duration == current[0])
+        found_data = any(len(p) < len(parameters) for p in missing.values())
+        for group in groups:
+            group_fragments, group_parameters = [fragment for fragment, _ in group], group[0][1]
+            try:
+                variables = self.hapi_client.get_data(dataset, _hapi_time(group_fragments[0]),
+                                                      _hapi_time(group_fragments[-1] + fragment_duration),
+                                                      group_parameters)
+            except HapiNoData:
+                continue
+            if variables is None:
+                continue
+            found_data = True
+            for parameter in group_parameters:
+                self._fragments.store(self, f"{dataset}/{parameter}", variables.get(parameter),
+                                      fragments=group_fragments, fragment_duration=fragment_duration,
+                                      server_url=server_url)
+        return found_data
+
+    _fragments = Cacheable(prefix="hapi", version=product_version, retention=product_retention,
+                           fragment_hours=lambda x: 12, entry_name=_hapi_cache_entry_name)
+
+    @_fragments
+    def _get_parameter(self, product: str, start_time: datetime, stop_time: datetime,
+                       **kwargs) -> Optional[SpeasyVariable]:
+        dataset, parameter = product.rsplit('/', 1)
+        try:
+            variables = self.hapi_client.get_data(dataset, _hapi_time(start_time), _hapi_time(stop_time), [parameter])
+        except HapiNoData:
+            return None
+        return variables.get(parameter) if variables is not None else None
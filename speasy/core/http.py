@@ -98,6 +98,10 @@ class Response:
     def ok(self):
         return self.status_code in (200, 304)
 
+    @property
+    def raw(self):
+        return self._response
+
     def __getattr__(self, item):
         return getattr(self._response, item)
 
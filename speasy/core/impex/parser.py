@@ -9,6 +9,10 @@ from ...core.inventory.indexes import (CatalogIndex, ComponentIndex,
                                        TemplatedParameterIndex, SpeasyIndex,
                                        TimetableIndex)
 
+# elements whose index node can only be built once the whole element is parsed
+_SUBTREE_TAGS = ('parameter', 'argument')
+_FEED_SIZE = 1 << 20
+
 
 def to_xmlid(index_or_str) -> str:
     if type(index_or_str) is str:
@@ -135,8 +139,8 @@ class ImpexXMLParser:
 
 
     @staticmethod
-    def parse(xml, provider_name, name_mapping=None, is_public: bool = True):
-        handlers = {
+    def _handlers():
+        return {
             'mission': ImpexXMLParser.make_path_node,
             'observatory': ImpexXMLParser.make_path_node,
             'datasetGroup': ImpexXMLParser.make_path_node,
@@ -152,21 +156,69 @@ class ImpexXMLParser:
             'argument': ImpexXMLParser.parse_template_argument
         }
 
-        def _recursive_parser(parent, node, is_node_public):
-            if name_mapping and node.tag in name_mapping:
-                name_key = name_mapping[node.tag]
-            elif node.tag not in handlers.keys():
-                name_key = ''
-            else:
-                name_key = 'name'
-            new = handlers.get(node.tag, ImpexXMLParser.make_path_node)(parent, node, provider_name, name_key,
-                                                                        is_node_public)
-            for subnode in node:
-                _recursive_parser(new, subnode, is_node_public)
+    @staticmethod
+    def _make_node(parent, node, provider_name, handlers, name_mapping, is_public: bool):
+        if name_mapping and node.tag in name_mapping:
+            name_key = name_mapping[node.tag]
+        elif node.tag not in handlers.keys():
+            name_key = ''
+        else:
+            name_key = 'name'
+        return handlers.get(node.tag, ImpexXMLParser.make_path_node)(parent, node, provider_name, name_key, is_public)
+
+    @staticmethod
+    def _make_subtree(parent, node, provider_name, handlers, name_mapping, is_public: bool):
+        new = ImpexXMLParser._make_node(parent, node, provider_name, handlers, name_mapping, is_public)
+        for subnode in node:
+            ImpexXMLParser._make_subtree(new, subnode, provider_name, handlers, name_mapping, is_public)
+        return new
 
+    @staticmethod
+    def parse_element(tree, provider_name, name_mapping=None, is_public: bool = True):
+        """Same as :meth:`parse` from an already parsed XML element."""
         root = SpeasyIndex("root", provider_name, f"{provider_name}_root_node")
-        if xml is not None:
-            tree = Et.fromstring(xml)
-            _recursive_parser(root, tree, is_node_public=is_public)
+        ImpexXMLParser._make_subtree(root, tree, provider_name, ImpexXMLParser._handlers(), name_mapping, is_public)
+        return root
+
+    @staticmethod
+    def parse(xml, provider_name, name_mapping=None, is_public: bool = True):
+        """Builds an inventory tree from an Impex XML tree (obs data tree, time tables or catalogs lists...).
 
+        The XML is parsed as a stream: index nodes are built as XML elements come and elements are dropped
+        once built, so the whole XML tree is never held in memory along with the inventory tree. Only the
+        elements that need their subtree to be built (templated parameters, arguments) are kept until their
+        end.
+        """
+        root = SpeasyIndex("root", provider_name, f"{provider_name}_root_node")
+        if xml is None:
+            return root
+        handlers = ImpexXMLParser._handlers()
+        parser = Et.XMLPullParser(events=('start', 'end'))
+        parents = [root]
+        deferred_depth = 0
+
+        def process_events():
+            nonlocal deferred_depth
+            for event, node in parser.read_events():
+                if event == 'start':
+                    if deferred_depth or node.tag in _SUBTREE_TAGS:
+                        deferred_depth += 1
+                    else:
+                        parents.append(ImpexXMLParser._make_node(parents[-1], node, provider_name, handlers,
+                                                                 name_mapping, is_public))
+                elif deferred_depth:
+                    deferred_depth -= 1
+                    if not deferred_depth:
+                        ImpexXMLParser._make_subtree(parents[-1], node, provider_name, handlers, name_mapping,
+                                                     is_public)
+                        node.clear()
+                else:
+                    parents.pop()
+                    node.clear()
+
+        for start in range(0, len(xml), _FEED_SIZE):
+            parser.feed(xml[start:start + _FEED_SIZE])
+            process_events()
+        parser.close()
+        process_events()
         return root
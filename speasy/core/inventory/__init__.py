@@ -1,5 +1,84 @@
-from typing import Dict, Callable
-from .indexes import ParameterIndex, DatasetIndex, TimetableIndex, ComponentIndex, CatalogIndex, SpeasyIndex,TemplatedParameterIndex
+from collections.abc import MutableMapping
+from typing import Dict, Callable, Iterator, Optional
+from .indexes import ParameterIndex, DatasetIndex, TimetableIndex, ComponentIndex, CatalogIndex, SpeasyIndex,TemplatedParameterIndex, InventoryDiff, walk_inventory
+from .snapshot import FLAT_INVENTORY_CATEGORIES, InventorySnapshot, snapshot_of
+
+
+class FlatIndex(MutableMapping):
+    """uid -> index mapping of one flat inventory category.
+
+    Behaves like a dict, and when the inventory comes from a snapshot, also answers from the snapshot uid
+    tables so that nodes are only built when looked up.
+    """
+
+    def __init__(self, category: str):
+        self._category = category
+        self._entries: Dict[str, SpeasyIndex] = {}
+        self._snapshot: Optional[InventorySnapshot] = None
+        self._removed = set()
+
+    def attach(self, snapshot: InventorySnapshot):
+        self._snapshot = snapshot
+        self._removed.clear()
+
+    def _from_snapshot(self, uid) -> Optional[SpeasyIndex]:
+        if self._snapshot is not None and type(uid) is str and uid not in self._removed:
+            return self._snapshot.lookup(self._category, uid)
+        return None
+
+    def __getitem__(self, uid):
+        node = self._entries.get(uid)
+        if node is None:
+            node = self._from_snapshot(uid)
+            if node is None:
+                raise KeyError(uid)
+        return node
+
+    def __contains__(self, uid):
+        return uid in self._entries or self._from_snapshot(uid) is not None
+
+    def __setitem__(self, uid, node):
+        self._entries[uid] = node
+
+    def __delitem__(self, uid):
+        if uid in self._entries:
+            del self._entries[uid]
+            if self._from_snapshot(uid) is not None:
+                self._removed.add(uid)
+        elif self._from_snapshot(uid) is not None:
+            self._removed.add(uid)
+        else:
+            raise KeyError(uid)
+
+    def _snapshot_uids(self) -> Iterator[str]:
+        if self._snapshot is not None:
+            for uid in self._snapshot.uids(self._category):
+                if uid not in self._entries and uid not in self._removed:
+                    yield uid
+
+    def __iter__(self):
+        yield from list(self._entries)
+        yield from self._snapshot_uids()
+
+    def __len__(self):
+        if self._snapshot is None:
+            return len(self._entries)
+        return len(self._entries) + sum(1 for _ in self._snapshot_uids())
+
+    def clear(self):
+        self._entries.clear()
+        self._snapshot = None
+        self._removed.clear()
+
+    def copy(self) -> 'FlatIndex':
+        other = FlatIndex(self._category)
+        other._entries = dict(self._entries)
+        other._snapshot = self._snapshot
+        other._removed = set(self._removed)
+        return other
+
+    def __repr__(self):
+        return f'<FlatIndex {self._category}: {len(self)} entries>'
 
 
 class ProviderInventory:
@@ -13,21 +92,17 @@ class ProviderInventory:
     _type_lookup: Dict[type, Callable]
 
     def __init__(self):
-        self.parameters = {}
-        self.datasets = {}
+        self.parameters = FlatIndex('parameters')
+        self.datasets = FlatIndex('datasets')
         self.instruments = {}
         self.observatories = {}
         self.missions = {}
-        self.timetables = {}
-        self.catalogs = {}
-        self.components = {}
+        self.timetables = FlatIndex('timetables')
+        self.catalogs = FlatIndex('catalogs')
+        self.components = FlatIndex('components')
         self._type_lookup = {
-            ParameterIndex: lambda node: self.parameters.__setitem__(node.spz_uid(), node),
-            TemplatedParameterIndex: lambda node: self.parameters.__setitem__(node.spz_uid(), node),
-            DatasetIndex: lambda node: self.datasets.__setitem__(node.spz_uid(), node),
-            TimetableIndex: lambda node: self.timetables.__setitem__(node.spz_uid(), node),
-            ComponentIndex: lambda node: self.components.__setitem__(node.spz_uid(), node),
-            CatalogIndex: lambda node: self.catalogs.__setitem__(node.spz_uid(), node),
+            index_type: getattr(self, category).__setitem__
+            for index_type, category in FLAT_INVENTORY_CATEGORIES.items()
         }
 
     def clear(self):
@@ -40,15 +115,57 @@ class ProviderInventory:
         self.catalogs.clear()
         self.components.clear()
 
-    def _register_nodes(self, node: SpeasyIndex):
-        if isinstance(node, SpeasyIndex):
-            for child in node.__dict__.values():
-                self._type_lookup.get(type(child), lambda _: None)(child)
-                self._register_nodes(child)
+    def copy(self) -> 'ProviderInventory':
+        """A copy that can be updated while this one is still in use, indexes are shared, not copied."""
+        other = ProviderInventory()
+        for category in ('parameters', 'datasets', 'timetables', 'catalogs', 'components'):
+            setattr(other, category, getattr(self, category).copy())
+        for category in ('instruments', 'observatories', 'missions'):
+            setattr(other, category, dict(getattr(self, category)))
+        other._type_lookup = {
+            index_type: getattr(other, category).__setitem__
+            for index_type, category in FLAT_INVENTORY_CATEGORIES.items()
+        }
+        return other
+
+    def _register_nodes(self, root: SpeasyIndex):
+        # only the loaded nodes are walked: the children a snapshot node has not loaded yet are already in the
+        # snapshot uid tables
+        for node in walk_inventory(root, loaded_only=True):
+            register = self._type_lookup.get(type(node))
+            if register is not None:
+                register(node.spz_uid(), node)
 
     def update(self, root: SpeasyIndex):
+        snapshot = snapshot_of(root)
+        if snapshot is not None:
+            for category in set(FLAT_INVENTORY_CATEGORIES.values()):
+                getattr(self, category).attach(snapshot)
         self._register_nodes(root)
 
+    def _unregister(self, node: SpeasyIndex):
+        category = FLAT_INVENTORY_CATEGORIES.get(type(node))
+        if category is not None:
+            entries = getattr(self, category)
+            # another node with the same uid may have won the registration, it stays
+            if entries.get(node.spz_uid()) is node:
+                del entries[node.spz_uid()]
+
+    def apply_diff(self, diff: InventoryDiff):
+        """Updates the flat inventory from the changes of the tree it was built from, without walking the
+        unchanged parts of the tree."""
+        for subtree in diff.removed:
+            for node in walk_inventory(subtree):
+                self._unregister(node)
+        for orig, _ in diff.replaced:
+            self._unregister(orig)
+        for _, new in diff.replaced:
+            register = self._type_lookup.get(type(new))
+            if register is not None:
+                register(new.spz_uid(), new)
+        for subtree in diff.added:
+            self._register_nodes(subtree)
+
 
 class FlatInventories:
     def __init__(self):
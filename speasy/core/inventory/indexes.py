@@ -1,48 +1,263 @@
+import hashlib
 import json
-from typing import Optional, Union
+import sys
+import threading
+import warnings
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+from types import MappingProxyType
+from typing import Iterator, List, Optional, Tuple, Union
 
 __INDEXES_TYPES__ = {}
 
+_IDENTITY_KEYS = {'__spz_provider__': '_spz_provider', '__spz_name__': '_spz_name', '__spz_uid__': '_spz_uid'}
+_NO_CHILDREN = MappingProxyType({})
+_MISSING = object()
+_UNHASHED_META = frozenset(('build_date',))
+_changes_tracking = threading.local()
+
+
+class _IndexSlots:
+    # identity, children and metadata live in slots rather than in an instance dict, children and metadata
+    # in two separate dicts (None while a node has no children, as most leaves), plus what a node loaded from
+    # an inventory snapshot needs to load its children on first access and the structural hash of the subtree,
+    # see inventory_hash
+    __slots__ = ('_spz_provider', '_spz_name', '_spz_uid', '_spz_children', '_spz_meta', '_spz_origin',
+                 '_spz_pending', '_spz_hash')
+
+
+def _load_pending(node: '_IndexSlots'):
+    if node._spz_pending:
+        node._spz_origin[0].load_children(node)
+
+
+def _children(node: '_IndexSlots'):
+    """The children already attached to node, without loading the pending ones of a snapshot node."""
+    return node._spz_children or _NO_CHILDREN
+
+
+def _record_change(node: '_IndexSlots', removed: Optional['SpeasyIndex'], added: Optional['SpeasyIndex']):
+    # only hashed nodes, the ones of a built inventory, are tracked, not the ones of a tree being built
+    if node._spz_hash is not None:
+        changes = getattr(_changes_tracking, 'changes', None)
+        if changes is not None:
+            changes.append((removed, added))
+
+
+def _set_entry(node: '_IndexSlots', key: str, value):
+    slot = _IDENTITY_KEYS.get(key)
+    if slot is not None:
+        object.__setattr__(node, slot, value)
+    elif key == '__spz_type__':
+        pass  # always the node class name
+    elif isinstance(value, SpeasyIndex):
+        node._spz_meta.pop(key, None)
+        if node._spz_children is None:
+            node._spz_children = {}
+        _record_change(node, node._spz_children.get(key), value)
+        node._spz_children[key] = value
+    else:
+        if node._spz_children is not None and key in node._spz_children:
+            _record_change(node, node._spz_children.pop(key), None)
+        node._spz_meta[sys.intern(key) if type(key) is str else key] = value
+
+
+class _IndexEntries(MutableMapping):
+    """The mapping returned by ``SpeasyIndex.__dict__``, every entry of a node, metadata, identity and children,
+    as a regular instance dict used to hold them."""
+    __slots__ = ('_node',)
+
+    def __init__(self, node: '_IndexSlots'):
+        _load_pending(node)
+        self._node = node
+
+    def __getitem__(self, key):
+        node = self._node
+        value = _children(node).get(key, _MISSING)
+        if value is _MISSING:
+            value = node._spz_meta.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        if key in _IDENTITY_KEYS:
+            return getattr(node, _IDENTITY_KEYS[key])
+        if key == '__spz_type__':
+            return type(node).__name__
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        _set_entry(self._node, key, value)
+
+    def __delitem__(self, key):
+        node = self._node
+        if key in node._spz_meta:
+            del node._spz_meta[key]
+        elif key in _children(node):
+            _record_change(node, node._spz_children.pop(key), None)
+        else:
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        return key in self._node._spz_meta or key in _children(self._node) or key in _IDENTITY_KEYS \
+            or key == '__spz_type__'
+
+    def __iter__(self):
+        node = self._node
+        yield from list(node._spz_meta)
+        yield from _IDENTITY_KEYS
+        yield '__spz_type__'
+        yield from list(_children(node))
+
+    def __len__(self):
+        return len(self._node._spz_meta) + len(_IDENTITY_KEYS) + 1 + len(_children(self._node))
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class _IndexType(type):
+    def __new__(mcs, name, bases, namespace, **kwargs):
+        if '__slots__' not in namespace:
+            # without it the subclass would get a real instance dict hiding the SpeasyIndex.__dict__ property
+            warnings.warn(f"{name} should define __slots__, at least an empty one, as SpeasyIndex subclasses "
+                          f"keep their entries in slots", DeprecationWarning, stacklevel=2)
+            namespace['__slots__'] = ()
+        return super().__new__(mcs, name, bases, namespace, **kwargs)
+
+
+class SpeasyIndex(_IndexSlots, metaclass=_IndexType):
+    __slots__ = ()
 
-class SpeasyIndex:
     def __init_subclass__(cls, **kwargs):
         super().__init_subclass__(**kwargs)
         __INDEXES_TYPES__[cls.__name__] = cls
 
     def __init__(self, name: str, provider: str, uid: str, meta: Optional[dict] = None):
+        self._spz_origin = None
+        self._spz_pending = False
+        self._spz_hash = None
+        self._spz_children = None
+        self._spz_meta = {}
         if meta:
-            self.__dict__.update(meta)
-        self.__spz_provider__ = provider
-        self.__spz_name__ = name
-        self.__spz_uid__ = uid
-        self.__spz_type__ = self.__class__.__name__
+            for key, value in meta.items():
+                _set_entry(self, key, value)
+        self._spz_provider = provider
+        self._spz_name = name
+        self._spz_uid = uid
+
+    @property
+    def __dict__(self):
+        return _IndexEntries(self)
+
+    @__dict__.setter
+    def __dict__(self, value):
+        self._spz_pending = False
+        self._spz_hash = None
+        self._spz_children = None
+        self._spz_meta = {}
+        for key, entry in value.items():
+            _set_entry(self, key, entry)
+
+    def __getattr__(self, item):
+        # only reached for names that are neither a slot nor a class attribute: children, metadata, and the
+        # __spz_*__ identity names kept for compatibility
+        if not item.startswith('_spz_'):
+            _load_pending(self)
+            children = self._spz_children
+            if children is not None and item in children:
+                return children[item]
+            meta = self._spz_meta
+            if item in meta:
+                return meta[item]
+            if item in _IDENTITY_KEYS:
+                return getattr(self, _IDENTITY_KEYS[item])
+            if item == '__spz_type__':
+                return type(self).__name__
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{item}'")
+
+    def __setattr__(self, key, value):
+        if key.startswith('_spz_'):
+            object.__setattr__(self, key, value)
+        else:
+            _load_pending(self)
+            _set_entry(self, key, value)
+
+    def __delattr__(self, item):
+        if item.startswith('_spz_'):
+            object.__delattr__(self, item)
+        else:
+            try:
+                del self.__dict__[item]
+            except KeyError:
+                raise AttributeError(f"'{type(self).__name__}' object has no attribute '{item}'") from None
+
+    def __dir__(self):
+        _load_pending(self)
+        return sorted(set(super().__dir__()) | set(self._spz_meta) | set(_children(self)))
+
+    def __getstate__(self):
+        return dict(self.__dict__)
+
+    def __setstate__(self, state):
+        self._spz_origin = None
+        self._spz_pending = False
+        self._spz_hash = None
+        self._spz_children = None
+        self._spz_meta = {}
+        for key, value in state.items():
+            _set_entry(self, key, value)
 
     def __eq__(self, other):
         return self.__dict__ == other.__dict__
 
     def clear(self):
-        keys = list(self.__dict__.keys())
-        for key in keys:
-            if not key.startswith('__spz_'):
-                self.__dict__.pop(key)
+        self._spz_pending = False
+        self._spz_hash = None
+        self._spz_children = None
+        self._spz_meta = {}
 
     def spz_provider(self):
-        return self.__spz_provider__
+        return self._spz_provider
 
     def spz_name(self):
-        return self.__spz_name__
+        return self._spz_name
 
     def spz_uid(self):
-        return self.__spz_uid__
+        return self._spz_uid
 
     def spz_type(self):
-        return self.__spz_type__
+        return type(self).__name__
 
     def __repr__(self):
         return f'<SpeasyIndex: {self.spz_name()}>'
 
 
+def walk_inventory(root: SpeasyIndex, loaded_only: bool = False) -> Iterator[SpeasyIndex]:
+    """Yields root and every node below it, depth first, without recursion.
+
+    Parameters
+    ----------
+    root: SpeasyIndex
+        inventory tree root
+    loaded_only: bool
+        skips the children of snapshot nodes that were not loaded yet instead of loading them
+    """
+    stack = [iter((root,))]
+    while stack:
+        node = next(stack[-1], None)
+        if node is None:
+            stack.pop()
+            continue
+        yield node
+        if not loaded_only:
+            _load_pending(node)
+        children = node._spz_children
+        if children:
+            stack.append(iter(list(children.values())))
+
+
 class TimetableIndex(SpeasyIndex):
+    __slots__ = ()
+
     def __init__(self, name: str, provider: str, uid: str, meta: Optional[dict] = None):
         super().__init__(name, provider, uid, meta)
 
@@ -51,6 +266,8 @@ class TimetableIndex(SpeasyIndex):
 
 
 class CatalogIndex(SpeasyIndex):
+    __slots__ = ()
+
     def __init__(self, name: str, provider: str, uid: str, meta: Optional[dict] = None):
         super().__init__(name, provider, uid, meta)
 
@@ -59,6 +276,8 @@ class CatalogIndex(SpeasyIndex):
 
 
 class ComponentIndex(SpeasyIndex):
+    __slots__ = ()
+
     def __init__(self, name: str, provider: str, uid: str, meta: Optional[dict] = None):
         super().__init__(name, provider, uid, meta)
 
@@ -67,6 +286,8 @@ class ComponentIndex(SpeasyIndex):
 
 
 class ParameterIndex(SpeasyIndex):
+    __slots__ = ()
+
     def __init__(self, name: str, provider: str, uid: str, meta: Optional[dict] = None):
         super().__init__(name, provider, uid, meta)
 
@@ -87,6 +308,8 @@ class ParameterIndex(SpeasyIndex):
 
 
 class ArgumentIndex(SpeasyIndex):
+    __slots__ = ()
+
     def __init__(self, name: str, provider: str, uid: str, meta: Optional[dict] = None):
         super().__init__(name, provider, uid, meta)
 
@@ -95,6 +318,8 @@ class ArgumentIndex(SpeasyIndex):
 
 
 class ArgumentListIndex(SpeasyIndex):
+    __slots__ = ()
+
     def __init__(self, name: str, provider: str, uid: str, meta: Optional[dict] = None):
         super().__init__(name, provider, uid, meta)
 
@@ -116,7 +341,7 @@ class ArgumentListIndex(SpeasyIndex):
 
 
 class TemplatedParameterIndex(ParameterIndex):
-    __spz_arguments__: ArgumentListIndex
+    __slots__ = ()
 
     def __init__(self, name: str, provider: str, uid: str, meta: Optional[dict] = None):
         super().__init__(name, provider, uid, meta)
@@ -129,6 +354,8 @@ class TemplatedParameterIndex(ParameterIndex):
 
 
 class DatasetIndex(SpeasyIndex):
+    __slots__ = ()
+
     def __init__(self, name: str, provider: str, uid: str, meta: Optional[dict] = None):
         super().__init__(name, provider, uid, meta)
 
@@ -198,16 +425,175 @@ def make_inventory_node(parent, ctor, name, provider, uid, **meta):
     return parent.__dict__[name]
 
 
+def _sorted_items(mapping) -> list:
+    try:
+        return sorted(mapping.items())
+    except TypeError:  # keys of mixed types
+        return sorted(mapping.items(), key=lambda item: repr(item[0]))
+
+
+def _node_hash(node: SpeasyIndex, children_hashes: Optional[dict] = None) -> int:
+    meta = node._spz_meta
+    if not _UNHASHED_META.isdisjoint(meta):
+        meta = {key: value for key, value in meta.items() if key not in _UNHASHED_META}
+    if children_hashes is None:
+        children_hashes = {key: child._spz_hash for key, child in _children(node).items()}
+    content = (type(node).__name__, node._spz_name, node._spz_provider, node._spz_uid, _sorted_items(meta),
+               _sorted_items(children_hashes))
+    return int.from_bytes(hashlib.blake2b(repr(content).encode(), digest_size=8).digest(), 'little')
+
+
+def inventory_hash(root: SpeasyIndex) -> int:
+    """Structural (Merkle) hash of the tree under root, two trees with the same hash hold the same nodes.
+
+    A node hash covers its type, identity and metadata (but the build date) and the hashes of its children, so
+    that comparing two subtrees is O(1) once hashed. Hashes are computed once per node and then kept with it,
+    they describe the tree as it was when first hashed: DataProvider hashes inventories right after building
+    them, the private inventory and later in place edits are not part of it. Snapshots store hashes computed
+    again when written, see :func:`~speasy.core.inventory.snapshot.write_snapshot`.
+    """
+    unhashed = []
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if node._spz_hash is None:
+            unhashed.append(node)
+            _load_pending(node)
+            if node._spz_children:
+                stack.extend(node._spz_children.values())
+    # reversed depth first order, children come before their parent
+    set_hash = _IndexSlots._spz_hash.__set__
+    for node in reversed(unhashed):
+        if node._spz_hash is None:
+            set_hash(node, _node_hash(node))
+    return root._spz_hash
+
+
 def inventory_has_changed(orig, new):
-    if orig.__dict__.keys() != new.__dict__.keys():
-        return True
-    for orig_key, orig_value in orig.__dict__.items():
-        if orig_key != 'build_date':
-            if orig_key not in new.__dict__:
-                return True
-            if orig.__dict__[orig_key] != new.__dict__[orig_key]:
-                return True
-    return False
+    return inventory_hash(orig) != inventory_hash(new)
+
+
+class InventoryDiff:
+    """What changed from one inventory tree to another.
+
+    Attributes
+    ----------
+    removed: List[SpeasyIndex]
+        subtrees only found in the original tree
+    added: List[SpeasyIndex]
+        subtrees only found in the new tree
+    replaced: List[Tuple[SpeasyIndex, SpeasyIndex]]
+        (original, new) nodes at the same place whose subtrees differ, only the nodes themselves, what changed
+        below them is in the other lists
+    """
+    __slots__ = ('removed', 'added', 'replaced')
+
+    def __init__(self, removed: Optional[List[SpeasyIndex]] = None, added: Optional[List[SpeasyIndex]] = None,
+                 replaced: Optional[List[Tuple[SpeasyIndex, SpeasyIndex]]] = None):
+        self.removed = removed or []
+        self.added = added or []
+        self.replaced = replaced or []
+
+    def __bool__(self):
+        return bool(self.removed or self.added or self.replaced)
+
+    def __repr__(self):
+        return f'<InventoryDiff: {len(self.removed)} removed, {len(self.added)} added, {len(self.replaced)} replaced>'
+
+
+def merge_inventories(orig: SpeasyIndex, new: SpeasyIndex) -> InventoryDiff:
+    """Diffs two inventory trees using their hashes and moves the unchanged subtrees of orig into new.
+
+    Only the branches whose hashes differ are walked. Wherever a subtree of new is identical to the one at the
+    same place in orig, the orig one takes its place, so that its nodes, and the references to them, stay valid.
+
+    Returns
+    -------
+    InventoryDiff
+        empty when both trees hold the same nodes, in which case new is left untouched
+    """
+    diff = InventoryDiff()
+    if orig is new or inventory_hash(orig) == inventory_hash(new):
+        return diff
+    diff.replaced.append((orig, new))
+    stack = [(orig, new)]
+    while stack:
+        orig_node, new_node = stack.pop()
+        _load_pending(orig_node)
+        _load_pending(new_node)
+        orig_children = _children(orig_node)
+        new_children = _children(new_node)
+        diff.removed.extend(child for key, child in orig_children.items() if key not in new_children)
+        for key, new_child in list(new_children.items()):
+            orig_child = orig_children.get(key)
+            if orig_child is None:
+                diff.added.append(new_child)
+            elif inventory_hash(orig_child) == inventory_hash(new_child):
+                new_node._spz_children[key] = orig_child
+            elif type(orig_child) is not type(new_child):
+                diff.removed.append(orig_child)
+                diff.added.append(new_child)
+            else:
+                diff.replaced.append((orig_child, new_child))
+                stack.append((orig_child, new_child))
+    return diff
+
+
+def _copy_node(node: SpeasyIndex) -> SpeasyIndex:
+    _load_pending(node)
+    copy = type(node).__new__(type(node))
+    copy._spz_provider = node._spz_provider
+    copy._spz_name = node._spz_name
+    copy._spz_uid = node._spz_uid
+    copy._spz_meta = dict(node._spz_meta)
+    copy._spz_children = dict(node._spz_children) if node._spz_children is not None else None
+    copy._spz_origin = node._spz_origin
+    copy._spz_pending = False
+    copy._spz_hash = node._spz_hash
+    return copy
+
+
+def detach_inventory(root: SpeasyIndex, depth: int = 2) -> SpeasyIndex:
+    """Copies root and the folder nodes (plain SpeasyIndex) of the first depth levels below it, everything else
+    is shared with root.
+
+    Children can then be attached to or detached from the copied nodes without editing the tree under root, as
+    DataProvider does to add the private inventory, that impex providers attach to root or to one of its direct
+    children. The copies keep the hashes and the snapshot origin of the nodes they are made from.
+    """
+    copy = _copy_node(root)
+    stack = [(copy, depth - 1)]
+    while stack:
+        node, remaining = stack.pop()
+        if remaining > 0 and node._spz_children:
+            for key, child in node._spz_children.items():
+                if type(child) is SpeasyIndex:
+                    node._spz_children[key] = child_copy = _copy_node(child)
+                    stack.append((child_copy, remaining - 1))
+    return copy
+
+
+@contextmanager
+def track_children_changes():
+    """Records, in the yielded InventoryDiff, the children attached to or detached from hashed nodes (see
+    :func:`inventory_hash`) by the current thread within the block, a replaced child being both removed and added.
+    The diff is filled when the block exits."""
+    diff = InventoryDiff()
+    changes = []
+    previous = getattr(_changes_tracking, 'changes', None)
+    _changes_tracking.changes = changes
+    try:
+        yield diff
+    finally:
+        _changes_tracking.changes = previous
+        added = {}
+        for removed_child, added_child in changes:
+            if removed_child is not None:
+                if added.pop(id(removed_child), None) is None:
+                    diff.removed.append(removed_child)
+            if added_child is not None:
+                added[id(added_child)] = added_child
+        diff.added.extend(added.values())
 
 
 AnyProductIndex = Union[
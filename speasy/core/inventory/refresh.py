@@ -0,0 +1,95 @@
+"""Background inventory refresh
+
+Inventories are rebuilt in a background thread and swapped in once complete (see
+:meth:`speasy.core.dataprovider.DataProvider.update_inventory`), so that readers keep using the previous ones
+meanwhile, either on demand with ``speasy.update_inventories(background=True)`` or periodically when
+``speasy.config.inventories.refresh_period_minutes`` is set.
+"""
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Iterable, Optional
+
+log = logging.getLogger(__name__)
+
+
+def _providers(providers: Optional[Iterable] = None) -> list:
+    if providers is None:
+        from ..dataprovider import PROVIDERS
+        providers = PROVIDERS.values()
+    return list(providers)
+
+
+class InventoryRefresher:
+    """Refreshes providers inventories off the calling thread, once or periodically."""
+
+    def __init__(self):
+        self._refresh_lock = threading.Lock()
+        self._stop_event: Optional[threading.Event] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def _refresh(self, providers: Optional[Iterable] = None):
+        with self._refresh_lock:
+            for provider in _providers(providers):
+                try:
+                    provider.update_inventory()
+                except Exception as e:  # lgtm [py/catch-base-exception]
+                    # keeps the previous inventory, the next refresh will try again
+                    log.error(f"Background inventory refresh failed for {provider.provider_name}: {e}")
+
+    def refresh(self, providers: Optional[Iterable] = None) -> Future:
+        """Refreshes the inventories of the given providers, all of them by default, in a background thread.
+
+        Returns
+        -------
+        Future
+            done once every inventory was refreshed, failures are logged and leave the previous inventory
+        """
+        future = Future()
+
+        def run():
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(self._refresh(providers))
+                except BaseException as e:
+                    future.set_exception(e)
+
+        threading.Thread(target=run, name="speasy-inventory-refresh", daemon=True).start()
+        return future
+
+    def _run(self, period_s: float, stop_event: threading.Event, providers: Optional[Iterable]):
+        while not stop_event.wait(period_s):
+            self._refresh(providers)
+
+    def start(self, period_minutes: float, providers: Optional[Iterable] = None):
+        """Refreshes the inventories every period_minutes, replaces any previous schedule, 0 only stops it."""
+        self.stop()
+        if period_minutes > 0:
+            self._stop_event = threading.Event()
+            self._thread = threading.Thread(target=self._run, args=(period_minutes * 60, self._stop_event, providers),
+                                            name="speasy-periodic-inventory-refresh", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stops periodic refreshes, a refresh in progress still completes."""
+        if self._stop_event is not None:
+            self._stop_event.set()
+        self._stop_event = None
+        self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+
+inventory_refresher = InventoryRefresher()
+
+
+def start_configured_refresh():
+    from ...config import inventories as inventories_cfg
+    from ..platform import is_decoding_worker
+    if is_decoding_worker():
+        return
+    period = inventories_cfg.refresh_period_minutes.get()
+    if period > 0:
+        inventory_refresher.start(period)
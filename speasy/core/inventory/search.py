@@ -0,0 +1,368 @@
+"""Full-text product search over the provider inventories, see :func:`speasy.find_product`
+
+Each provider gets an inverted index from the tokens (lower cased alphanumeric runs) of its products names,
+uids, descriptions and units, and of the names of the tree nodes above them (mission, observatory,
+instrument, dataset...), to the products holding them. Postings are stored as flat numpy arrays, a trigram
+index of the vocabulary gives fuzzy matching for misspelled words and prefixes match partially typed ones.
+
+A provider index is built on the first query and stored in the speasy index, so that it is only built again
+when the inventory actually changes. Inventory updates are applied to the posting lists of an already built
+index when DataProvider knows what changed, otherwise the index is rebuilt on the next query.
+"""
+import re
+import threading
+import zlib
+from bisect import bisect_left
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .indexes import AnyProductIndex, InventoryDiff, SpeasyIndex, _children, _load_pending
+from .snapshot import FLAT_INVENTORY_CATEGORIES
+
+_FORMAT_VERSION = 1
+_INDEX_MODULE = "product-search"
+
+_TOKEN = re.compile(r'[a-z0-9]+')
+_NAME, _UID, _PATH, _DESCRIPTION, _UNITS = range(5)
+_FIELD_WEIGHTS = np.array([4., 3., 2., 1., 1.])
+_DESCRIPTION_KEYS = ('description', 'desc', 'CATDESC', 'FIELDNAM', 'LABLAXIS')
+_UNITS_KEYS = ('units', 'UNITS')
+_SEARCHED_CATEGORIES = ('parameters', 'datasets', 'timetables', 'catalogs')
+
+_MIN_FUZZY_SIMILARITY = 0.45
+_FUZZY_PENALTY = 0.8
+
+
+def tokenize(text) -> List[str]:
+    """Splits text into lower cased alphanumeric tokens."""
+    return _TOKEN.findall(str(text).lower())
+
+
+def _trigrams(token: str) -> List[str]:
+    padded = f" {token} "
+    return list({padded[i:i + 3] for i in range(len(padded) - 2)})
+
+
+def _csr(groups: List[List[int]], dtype) -> Tuple[np.ndarray, np.ndarray]:
+    offsets = np.zeros(len(groups) + 1, dtype=np.int64)
+    np.cumsum([len(g) for g in groups], out=offsets[1:])
+    values = np.fromiter((v for g in groups for v in g), dtype=dtype, count=int(offsets[-1]))
+    return offsets, values
+
+
+def _subtree_documents(node: SpeasyIndex, path: Tuple[str, ...]) -> Iterator[Tuple[str, str, str, dict, Tuple[str, ...]]]:
+    """(category, name, uid, metadata, names of the nodes above it) for node and every searchable product below
+    it, path being the names of the nodes above node. The children of snapshot nodes that were not loaded yet
+    are read from the snapshot without building them."""
+    stack = [(node, path)]
+    while stack:
+        node, path = stack.pop()
+        category = FLAT_INVENTORY_CATEGORIES.get(type(node))
+        if category in _SEARCHED_CATEGORIES:
+            yield category, node.spz_name(), node.spz_uid(), node._spz_meta, path
+        if node._spz_pending:
+            snapshot, node_id = node._spz_origin
+            for child_id, child_type, child_path in snapshot.descendants(node_id, path):
+                category = FLAT_INVENTORY_CATEGORIES.get(child_type)
+                if category in _SEARCHED_CATEGORIES:
+                    yield (category, *snapshot.describe(child_id), child_path)
+            continue
+        children = _children(node)
+        if children:
+            child_path = path + (node.spz_name(),)
+            stack.extend((child, child_path) for child in reversed(list(children.values())))
+
+
+def _documents(root: SpeasyIndex) -> Iterator[Tuple[str, str, str, dict, Tuple[str, ...]]]:
+    """Same as :func:`_subtree_documents` for every searchable product below root."""
+    _load_pending(root)
+    for child in _children(root).values():
+        yield from _subtree_documents(child, ())
+
+
+def _document_fields(name: str, uid: str, meta: dict, path: Tuple[str, ...]) -> Dict[str, int]:
+    """token -> most relevant field it appears in"""
+    fields = {}
+
+    def add(text, field):
+        for token in tokenize(text):
+            if fields.get(token, len(_FIELD_WEIGHTS)) > field:
+                fields[token] = field
+
+    add(name, _NAME)
+    add(uid, _UID)
+    for key in _DESCRIPTION_KEYS:
+        if key in meta:
+            add(meta[key], _DESCRIPTION)
+    for key in _UNITS_KEYS:
+        if key in meta:
+            add(meta[key], _UNITS)
+    for name in path:
+        add(name, _PATH)
+    return fields
+
+
+def _diff_documents(root: SpeasyIndex, diff: InventoryDiff, flat_inventory) \
+    -> Optional[Tuple[List[Tuple[str, str]], List[Tuple[str, str, str, dict, Tuple[str, ...]]]]]:
+    """The (category, uid) of the products removed by diff and the documents of the ones it added or replaced,
+    or None when some can't be located in root, only walking the folders and the replaced nodes to find where
+    the added subtrees are."""
+    if any(orig.spz_name() != new.spz_name() for orig, new in diff.replaced):
+        # the path of every product below them changed
+        return None
+    removed = []
+    for subtree in diff.removed:
+        for category, _, uid, _, _ in _subtree_documents(subtree, ()):
+            # unless still listed elsewhere in the tree
+            if uid not in getattr(flat_inventory, category):
+                removed.append((category, uid))
+    added_ids = {id(node) for node in diff.added}
+    replaced_ids = {id(new) for _, new in diff.replaced}
+    documents = []
+    found = set()
+    stack = [(child, ()) for child in _children(root).values()]
+    while stack:
+        node, path = stack.pop()
+        if id(node) in added_ids:
+            found.add(id(node))
+            documents.extend(_subtree_documents(node, path))
+            continue
+        replaced = id(node) in replaced_ids
+        if replaced:
+            category = FLAT_INVENTORY_CATEGORIES.get(type(node))
+            if category in _SEARCHED_CATEGORIES:
+                documents.append((category, node.spz_name(), node.spz_uid(), node._spz_meta, path))
+        if not node._spz_pending and (replaced or type(node) is SpeasyIndex):
+            child_path = path + (node.spz_name(),)
+            stack.extend((child, child_path) for child in _children(node).values())
+    if len(found) != len(added_ids):
+        return None
+    return removed, documents
+
+
+def _trigram_index(vocabulary: List[str]) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    trigram_groups: Dict[str, List[int]] = {}
+    for token_id, token in enumerate(vocabulary):
+        for trigram in _trigrams(token):
+            trigram_groups.setdefault(trigram, []).append(token_id)
+    trigrams = sorted(trigram_groups)
+    trigram_offsets, trigram_tokens = _csr([trigram_groups[t] for t in trigrams], np.uint32)
+    return trigrams, trigram_offsets, trigram_tokens
+
+
+def inventory_fingerprint(root: SpeasyIndex, flat_inventory) -> int:
+    """Changes whenever the products of an inventory or its build date change."""
+    crc = zlib.crc32(str(root._spz_meta.get('build_date', '')).encode())
+    for category in _SEARCHED_CATEGORIES:
+        for uid in getattr(flat_inventory, category):
+            crc = zlib.crc32(str(uid).encode(), crc)
+    return crc
+
+
+class ProviderSearchIndex:
+    """Inverted index of the products of one provider."""
+
+    def __init__(self, documents: List[Tuple[str, str]], vocabulary: List[str], offsets: np.ndarray,
+                 postings: np.ndarray, fields: np.ndarray, trigrams: List[str], trigram_offsets: np.ndarray,
+                 trigram_tokens: np.ndarray):
+        self.documents = documents
+        self._vocabulary = vocabulary
+        self._token_ids = {token: i for i, token in enumerate(vocabulary)}
+        self._offsets = offsets
+        self._postings = postings
+        self._fields = fields
+        self._trigrams = trigrams
+        self._trigram_ids = {trigram: i for i, trigram in enumerate(trigrams)}
+        self._trigram_offsets = trigram_offsets
+        self._trigram_tokens = trigram_tokens
+        self._trigram_counts = np.array([len(_trigrams(token)) for token in vocabulary], dtype=np.int32)
+
+    @staticmethod
+    def build(root: SpeasyIndex) -> "ProviderSearchIndex":
+        documents = []
+        seen = set()
+        postings: Dict[str, List[int]] = {}
+        for category, name, uid, meta, path in _documents(root):
+            key = (category, uid)
+            if key in seen:
+                continue
+            seen.add(key)
+            doc_id = len(documents)
+            documents.append(key)
+            for token, field in _document_fields(name, uid, meta, path).items():
+                postings.setdefault(token, []).append(doc_id * 8 + field)
+        vocabulary = sorted(postings)
+        offsets, packed = _csr([postings[token] for token in vocabulary], np.uint32)
+        return ProviderSearchIndex(documents, vocabulary, offsets, packed >> 3, (packed & 7).astype(np.uint8),
+                                   *_trigram_index(vocabulary))
+
+    def updated(self, removed: List[Tuple[str, str]],
+                added: List[Tuple[str, str, str, dict, Tuple[str, ...]]]) -> "ProviderSearchIndex":
+        """A new index without the removed (category, uid) products and with the added documents, that replace
+        the indexed ones with the same uid. Only the added documents are tokenized, the posting lists of the
+        others are filtered and renumbered."""
+        added_documents = {}
+        for category, name, uid, meta, path in added:
+            added_documents.setdefault((category, uid), (name, uid, meta, path))
+        dropped = set(removed) | added_documents.keys()
+        alive = np.fromiter((key not in dropped for key in self.documents), dtype=bool, count=len(self.documents))
+        documents = [key for key, keep in zip(self.documents, alive.tolist()) if keep]
+        doc_ids = np.cumsum(alive, dtype=np.int64) - 1
+        kept = alive[self._postings]
+        token_ids = np.repeat(np.arange(len(self._vocabulary)), np.diff(self._offsets))[kept]
+        doc_postings = [doc_ids[self._postings[kept]]]
+        field_postings = [self._fields[kept]]
+
+        new_tokens, new_docs, new_fields = [], [], []
+        for key, document in added_documents.items():
+            doc_id = len(documents)
+            documents.append(key)
+            for token, field in _document_fields(*document).items():
+                new_tokens.append(token)
+                new_docs.append(doc_id)
+                new_fields.append(field)
+
+        vocabulary = sorted({self._vocabulary[token_id] for token_id in np.unique(token_ids).tolist()}
+                            | set(new_tokens))
+        new_ids = {token: i for i, token in enumerate(vocabulary)}
+        renumbered = np.array([new_ids.get(token, -1) for token in self._vocabulary], dtype=np.int64)
+        all_token_ids = np.concatenate([renumbered[token_ids],
+                                        np.fromiter((new_ids[t] for t in new_tokens), dtype=np.int64,
+                                                    count=len(new_tokens))])
+        order = np.argsort(all_token_ids, kind='stable')
+        postings = np.concatenate(doc_postings + [np.array(new_docs, dtype=np.int64)])[order].astype(np.uint32)
+        fields = np.concatenate(field_postings + [np.array(new_fields, dtype=np.uint8)])[order]
+        offsets = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(all_token_ids, minlength=len(vocabulary)), out=offsets[1:])
+        return ProviderSearchIndex(documents, vocabulary, offsets, postings, fields, *_trigram_index(vocabulary))
+
+    def state(self, fingerprint: int) -> dict:
+        return {'version': _FORMAT_VERSION, 'fingerprint': fingerprint, 'documents': self.documents,
+                'vocabulary': self._vocabulary, 'offsets': self._offsets, 'postings': self._postings,
+                'fields': self._fields, 'trigrams': self._trigrams, 'trigram_offsets': self._trigram_offsets,
+                'trigram_tokens': self._trigram_tokens}
+
+    @staticmethod
+    def from_state(state: dict) -> "ProviderSearchIndex":
+        return ProviderSearchIndex(state['documents'], state['vocabulary'], state['offsets'], state['postings'],
+                                   state['fields'], state['trigrams'], state['trigram_offsets'],
+                                   state['trigram_tokens'])
+
+    def _matching_tokens(self, token: str) -> Dict[int, float]:
+        """vocabulary token id -> similarity with token, exact match, prefix match or trigram similarity"""
+        matches = {}
+        token_id = self._token_ids.get(token)
+        if token_id is not None:
+            matches[token_id] = 1.
+        if len(token) >= 3:
+            start = bisect_left(self._vocabulary, token)
+            for candidate_id in range(start, len(self._vocabulary)):
+                candidate = self._vocabulary[candidate_id]
+                if not candidate.startswith(token):
+                    break
+                matches.setdefault(candidate_id, 0.5 + 0.4 * len(token) / len(candidate))
+        trigram_ids = [self._trigram_ids[t] for t in _trigrams(token) if t in self._trigram_ids]
+        if len(token) >= 4 and trigram_ids:
+            candidates = np.concatenate(
+                [self._trigram_tokens[self._trigram_offsets[i]:self._trigram_offsets[i + 1]] for i in trigram_ids])
+            candidate_ids, common = np.unique(candidates, return_counts=True)
+            similarity = common / (len(_trigrams(token)) + self._trigram_counts[candidate_ids] - common)
+            for candidate_id, value in zip(candidate_ids.tolist(), similarity.tolist()):
+                if value >= _MIN_FUZZY_SIMILARITY:
+                    matches.setdefault(candidate_id, value * _FUZZY_PENALTY)
+        return matches
+
+    def scores(self, tokens: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Number of query tokens matched and total score, per document"""
+        matched = np.zeros(len(self.documents), dtype=np.int32)
+        total = np.zeros(len(self.documents))
+        for token in tokens:
+            token_score = np.zeros(len(self.documents))
+            for token_id, similarity in self._matching_tokens(token).items():
+                start, stop = self._offsets[token_id], self._offsets[token_id + 1]
+                np.maximum.at(token_score, self._postings[start:stop],
+                              similarity * _FIELD_WEIGHTS[self._fields[start:stop]])
+            matched += token_score > 0
+            total += token_score
+        return matched, total
+
+
+class ProductSearch:
+    """Keeps one :class:`ProviderSearchIndex` per provider in sync with the inventories."""
+
+    def __init__(self):
+        self._inventories: Dict[str, tuple] = {}
+        self._aliases: Dict[str, str] = {}
+        self._indexes: Dict[str, ProviderSearchIndex] = {}
+        self._lock = threading.RLock()
+
+    def inventory_updated(self, provider_name: str, root: SpeasyIndex, flat_inventory, aliases=(),
+                          diff: Optional[InventoryDiff] = None):
+        """Called by DataProvider.update_inventory with what changed in the inventory, when known, to update this
+        provider index. Otherwise the index is dropped and gets rebuilt, or reloaded if the inventory did not
+        change, on next search."""
+        with self._lock:
+            self._inventories[provider_name] = (root, flat_inventory)
+            self._aliases.update({alias: provider_name for alias in aliases})
+            search_index = self._indexes.pop(provider_name, None)
+            if search_index is not None and diff is not None:
+                changes = _diff_documents(root, diff, flat_inventory)
+                if changes is not None:
+                    from ..index import index
+                    search_index = search_index.updated(*changes)
+                    index.set(_INDEX_MODULE, provider_name,
+                              search_index.state(inventory_fingerprint(root, flat_inventory)))
+                    self._indexes[provider_name] = search_index
+
+    def _provider_index(self, provider_name: str) -> ProviderSearchIndex:
+        with self._lock:
+            search_index = self._indexes.get(provider_name)
+            if search_index is None:
+                from ..index import index
+                root, flat_inventory = self._inventories[provider_name]
+                fingerprint = inventory_fingerprint(root, flat_inventory)
+                state = index.get(_INDEX_MODULE, provider_name)
+                if type(state) is dict and state.get('version') == _FORMAT_VERSION \
+                    and state.get('fingerprint') == fingerprint:
+                    search_index = ProviderSearchIndex.from_state(state)
+                else:
+                    search_index = ProviderSearchIndex.build(root)
+                    index.set(_INDEX_MODULE, provider_name, search_index.state(fingerprint))
+                self._indexes[provider_name] = search_index
+            return search_index
+
+    def search(self, query: str, provider: Optional[str] = None, max_results: int = 20) -> List[AnyProductIndex]:
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        with self._lock:
+            if provider is not None:
+                provider = self._aliases.get(provider, provider)
+                if provider not in self._inventories:
+                    raise ValueError(f"Unknown provider: {provider}")
+                providers = [provider]
+            else:
+                providers = list(self._inventories)
+        candidates = []
+        for provider_name in providers:
+            search_index = self._provider_index(provider_name)
+            flat_inventory = self._inventories[provider_name][1]
+            matched, total = search_index.scores(tokens)
+            hits = np.flatnonzero(total)
+            # a few more than asked in case some products were removed since the index was built
+            best = hits[np.lexsort((-total[hits], -matched[hits]))[:2 * max_results]]
+            candidates += [(int(matched[doc_id]), float(total[doc_id]), search_index.documents[doc_id], flat_inventory)
+                           for doc_id in best.tolist()]
+        candidates.sort(key=lambda c: (-c[0], -c[1]))
+        results = []
+        for _, _, (category, uid), flat_inventory in candidates:
+            product = getattr(flat_inventory, category).get(uid)
+            if product is not None:
+                results.append(product)
+                if len(results) == max_results:
+                    break
+        return results
+
+
+product_search = ProductSearch()
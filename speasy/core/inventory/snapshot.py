@@ -0,0 +1,366 @@
+"""Compact binary inventory snapshots
+
+A snapshot stores a whole inventory tree in one file made of:
+
+- a string table, every distinct string once, as an offsets array and a UTF-8 blob,
+- a node array, one fixed size record per node, numbered breadth first so that the children of a node are
+  one contiguous range, with the node hash (see :func:`~speasy.core.inventory.indexes.inventory_hash`),
+- a metadata array, (key, kind, value) records referencing the string table,
+- per flat inventory category (parameters, datasets, ...) an open addressing hash table of node numbers
+  indexed by uid.
+
+The file is mapped in memory and nothing is decoded at load time: nodes are built the first time they are
+reached, either walking the tree (the children of a node are loaded on first access) or through a uid lookup.
+"""
+import ast
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+import threading
+import uuid
+import zlib
+from glob import escape, glob
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .indexes import (__INDEXES_TYPES__, _children, _load_pending, _node_hash, walk_inventory, CatalogIndex, ComponentIndex, DatasetIndex, ParameterIndex,
+                      SpeasyIndex, TemplatedParameterIndex, TimetableIndex)
+
+log = logging.getLogger(__name__)
+
+_MAGIC = b'SPZINV\r\n'
+_FORMAT_VERSION = 2
+_PREAMBLE = struct.Struct('<8sII')
+_EMPTY_SLOT = -1
+
+_NODE_DTYPE = np.dtype([('type', '<u2'), ('key', '<u4'), ('name', '<u4'), ('provider', '<u4'), ('uid', '<u4'),
+                        ('first_child', '<u4'), ('child_count', '<u4'), ('meta_start', '<u4'),
+                        ('meta_count', '<u4'), ('hash', '<u8')])
+_META_DTYPE = np.dtype([('key', '<u4'), ('kind', 'u1'), ('value', '<u4')])
+
+_STRING_VALUE = 0
+_LITERAL_VALUE = 1
+
+FLAT_INVENTORY_CATEGORIES = {
+    ParameterIndex: 'parameters',
+    TemplatedParameterIndex: 'parameters',
+    DatasetIndex: 'datasets',
+    TimetableIndex: 'timetables',
+    ComponentIndex: 'components',
+    CatalogIndex: 'catalogs',
+}
+
+
+def _uid_hash(uid: str) -> int:
+    return zlib.crc32(uid.encode('utf-8'))
+
+
+class _StringTable:
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+
+    def __call__(self, value: str) -> int:
+        sid = self._ids.get(value)
+        if sid is None:
+            sid = self._ids[value] = len(self._ids)
+        return sid
+
+    def encode(self):
+        blobs = [s.encode('utf-8') for s in self._ids]
+        offsets = np.zeros(len(blobs) + 1, dtype='<u8')
+        np.cumsum([len(b) for b in blobs], out=offsets[1:])
+        return offsets, b''.join(blobs)
+
+
+def _encode_value(value):
+    if type(value) is str:
+        return _STRING_VALUE, value
+    text = repr(value)
+    try:
+        if ast.literal_eval(text) == value:
+            return _LITERAL_VALUE, text
+    except (ValueError, SyntaxError, TypeError, MemoryError, RecursionError):
+        pass
+    # same fallback as to_dict(version=2) for types that can't be stored as is
+    return _STRING_VALUE, str(value)
+
+
+def _split_node(node: SpeasyIndex):
+    _load_pending(node)
+    return list(node._spz_meta.items()), list(_children(node).items())
+
+
+def _hash_table(entries: Dict[str, int]) -> np.ndarray:
+    size = 8
+    while size < 2 * len(entries):
+        size *= 2
+    table = np.full(size, _EMPTY_SLOT, dtype='<i4')
+    mask = size - 1
+    for uid, node_id in entries.items():
+        slot = _uid_hash(uid) & mask
+        while table[slot] != _EMPTY_SLOT:
+            slot = (slot + 1) & mask
+        table[slot] = node_id
+    return table
+
+
+def _flat_entries(root: SpeasyIndex, node_ids: Dict[int, int]) -> Dict[str, Dict[str, int]]:
+    """uid -> node number per category, in the order ProviderInventory registers nodes so the same one wins."""
+    entries = {category: {} for category in set(FLAT_INVENTORY_CATEGORIES.values())}
+    for node in walk_inventory(root):
+        category = FLAT_INVENTORY_CATEGORIES.get(type(node))
+        if category is not None:
+            entries[category][node.spz_uid()] = node_ids[id(node)]
+    return entries
+
+
+def write_snapshot(root: SpeasyIndex, path: str) -> None:
+    """Writes the inventory tree under root to path, atomically.
+
+    Parameters
+    ----------
+    root: SpeasyIndex
+        inventory tree root
+    path: str
+        destination file
+    """
+    strings = _StringTable()
+    types: Dict[str, int] = {}
+    nodes: List[tuple] = []
+    meta_records: List[tuple] = []
+    node_ids: Dict[int, int] = {id(root): 0}
+    queue = [('', root)]
+    head = 0
+    while head < len(queue):
+        key, node = queue[head]
+        head += 1
+        meta, children = _split_node(node)
+        type_id = types.setdefault(type(node).__name__, len(types))
+        first_child = len(queue)
+        for child_key, child in children:
+            node_ids[id(child)] = len(queue)
+            queue.append((child_key, child))
+        nodes.append((type_id, strings(key), strings(node.spz_name()), strings(node.spz_provider()),
+                      strings(node.spz_uid()), first_child, len(children), len(meta_records), len(meta)))
+        for meta_key, value in meta:
+            kind, text = _encode_value(value)
+            meta_records.append((strings(meta_key), kind, strings(text)))
+
+    # hashed again rather than taken from the nodes, those edited since they were hashed would keep a stale one
+    hashes = [0] * len(nodes)
+    for node_id in reversed(range(len(nodes))):
+        first_child, child_count = nodes[node_id][5], nodes[node_id][6]
+        hashes[node_id] = _node_hash(queue[node_id][1], {queue[child][0]: hashes[child]
+                                                         for child in range(first_child, first_child + child_count)})
+    nodes = [record + (node_hash,) for record, node_hash in zip(nodes, hashes)]
+
+    type_names = sorted(types, key=types.get)
+    type_sids = np.array([strings(name) for name in type_names], dtype='<u4')
+    flat_entries = _flat_entries(root, node_ids)
+    tables = {category: _hash_table(entries) for category, entries in flat_entries.items()}
+    counts = {category: len(entries) for category, entries in flat_entries.items()}
+    offsets, blob = strings.encode()
+
+    sections = [('string_offsets', offsets), ('strings', np.frombuffer(blob, dtype='u1')),
+                ('types', type_sids), ('nodes', np.array(nodes, dtype=_NODE_DTYPE)),
+                ('meta', np.array(meta_records, dtype=_META_DTYPE))]
+    sections += [(f"table:{category}", table) for category, table in sorted(tables.items())]
+
+    toc = {'sections': {}, 'counts': counts}
+    position = 0
+    for name, array in sections:
+        toc['sections'][name] = [position, len(array)]
+        position += (array.nbytes + 7) // 8 * 8
+    toc_bytes = json.dumps(toc).encode('utf-8')
+    data_start = (_PREAMBLE.size + len(toc_bytes) + 7) // 8 * 8
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(_PREAMBLE.pack(_MAGIC, _FORMAT_VERSION, len(toc_bytes)))
+        f.write(toc_bytes)
+        f.write(b'\0' * (data_start - _PREAMBLE.size - len(toc_bytes)))
+        for _, array in sections:
+            raw = array.tobytes()
+            f.write(raw)
+            f.write(b'\0' * ((len(raw) + 7) // 8 * 8 - len(raw)))
+    os.replace(tmp_path, path)
+
+
+class InventorySnapshot:
+    """A memory mapped inventory snapshot, see :func:`load_snapshot`."""
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, toc_size = _PREAMBLE.unpack_from(self._mm, 0)
+        if magic != _MAGIC or version != _FORMAT_VERSION:
+            raise ValueError(f"{path} is not a version {_FORMAT_VERSION} inventory snapshot")
+        toc = json.loads(self._mm[_PREAMBLE.size:_PREAMBLE.size + toc_size])
+        data_start = (_PREAMBLE.size + toc_size + 7) // 8 * 8
+        dtypes = {'string_offsets': np.dtype('<u8'), 'strings': np.dtype('u1'), 'types': np.dtype('<u4'),
+                  'nodes': _NODE_DTYPE, 'meta': _META_DTYPE}
+        arrays = {name: np.frombuffer(self._mm, dtype=dtypes.get(name, np.dtype('<i4')), count=count,
+                                      offset=data_start + offset)
+                  for name, (offset, count) in toc['sections'].items()}
+        self.path = path
+        self._string_offsets = arrays['string_offsets']
+        self._strings_start = data_start + toc['sections']['strings'][0]
+        self._nodes = arrays['nodes']
+        self._meta = arrays['meta']
+        self._tables = {name.split(':', 1)[1]: table for name, table in arrays.items() if name.startswith('table:')}
+        self._counts: Dict[str, int] = toc['counts']
+        self._decoded: Dict[int, str] = {}
+        self._objects: List[Optional[SpeasyIndex]] = [None] * len(self._nodes)
+        self._lock = threading.RLock()
+        self._types = [__INDEXES_TYPES__.get(self._string(int(sid)), SpeasyIndex) for sid in arrays['types']]
+
+    def _string(self, sid: int) -> str:
+        s = self._decoded.get(sid)
+        if s is None:
+            start = self._strings_start + int(self._string_offsets[sid])
+            stop = self._strings_start + int(self._string_offsets[sid + 1])
+            s = self._decoded[sid] = sys.intern(self._mm[start:stop].decode('utf-8'))
+        return s
+
+    def _decode_meta(self, start: int, count: int) -> dict:
+        meta = {}
+        for key, kind, value in self._meta[start:start + count].tolist():
+            text = self._string(value)
+            meta[self._string(key)] = text if kind == _STRING_VALUE else ast.literal_eval(text)
+        return meta
+
+    def node(self, node_id: int) -> SpeasyIndex:
+        """The node with this number, built on first request and then always the same object."""
+        node = self._objects[node_id]
+        if node is None:
+            with self._lock:
+                node = self._objects[node_id]
+                if node is None:
+                    type_id, _, name, provider, uid, _, child_count, meta_start, meta_count, node_hash = \
+                        self._nodes[node_id].tolist()
+                    node = self._types[type_id](name=self._string(name), provider=self._string(provider),
+                                                uid=self._string(uid), meta=self._decode_meta(meta_start, meta_count))
+                    node._spz_origin = (self, node_id)
+                    node._spz_pending = child_count > 0
+                    node._spz_hash = node_hash
+                    self._objects[node_id] = node
+        return node
+
+    def load_children(self, node: SpeasyIndex) -> None:
+        """Attaches the children of a node built from this snapshot, called on first access to them."""
+        with self._lock:
+            if node._spz_pending:
+                _, node_id = node._spz_origin
+                record = self._nodes[node_id]
+                first_child, child_count = int(record['first_child']), int(record['child_count'])
+                keys = self._nodes['key'][first_child:first_child + child_count].tolist()
+                children = {self._string(key): self.node(first_child + index) for index, key in enumerate(keys)}
+                if children:
+                    node._spz_children = {**children, **_children(node)}
+                node._spz_pending = False
+
+    def descendants(self, node_id: int, path: Tuple[str, ...] = ()) -> Iterator[Tuple[int, type, Tuple[str, ...]]]:
+        """(node number, type, names of the nodes above it) of every node below node_id, read from the node
+        array without building them, path being the names of the nodes above node_id."""
+        nodes = self._nodes
+        stack = [(node_id, path)]
+        while stack:
+            parent, parent_path = stack.pop()
+            first_child, child_count = int(nodes[parent]['first_child']), int(nodes[parent]['child_count'])
+            if child_count:
+                child_path = parent_path + (self._string(int(nodes[parent]['name'])),)
+                type_ids = nodes['type'][first_child:first_child + child_count].tolist()
+                for child, type_id in enumerate(type_ids, start=first_child):
+                    yield child, self._types[type_id], child_path
+                    stack.append((child, child_path))
+
+    def describe(self, node_id: int) -> Tuple[str, str, dict]:
+        """name, uid and metadata of a node, without building it."""
+        _, _, name, _, uid, _, _, meta_start, meta_count, _ = self._nodes[node_id].tolist()
+        return self._string(name), self._string(uid), self._decode_meta(meta_start, meta_count)
+
+    @property
+    def root(self) -> SpeasyIndex:
+        return self.node(0)
+
+    def lookup(self, category: str, uid: str) -> Optional[SpeasyIndex]:
+        """O(1) uid lookup in one of the flat inventory categories, without walking the tree."""
+        table = self._tables.get(category)
+        if table is None or not len(table):
+            return None
+        mask = len(table) - 1
+        slot = _uid_hash(uid) & mask
+        while True:
+            node_id = int(table[slot])
+            if node_id == _EMPTY_SLOT:
+                return None
+            if self._string(int(self._nodes[node_id]['uid'])) == uid:
+                return self.node(node_id)
+            slot = (slot + 1) & mask
+
+    def uids(self, category: str) -> Iterator[str]:
+        table = self._tables.get(category)
+        if table is not None:
+            uids = self._nodes['uid']
+            for node_id in table[table != _EMPTY_SLOT].tolist():
+                yield self._string(int(uids[node_id]))
+
+    def count(self, category: str) -> int:
+        return self._counts.get(category, 0)
+
+
+def snapshot_of(root: SpeasyIndex) -> Optional[InventorySnapshot]:
+    """The snapshot root was loaded from if it is the root node of one, None otherwise."""
+    origin = root._spz_origin
+    if origin is not None and origin[1] == 0:
+        return origin[0]
+    return None
+
+
+def load_snapshot(path: str) -> Optional[SpeasyIndex]:
+    """Loads an inventory snapshot written with :func:`write_snapshot`.
+
+    Parameters
+    ----------
+    path: str
+        snapshot file
+
+    Returns
+    -------
+    Optional[SpeasyIndex]
+        the inventory root, its children are only built when accessed, or None if path is missing or is not a
+        readable snapshot
+    """
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        return InventorySnapshot(path).root
+    except (OSError, ValueError, KeyError, struct.error) as e:
+        log.warning(f"Ignoring unreadable inventory snapshot {path}: {e}")
+        return None
+
+
+def store_snapshot(root: SpeasyIndex, directory: str, name: str) -> str:
+    """Writes a new snapshot of root in directory and removes the previous ones of the same name.
+
+    Each snapshot gets a unique file name so that a still mapped previous one never has to be overwritten.
+
+    Returns
+    -------
+    str
+        the new snapshot path
+    """
+    path = os.path.join(directory, f"{name}-{uuid.uuid4().hex}.spzinv")
+    write_snapshot(root, path)
+    for previous in glob(os.path.join(escape(directory), f"{escape(name)}-*.spzinv")):
+        if previous != path:
+            try:
+                os.remove(previous)
+            except OSError:  # still mapped on Windows, will go with the next one
+                pass
+    return path
@@ -1,7 +1,15 @@
 from functools import lru_cache
 
+# name prefix of the direct archive downloader CDF decoding processes, they don't initialize providers
+DECODING_WORKER_NAME = "speasy-cdf-decoder"
+
 
 @lru_cache(maxsize=1)
 def is_running_on_wasm() -> bool:
     import platform
     return platform.system().lower() == "emscripten"
+
+
+def is_decoding_worker() -> bool:
+    import multiprocessing
+    return multiprocessing.current_process().name.startswith(DECODING_WORKER_NAME)
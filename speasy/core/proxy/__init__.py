@@ -3,6 +3,7 @@ import pickle
 import warnings
 from datetime import datetime, timedelta, timezone
 from functools import wraps
+from typing import Optional
 
 from dateutil import parser
 from email.utils import format_datetime
@@ -13,6 +14,7 @@ from speasy.config import proxy as proxy_cfg
 from .. import http, make_utc_datetime
 from ..index import index
 from ..inventory.indexes import from_dict as inventory_from_dict
+from ..inventory.snapshot import load_snapshot, store_snapshot
 from ... import SpeasyIndex
 from ...products.variable import from_dictionary as var_from_dict
 from ..cache import CacheCall
@@ -102,13 +104,39 @@ class GetProduct:
         return None
 
 
+def _saved_inventory(provider: str) -> Optional[SpeasyIndex]:
+    saved = index.get("proxy_inventories", provider, None)
+    if isinstance(saved, str):
+        return load_snapshot(saved)
+    # inventories saved before snapshots were pickled trees
+    return saved
+
+
+def _proxy_version_changed(provider: str) -> bool:
+    # only known once some request asked the proxy version, unknown means unchanged
+    saved = index.get("proxy_inventories_proxy_version", provider, None)
+    return _CURRENT_PROXY_SERVER_VERSION is not None and saved != str(_CURRENT_PROXY_SERVER_VERSION)
+
+
+def _mark_inventory_saved(provider: str, etag: Optional[str] = None, revalidated: bool = False):
+    index.set("proxy_inventories_save_date", provider, datetime.now(tz=timezone.utc))
+    if _CURRENT_PROXY_SERVER_VERSION is not None:
+        index.set("proxy_inventories_proxy_version", provider, str(_CURRENT_PROXY_SERVER_VERSION))
+    if etag:
+        index.set("proxy_inventories_etag", provider, etag)
+    elif not revalidated and index.contains("proxy_inventories_etag", provider):
+        # the one of the previous inventory would keep being sent and, taking precedence over
+        # If-Modified-Since, never match again
+        index.pop("proxy_inventories_etag", provider)
+
+
 class GetInventory:
     @staticmethod
     def get(provider: str, **kwargs):
-        saved_inventory: SpeasyIndex = index.get("proxy_inventories", provider, None)
+        saved_inventory: Optional[SpeasyIndex] = _saved_inventory(provider)
         saved_inventory_dt: datetime = make_utc_datetime(
             index.get("proxy_inventories_save_date", provider, datetime.fromtimestamp(0, tz=timezone.utc)))
-        if saved_inventory is not None and \
+        if saved_inventory is not None and not _proxy_version_changed(provider) and \
                 saved_inventory_dt + timedelta(days=inventories_cfg.cache_retention_days.get()) > datetime.now(
             tz=timezone.utc):
             return saved_inventory
@@ -125,14 +153,21 @@ class GetInventory:
             # If-Modified-Since must be a valid HTTP-date (RFC 7231), datetime.ctime() is not one
             headers["If-Modified-Since"] = format_datetime(
                 make_utc_datetime(parser.parse(saved_inventory.build_date)), usegmt=True)
+            etag = index.get("proxy_inventories_etag", provider, None)
+            if etag:
+                headers["If-None-Match"] = etag
         resp = http.get(f"{url}/get_inventory", params=kwargs, headers=headers)
         log.debug(f"Asking {provider} inventory from proxy {resp.url}, {resp.headers}")
         if resp.status_code == 200:
             inventory = inventory_from_dict(pickle.loads(decompress(resp.bytes)), version=2)
-            index.set("proxy_inventories", provider, inventory)
-            index.set("proxy_inventories_save_date", provider, datetime.now(tz=timezone.utc))
-            return inventory
+            snapshot_path = store_snapshot(inventory, inventories_cfg.snapshots_path(), provider)
+            index.set("proxy_inventories", provider, snapshot_path)
+            _mark_inventory_saved(provider, resp.headers.get("ETag"))
+            # the snapshot backed tree only builds the nodes that get used, the one just parsed can go
+            return load_snapshot(snapshot_path) or inventory
         if resp.status_code == 304:
+            # still the latest one, good for another retention period without asking
+            _mark_inventory_saved(provider, resp.headers.get("ETag"), revalidated=True)
             return saved_inventory
         raise ProxyError(f"Can't get inventory for provider {provider} from proxy server {proxy_cfg.url()}, status code {resp.status_code}")
 
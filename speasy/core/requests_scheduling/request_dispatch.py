@@ -17,6 +17,7 @@ from ...data_providers import (AmdaWebservice, CdaWebservice, CsaWebservice,
                                SscWebservice, GenericArchive, UiowaEphTool,
                                Cdpp3dViewWebservice)
 from ..http import is_server_up
+from ..platform import is_decoding_worker
 
 log = logging.getLogger(__name__)
 
@@ -133,7 +134,8 @@ def init_providers(ignore_disabled_status=False):
     init_cdpp3dview(ignore_disabled_status=ignore_disabled_status)
 
 
-if 'SPEASY_SKIP_INIT_PROVIDERS' not in os.environ:
+# decoding worker processes import speasy only to use its codecs
+if 'SPEASY_SKIP_INIT_PROVIDERS' not in os.environ and not is_decoding_worker():
     init_providers()
 
 
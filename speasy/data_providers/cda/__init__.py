@@ -16,7 +16,7 @@ from speasy.core import AllowedKwargs, EnsureUTCDateTime, make_utc_datetime
 from speasy.core import http, url_utils
 from email.utils import format_datetime
 from speasy.config import cdaweb as cda_cfg
-from speasy.core.codecs import get_codec
+from speasy.core.codecs import get_codec, sniff_codec
 from speasy.core.cache import CACHE_ALLOWED_KWARGS, CacheCall, UnversionedProviderCache
 from speasy.core.dataprovider import (GET_DATA_ALLOWED_KWARGS, DataProvider,
                                       ParameterRangeCheck)
@@ -49,9 +49,14 @@ def _codec_can_read(file_url: str, codec: str, variable: str) -> bool:
     """Does the codec really get that variable out of that file?
 
     Listing the variables is not enough: the ICON_L2-7_IVM-A files list 125 of them and then raise
-    while pyistp walks the axes of half. Only the load answers the question for sure.
+    while pyistp walks the axes of half. Only the load answers the question for sure, but a file whose
+    magic bytes belong to another format is turned down without trying.
     """
     try:
+        sniffed = sniff_codec(file_url)
+        if sniffed is not None and sniffed is not get_codec(codec):
+            log.warning(f"{file_url} is a {sniffed.name} file, not one the {codec} codec reads")
+            return False
         return get_codec(codec).load_variable(variable, file=file_url) is not None
     except IOError:
         raise   # transient, and the caller must not remember it as a verdict on the dataset
@@ -1,20 +1,26 @@
+import hashlib
 import os
+import shutil
 import tarfile
-from glob import glob
 from tempfile import TemporaryDirectory
+from typing import Dict, Iterator, Tuple
 
 from speasy.core import http, any_files
-from ._cdf_masters_parser import update_tree
+from ._cdf_masters_parser import update_datasets
 from ._xml_catalogs_parser import load_xml_catalog
 from ....config import cdaweb as cda_cfg
 from ....core.index import index
-from ....core.inventory.indexes import SpeasyIndex, to_dict, from_dict
+from ....core.inventory.indexes import DatasetIndex, SpeasyIndex, _children
+from ....core.inventory.snapshot import load_snapshot, snapshot_of, store_snapshot
 
 _MASTERS_CDF_PATH = f"{cda_cfg.inventory_data_path()}/masters_cdf/"
 _XML_CATALOG_PATH = f"{cda_cfg.inventory_data_path()}/all.xml"
+_SNAPSHOTS_PATH = cda_cfg.inventory_data_path()
 
 _CDAWEB_INVENTORY_ = "cdaweb-inventory"
-_CDAWEB_INVENTORY_TREE_ = "tree_v2"
+_CDAWEB_INVENTORY_TREE_ = "tree_snapshot"
+_CDAWEB_INVENTORY_TREE_STATE_ = "tree_state"
+_CDAWEB_INVENTORY_MASTERS_HASHES_ = "masters-hashes"
 _CDAWEB_INVENTORY_LAST_MODIFIED_MASTERS_ = "masters-last-modified"
 _CDAWEB_INVENTORY_LAST_MODIFIED_XML_ = "last_modified_xml"
 
@@ -24,29 +30,68 @@ def _ensure_path_exists(path: str):
     os.makedirs(dirname, exist_ok=True)
 
 
-def _clean_master_cdf_folder():
-    _ensure_path_exists(_MASTERS_CDF_PATH)
-    cdf_files = glob(f"{_MASTERS_CDF_PATH}/*.cdf")
-    for cdf_file in cdf_files:
-        os.remove(cdf_file)
+def _file_hash(path: str) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _hash_masters(masters_dir: str) -> Dict[str, str]:
+    return {
+        os.path.relpath(os.path.join(dirpath, fname), masters_dir): _file_hash(os.path.join(dirpath, fname))
+        for dirpath, _, fnames in os.walk(masters_dir) for fname in fnames
+    }
+
+
+def _sync_master_cdf_folder(extracted_dir: str, masters_hashes: Dict[str, str]) -> Dict[str, str]:
+    """Only replaces in the masters folder the files whose content changed and removes the ones that are gone.
 
+    Returns
+    -------
+    Dict[str, str]
+        master file -> content hash, for the new masters
+    """
+    new_hashes = _hash_masters(extracted_dir)
+    for name, digest in new_hashes.items():
+        if masters_hashes.get(name) != digest or not os.path.exists(os.path.join(_MASTERS_CDF_PATH, name)):
+            _ensure_path_exists(os.path.join(_MASTERS_CDF_PATH, name))
+            shutil.move(os.path.join(extracted_dir, name), os.path.join(_MASTERS_CDF_PATH, name))
+    for name in set(masters_hashes) - set(new_hashes):
+        if os.path.exists(os.path.join(_MASTERS_CDF_PATH, name)):
+            os.remove(os.path.join(_MASTERS_CDF_PATH, name))
+    return new_hashes
 
-def _download_and_extract_master_cdf(masters_url: str):
-    with TemporaryDirectory() as tmp_path:
+
+def _download_and_extract_master_cdf(masters_url: str, masters_hashes: Dict[str, str]) -> Dict[str, str]:
+    _ensure_path_exists(_MASTERS_CDF_PATH)
+    # extracted next to the masters folder so that changed files are moved, not copied, in place
+    with TemporaryDirectory(dir=os.path.dirname(os.path.normpath(_MASTERS_CDF_PATH))) as tmp_path:
         with open(f"{tmp_path}/masters.tar", 'wb') as master_archive:
             master_archive.write(any_files.any_loc_open(masters_url).read())
-        tar = tarfile.open(f"{tmp_path}/masters.tar")
-        tar.extractall(_MASTERS_CDF_PATH)
-        tar.close()
+        with tarfile.open(f"{tmp_path}/masters.tar") as tar:
+            tar.extractall(f"{tmp_path}/masters")
+        return _sync_master_cdf_folder(f"{tmp_path}/masters", masters_hashes)
+
+
+def _masters_hashes() -> Dict[str, str]:
+    masters_hashes = index.get(_CDAWEB_INVENTORY_, _CDAWEB_INVENTORY_MASTERS_HASHES_, None)
+    if masters_hashes is None:
+        # masters extracted before hashes were tracked
+        masters_hashes = _hash_masters(_MASTERS_CDF_PATH) if os.path.isdir(_MASTERS_CDF_PATH) else {}
+        index.set(_CDAWEB_INVENTORY_, _CDAWEB_INVENTORY_MASTERS_HASHES_, masters_hashes)
+    return masters_hashes
 
 
 def update_master_cdf(masters_url: str = "https://spdf.gsfc.nasa.gov/pub/software/cdawlib/0MASTERS/master.tar"):
     last_modified = http.head(masters_url).headers['last-modified']
     if index.get(_CDAWEB_INVENTORY_, _CDAWEB_INVENTORY_LAST_MODIFIED_MASTERS_, "") != last_modified:
-        _clean_master_cdf_folder()
-        _download_and_extract_master_cdf(masters_url)
+        masters_hashes = _masters_hashes()
+        new_hashes = _download_and_extract_master_cdf(masters_url, masters_hashes)
+        index.set(_CDAWEB_INVENTORY_, _CDAWEB_INVENTORY_MASTERS_HASHES_, new_hashes)
         index.set(_CDAWEB_INVENTORY_, _CDAWEB_INVENTORY_LAST_MODIFIED_MASTERS_, last_modified)
-        return True
+        return new_hashes != masters_hashes
     return False
 
 
@@ -61,15 +106,60 @@ def update_xml_catalog(xml_catalog_url: str = "https://spdf.gsfc.nasa.gov/pub/ca
     return False
 
 
+def _datasets_with_parent(root: SpeasyIndex) -> Iterator[Tuple[SpeasyIndex, str, DatasetIndex]]:
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        for key, child in list(_children(node).items()):
+            if isinstance(child, DatasetIndex):
+                yield node, key, child
+            else:
+                stack.append(child)
+
+
+def _master_name(dataset: DatasetIndex) -> str:
+    return dataset.mastercdf.split('/')[-1]
+
+
+def update_inventory_tree(root: SpeasyIndex = None) -> SpeasyIndex:
+    """Builds CDAWeb inventory tree from the local all.xml and master CDFs, reusing the saved one when possible.
+
+    The saved tree comes with the all.xml hash, every dataset all.xml entry hash and every master CDF hash
+    it was built from. If none changed it is returned as is, otherwise only the datasets whose entry or
+    master changed are parsed again, the others are taken from the saved tree.
+    """
+    masters_hashes = _masters_hashes()
+    catalog_hash = _file_hash(_XML_CATALOG_PATH)
+    saved = load_snapshot(index.get(_CDAWEB_INVENTORY_, _CDAWEB_INVENTORY_TREE_, ""))
+    state = index.get(_CDAWEB_INVENTORY_, _CDAWEB_INVENTORY_TREE_STATE_, None) if saved is not None else None
+    if state is not None and state['catalog'] == catalog_hash and state['masters'] == masters_hashes:
+        return saved
+
+    entries_hashes = {}
+    root = load_xml_catalog(xml_file_path=_XML_CATALOG_PATH, root=root, entries_hashes=entries_hashes)
+    saved_snapshot = snapshot_of(saved) if state is not None else None
+    outdated = []
+    for parent, key, dataset in _datasets_with_parent(root):
+        uid, master = dataset.spz_uid(), _master_name(dataset)
+        previous = None
+        if saved_snapshot is not None and state['entries'].get(uid) == entries_hashes.get(uid) \
+            and state['masters'].get(master) == masters_hashes.get(master):
+            previous = saved_snapshot.lookup('datasets', uid)
+        if previous is not None:
+            parent.__dict__[key] = previous
+        else:
+            outdated.append(dataset)
+    update_datasets(outdated, master_cdf_dir=_MASTERS_CDF_PATH)
+
+    snapshot_path = store_snapshot(root, _SNAPSHOTS_PATH, _CDAWEB_INVENTORY_TREE_)
+    index.set(_CDAWEB_INVENTORY_, _CDAWEB_INVENTORY_TREE_, snapshot_path)
+    index.set(_CDAWEB_INVENTORY_, _CDAWEB_INVENTORY_TREE_STATE_,
+              {'catalog': catalog_hash, 'entries': entries_hashes, 'masters': masters_hashes})
+    return load_snapshot(snapshot_path) or root
+
+
 def build_inventory(root: SpeasyIndex = None, xml_catalog_url: str = "https://spdf.gsfc.nasa.gov/pub/catalogs/all.xml",
                     masters_url: str = "https://spdf.gsfc.nasa.gov/pub/software/cdawlib/0MASTERS/master.tar"):
-    needs_rebuild = update_xml_catalog(xml_catalog_url)
-    needs_rebuild |= update_master_cdf(masters_url)
-    if needs_rebuild or not index.contains(_CDAWEB_INVENTORY_, _CDAWEB_INVENTORY_TREE_):
-        root = load_xml_catalog(xml_file_path=_XML_CATALOG_PATH, root=root)
-        update_tree(root=root, master_cdf_dir=_MASTERS_CDF_PATH)
-        index.set(_CDAWEB_INVENTORY_, _CDAWEB_INVENTORY_TREE_, to_dict(root, version=2))
-    else:
-        t = from_dict(index.get(_CDAWEB_INVENTORY_, _CDAWEB_INVENTORY_TREE_), version=2)
-        root.__dict__ = t.__dict__
-    return root
+    update_xml_catalog(xml_catalog_url)
+    update_master_cdf(masters_url)
+    return update_inventory_tree(root)
@@ -1,11 +1,15 @@
 import logging
+import multiprocessing
 import os.path
-from typing import List
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional, Tuple
+
 import pyistp
 
 from speasy.core.cdf.inventory_extractor import extract_parameters, filter_dataset_meta
-from speasy.core.inventory.indexes import ParameterIndex, DatasetIndex, SpeasyIndex
+from speasy.core.inventory.indexes import ParameterIndex, DatasetIndex, SpeasyIndex, walk_inventory
 from speasy.core import fix_name
+from speasy.config import cdaweb as cda_cfg
 
 log = logging.getLogger(__name__)
 
@@ -17,38 +21,64 @@ def _patch_parameter(parameter: ParameterIndex, dataset: DatasetIndex):
     return parameter
 
 
-def load_master_cdf(path, dataset: DatasetIndex):
+def _parse_master_cdf(job: Tuple[str, str]) -> Tuple[List[Tuple[str, str, dict]], dict]:
+    """Parses one master CDF into (name, uid, meta) parameter descriptions and dataset meta.
+
+    Runs in the masters parsing worker processes, so it only returns plain picklable values.
+    """
+    path, dataset_uid = job
     cdf = pyistp.loader.ISTPLoader(path)
+    parameters = extract_parameters(cdf, provider="cda", uid_fmt=f"{dataset_uid}/{{var_name}}", enable_cda_trick=True)
+    return [(p.spz_name(), p.spz_uid(), p._spz_meta) for p in parameters], filter_dataset_meta(cdf)
+
+
+def _merge_master_cdf(dataset: DatasetIndex, description: Tuple[List[Tuple[str, str, dict]], dict]):
+    parameters, dataset_meta = description
     dataset.__dict__.update(
-        {fix_name(p.spz_name()): p for p in
-         map(lambda p: _patch_parameter(p, dataset), extract_parameters(cdf, provider="cda",
-                                                                        uid_fmt=f"{dataset.serviceprovider_ID}/{{var_name}}",
-                                                                        enable_cda_trick=True
-                                                                        )
-             )
-         }
+        {fix_name(name): _patch_parameter(ParameterIndex(name=name, provider="cda", uid=uid, meta=meta), dataset)
+         for name, uid, meta in parameters}
     )
-    dataset.__dict__.update(filter_dataset_meta(cdf))
+    dataset.__dict__.update(dataset_meta)
 
 
+def load_master_cdf(path, dataset: DatasetIndex):
+    _merge_master_cdf(dataset, _parse_master_cdf((path, dataset.serviceprovider_ID)))
+
+
+def _parse_master_cdfs(jobs: List[Tuple[str, str]], workers: int) -> Iterator:
+    # worker processes are forked so that they don't have to import speasy again, which would also initialize
+    # every provider, where fork isn't available masters are parsed in this process
+    if workers > 1 and len(jobs) > 1 and 'fork' in multiprocessing.get_all_start_methods():
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs)),
+                                 mp_context=multiprocessing.get_context('fork')) as pool:
+            yield from pool.map(_parse_master_cdf, jobs, chunksize=max(1, len(jobs) // (workers * 8)))
+    else:
+        yield from map(_parse_master_cdf, jobs)
+
 
 def _extract_datasets(root: SpeasyIndex) -> List[DatasetIndex]:
-    def extract_datasets(node: SpeasyIndex, datasets: List):
-        if isinstance(node, DatasetIndex):
-            datasets.append(node)
-        elif isinstance(node, SpeasyIndex):
-            for child in node.__dict__.values():
-                extract_datasets(child, datasets)
+    return [node for node in walk_inventory(root) if isinstance(node, DatasetIndex)]
 
-    datasets = []
-    extract_datasets(root, datasets)
-    return datasets
 
+def update_datasets(datasets: List[DatasetIndex], master_cdf_dir, workers: Optional[int] = None):
+    """Adds to every given dataset the parameters and meta from its master CDF found in master_cdf_dir.
 
-def update_tree(root: SpeasyIndex, master_cdf_dir):
-    datasets = _extract_datasets(root)
+    Masters are parsed in parallel by a pool of workers processes (see cdaweb masters_parsing_workers config
+    entry) and merged in datasets order, giving the same tree as a serial parse.
+    """
+    if workers is None:
+        workers = cda_cfg.masters_parsing_workers() or os.cpu_count() or 1
+    parsed_datasets, jobs = [], []
     for dataset in datasets:
         master_cdf_fname = dataset.mastercdf.split('/')[-1]
         full_path = os.path.join(master_cdf_dir, master_cdf_fname)
         if os.path.exists(full_path):
-            load_master_cdf(full_path, dataset)
+            parsed_datasets.append(dataset)
+            jobs.append((full_path, dataset.serviceprovider_ID))
+    for dataset, description in zip(parsed_datasets, _parse_master_cdfs(jobs, workers)):
+        _merge_master_cdf(dataset, description)
+
+
+def update_tree(root: SpeasyIndex, master_cdf_dir, workers: Optional[int] = None):
+    """Same as :func:`update_datasets` for every dataset of root."""
+    update_datasets(_extract_datasets(root), master_cdf_dir, workers=workers)
@@ -1,7 +1,9 @@
 from speasy.core import fix_name
 from speasy.core.inventory.indexes import DatasetIndex, SpeasyIndex, make_inventory_node
 import xml.etree.ElementTree as Et
+import hashlib
 import logging
+from typing import Dict, Optional
 
 log = logging.getLogger(__name__)
 
@@ -85,12 +87,36 @@ def parse_dataset(inventory_tree, dataset_node):
         print(f'Missing master CDF for {dataset_node.attrib["serviceprovider_ID"]}')
 
 
-def load_xml_catalog(xml_file_path: str, root: SpeasyIndex or None = None):
-    with open(xml_file_path) as xml_file:
-        tree = Et.fromstring(xml_file.read())
-        inventory_tree = root or SpeasyIndex(name='root', provider='cda', uid='cda_root')
-        for site in tree.iter('{cdas}datasite'):
-            if site.attrib['ID'] == 'CDAWeb_HTTPS':
-                for node in site.iter('{cdas}dataset'):
-                    parse_dataset(inventory_tree, node)
-        return inventory_tree
+def entry_hash(dataset_node) -> str:
+    # without the tail, which depends on where the streaming parser was when the element ended
+    tail, dataset_node.tail = dataset_node.tail, None
+    try:
+        return hashlib.blake2b(Et.tostring(dataset_node), digest_size=16).hexdigest()
+    finally:
+        dataset_node.tail = tail
+
+
+def load_xml_catalog(xml_file_path: str, root: SpeasyIndex or None = None,
+                     entries_hashes: Optional[Dict[str, str]] = None):
+    """Builds the CDAWeb inventory tree from all.xml, without datasets parameters.
+
+    all.xml is parsed as a stream, each dataset element is turned into index nodes as soon as it is
+    complete and then dropped.
+
+    If given, entries_hashes is filled with a hash of each dataset all.xml entry, by dataset uid, so that
+    changed entries can be found without comparing trees.
+    """
+    inventory_tree = root or SpeasyIndex(name='root', provider='cda', uid='cda_root')
+    in_https_site = False
+    for event, node in Et.iterparse(xml_file_path, events=('start', 'end')):
+        if node.tag == '{cdas}datasite':
+            in_https_site = event == 'start' and node.attrib['ID'] == 'CDAWeb_HTTPS'
+            if event == 'end':
+                node.clear()
+        elif event == 'end' and node.tag == '{cdas}dataset':
+            if in_https_site:
+                parse_dataset(inventory_tree, node)
+                if entries_hashes is not None:
+                    entries_hashes[node.attrib['serviceprovider_ID']] = entry_hash(node)
+            node.clear()
+    return inventory_tree
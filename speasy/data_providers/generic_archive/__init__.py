@@ -25,10 +25,9 @@ from speasy.core.cache import CacheCall, CACHE_ALLOWED_KWARGS
 
 log = logging.getLogger(__name__)
 
-# List of available ISTP codecs (used in _dataset_from_master() )
-# The NetCDF codec is not registered if netCDF4 is not available:
-# this is why we filter on None
-_ISTP_CODECS = tuple(c for c in (get_codec('cdf'), get_codec('nc')) if c is not None)
+# ISTP codecs names (used in _dataset_from_master() ), looking the codecs up at import would import them
+# and their libraries (pycdfpp, pyistp, netCDF4) before any archive needs them
+_ISTP_CODECS = ('IstpCdf', 'IstpNetCDF')
 
 
 def _global_inventory_dir():
@@ -109,7 +108,7 @@ def _dataset_from_master(name, path, entry_meta, master_file, codec_id, dataset_
     if codec is None:
         log.warning(f"Unknown codec '{codec_id}' for dataset {name}, skipping")
         return None
-    if codec in _ISTP_CODECS:  # ISTP formats: pyistp extraction with variable + dataset meta
+    if codec.name in _ISTP_CODECS:  # ISTP formats: pyistp extraction with variable + dataset meta
         result = extract_from_master(master_file, provider='archive',
                                      params_uid_format=f"{path}/{{var_name}}",
                                      params_meta=entry_meta)
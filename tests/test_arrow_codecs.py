@@ -0,0 +1,117 @@
+import io
+import os
+import tempfile
+import unittest
+
+import numpy as np
+from ddt import data, ddt
+
+from speasy.core import make_utc_datetime
+from speasy.core.codecs import get_codec
+from speasy.core.data_containers import DataContainer
+from speasy.products import SpeasyVariable
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    from speasy.core.codecs.bundled_codecs.arrow import _to_arrow
+except ImportError:
+    pa = None
+
+__HERE__ = os.path.dirname(os.path.abspath(__file__))
+
+
+@unittest.skipIf(pa is None, "pyarrow is not installed")
+@ddt
+class ArrowCodecs(unittest.TestCase):
+    def setUp(self):
+        self.variables = get_codec("cdf").load_variables(
+            ["BGSEc", "Magnitude"], f"{__HERE__}/resources/ac_k2_mfi_20220101_v03.cdf")
+        self.spectrum = get_codec("hapi/binary").load_variables(
+            ["spectra_time_dependent_bins"], f"{__HERE__}/resources/HAPI_ndData_TimeVarying_Axis.binary",
+            disable_cache=True)["spectra_time_dependent_bins"]
+
+    @data("arrow", "feather", "parquet", "application/vnd.apache.arrow.file", "application/vnd.apache.parquet")
+    def test_codec_resolution(self, codec):
+        self.assertIsNotNone(get_codec(codec))
+
+    @data("arrow", "parquet")
+    def test_round_trip(self, codec_name):
+        codec = get_codec(codec_name)
+        for variables in (list(self.variables.values()), [self.spectrum]):
+            names = [v.name for v in variables]
+            loaded = codec.load_variables(names, codec.save_variables(variables))
+            self.assertEqual(codec.list_variables(codec.save_variables(variables)), names)
+            for variable in variables:
+                self.assertEqual(loaded[variable.name], variable)
+                self.assertEqual(loaded[variable.name].columns, variable.columns)
+                self.assertFalse(loaded[variable.name].values.flags.writeable)
+            copied = codec.load_variables(names, codec.save_variables(variables), copy=True)
+            for variable in variables:
+                self.assertEqual(copied[variable.name], variable)
+                self.assertTrue(copied[variable.name].values.flags.writeable)
+
+    @data("arrow", "parquet")
+    def test_big_endian_round_trip(self, codec_name):
+        codec = get_codec(codec_name)
+        variable = self.variables["BGSEc"]
+        values = np.arange(variable.values.size, dtype=variable.values.dtype).reshape(variable.values.shape)
+
+        def make_variable(values):
+            return SpeasyVariable(axes=variable.axes, values=DataContainer(values, meta=variable.meta, name="BGSEc"),
+                                  columns=variable.columns)
+
+        expected = make_variable(values)
+        big_endian = make_variable(values.astype(values.dtype.newbyteorder('>')))
+        self.assertEqual(codec.load_variable("BGSEc", codec.save_variables([big_endian]), disable_cache=True),
+                         expected)
+
+    @data("arrow", "parquet")
+    def test_files_and_file_objects(self, codec_name):
+        codec = get_codec(codec_name)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, f"variables.{codec_name}")
+            self.assertTrue(codec.save_variables(list(self.variables.values()), path))
+            self.assertEqual(codec.load_variable("BGSEc", path, disable_cache=True), self.variables["BGSEc"])
+            with open(path, 'rb') as f:
+                self.assertEqual(codec.load_variable("Magnitude", f, disable_cache=True), self.variables["Magnitude"])
+        buffer = io.BytesIO()
+        self.assertTrue(codec.save_variables([self.spectrum], buffer))
+        self.assertEqual(codec.load_variable(self.spectrum.name, buffer.getvalue(), disable_cache=True), self.spectrum)
+
+    @data("arrow", "parquet")
+    def test_only_loads_records_in_range(self, codec_name):
+        codec = get_codec(codec_name)
+        saved = codec.save_variables(list(self.variables.values()), **({"row_group_size": 1000}
+                                                                        if codec_name == "parquet" else {}))
+        full = self.variables["BGSEc"]
+        ranged = codec.load_variables(["BGSEc"], saved, start_time="2022-01-01T03:00:00",
+                                      stop_time="2022-01-01T07:30:00")
+        self.assertEqual(list(ranged), ["BGSEc"])
+        self.assertLess(len(ranged["BGSEc"]), len(full))
+        self.assertEqual(ranged["BGSEc"],
+                         full[make_utc_datetime("2022-01-01T03:00:00"):make_utc_datetime("2022-01-01T07:30:00")])
+
+    def test_values_are_wrapped_without_copy(self):
+        values = self.variables["BGSEc"].values
+        array = _to_arrow(values)
+        self.assertEqual(array.type, pa.list_(pa.float32(), 3))
+        self.assertEqual(array.flatten().buffers()[1].address, values.ctypes.data)
+        time = self.variables["BGSEc"].time
+        self.assertEqual(_to_arrow(time).buffers()[1].address, time.ctypes.data)
+
+    def test_loads_tables_written_by_other_tools(self):
+        time = np.arange(np.datetime64("2022-01-01"), np.datetime64("2022-01-02"), np.timedelta64(1, "h"))
+        table = pa.table({"epoch": pa.array(time.astype("datetime64[us]")), "density": np.arange(24.),
+                          "velocity": pa.FixedSizeListArray.from_arrays(pa.array(np.arange(72.)), 3)})
+        buffer = io.BytesIO()
+        pq.write_table(table, buffer)
+        codec = get_codec("parquet")
+        self.assertEqual(codec.list_variables(buffer.getvalue()), ["density", "velocity"])
+        velocity = codec.load_variable("velocity", buffer.getvalue(), disable_cache=True)
+        np.testing.assert_array_equal(velocity.time, time.astype("datetime64[ns]"))
+        np.testing.assert_array_equal(velocity.values, np.arange(72.).reshape(24, 3))
+
+
+if __name__ == '__main__':
+    unittest.main()
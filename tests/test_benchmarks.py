@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for the benchmarks/ harnesses, the parts that do not need to spawn interpreters."""
+import os
+import sys
+import unittest
+
+_BENCH_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks")
+sys.path.insert(0, _BENCH_DIR)
+
+import startup  # noqa: E402
+import xml_inventories  # noqa: E402
+
+from speasy.core.inventory.indexes import from_dict, DatasetIndex, ParameterIndex  # noqa: E402
+from speasy.core.inventory import ProviderInventory  # noqa: E402
+from speasy.core.inventory.indexes import to_json  # noqa: E402
+
+_RESOURCES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resources")
+
+
+class StartupBenchmark(unittest.TestCase):
+    def test_parses_importtime_report(self):
+        report = """import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _io
+import time:      2000 |       2500 |     speasy.core
+import time:       300 |       3000 | speasy
+"""
+        modules = startup.parse_importtime(report)
+        self.assertEqual([m['module'] for m in modules], ['_io', 'speasy.core', 'speasy'])
+        self.assertEqual(modules[1]['depth'], 2)
+        summary = startup.summarize_importtime(modules)
+        self.assertEqual(summary['total_us'], 2420)
+        self.assertEqual(summary['per_package_us']['speasy'], 2300)
+        self.assertEqual(summary['slowest_modules'][0]['module'], 'speasy')
+
+    def test_synthetic_inventory_is_a_valid_proxy_inventory(self):
+        root = from_dict(startup.synthetic_inventory('bench', 2, 3, 4), version=2)
+        inventory = ProviderInventory()
+        inventory.update(root)
+        self.assertEqual(len(inventory.datasets), 6)
+        self.assertEqual(len(inventory.parameters), 24)
+        self.assertIsInstance(inventory.datasets['M1_D2'], DatasetIndex)
+        self.assertIsInstance(inventory.parameters['M1_D2/param_3'], ParameterIndex)
+
+    def test_compare_flags_only_significant_regressions(self):
+        baseline = {'results': {'import': {'warm': {'wall_s': 1.0}}, 'providers': {'cda': {'init_s': 0.001}}}}
+        current = {'results': {'import': {'warm': {'wall_s': 1.5}}, 'providers': {'cda': {'init_s': 0.004}}}}
+        regressions = startup.compare(current, baseline, max_regression=1.25)
+        self.assertEqual(len(regressions), 1)
+        self.assertTrue(regressions[0].startswith('import.warm.wall_s'))
+        self.assertEqual(startup.compare(current, baseline, max_regression=2.0), [])
+
+
+class XmlInventoriesBenchmark(unittest.TestCase):
+    def test_streaming_amda_parser_matches_dom_parser(self):
+        from xml.etree import ElementTree as Et
+        from speasy.core.impex.parser import ImpexXMLParser
+        with open(os.path.join(_RESOURCES, 'obsdatatree.xml')) as f:
+            real = f.read()
+        for xml in (real, xml_inventories.synthetic_obs_data_tree(2, 3, 4)):
+            self.assertEqual(to_json(ImpexXMLParser.parse(xml, 'amda'), version=2),
+                             to_json(ImpexXMLParser.parse_element(Et.fromstring(xml), 'amda'), version=2))
+        results = xml_inventories.bench_amda(xml_inventories.synthetic_obs_data_tree(2, 3, 4), repeat=1)
+        self.assertGreater(results['dom']['peak_bytes'], 0)
+        self.assertGreater(results['streaming']['seconds'], 0)
+
+    def test_streaming_cdaweb_parser_matches_dom_parser(self):
+        from xml.etree import ElementTree as Et
+        from speasy.core.inventory.indexes import SpeasyIndex
+        from speasy.data_providers.cda._inventory_builder._xml_catalogs_parser import load_xml_catalog, \
+            parse_dataset
+        path = os.path.join(_RESOURCES, 'cdaweb_all_sample.xml')
+        root = SpeasyIndex(name='root', provider='cda', uid='cda_root')
+        for site in Et.parse(path).getroot().iter('{cdas}datasite'):
+            if site.attrib['ID'] == 'CDAWeb_HTTPS':
+                for node in site.iter('{cdas}dataset'):
+                    parse_dataset(root, node)
+        self.assertEqual(to_json(load_xml_catalog(path), version=2), to_json(root, version=2))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import os
+import shutil
+import tempfile
+import unittest
+import uuid
+from unittest import mock
+
+from speasy.core.index import index
+from speasy.core.inventory.indexes import to_json
+from speasy.data_providers.cda import _inventory_builder as builder
+
+__HERE__ = os.path.dirname(os.path.abspath(__file__))
+_MASTERS = ('ela_l1_state_pred_00000000_v01.cdf', 'ge_h0_cpi_00000000_v01.cdf',
+            'erg_pwe_hfa_l3_1min_00000000_v01.cdf')
+
+
+class IncrementalInventoryBuild(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.masters = os.path.join(self.tmp.name, 'masters_cdf') + '/'
+        os.makedirs(self.masters)
+        for master in _MASTERS:
+            shutil.copy(os.path.join(__HERE__, 'resources', master), self.masters)
+        self.catalog = os.path.join(self.tmp.name, 'all.xml')
+        shutil.copy(os.path.join(__HERE__, 'resources', 'cdaweb_all_sample.xml'), self.catalog)
+        self.module = f'cdaweb-inventory-test-{uuid.uuid4().hex}'
+        self.patches = [
+            mock.patch.object(builder, '_MASTERS_CDF_PATH', self.masters),
+            mock.patch.object(builder, '_XML_CATALOG_PATH', self.catalog),
+            mock.patch.object(builder, '_SNAPSHOTS_PATH', self.tmp.name),
+            mock.patch.object(builder, '_CDAWEB_INVENTORY_', self.module),
+        ]
+        for patch in self.patches:
+            patch.start()
+        self.parse = mock.patch.object(builder, 'update_datasets', wraps=builder.update_datasets).start()
+
+    def tearDown(self):
+        mock.patch.stopall()
+        for key in (builder._CDAWEB_INVENTORY_TREE_, builder._CDAWEB_INVENTORY_TREE_STATE_,
+                    builder._CDAWEB_INVENTORY_MASTERS_HASHES_):
+            if index.contains(self.module, key):
+                index.pop(self.module, key)
+        self.tmp.cleanup()
+
+    def parsed_datasets(self):
+        return sorted(dataset.spz_uid() for call in self.parse.call_args_list for dataset in call.args[0])
+
+    def test_unchanged_inventory_is_not_rebuilt(self):
+        first = builder.update_inventory_tree()
+        self.assertEqual(self.parsed_datasets(), ['ELA_L1_STATE_PRED', 'ERG_PWE_HFA_L3_1MIN', 'GE_H0_CPI'])
+        self.parse.reset_mock()
+        second = builder.update_inventory_tree()
+        self.parse.assert_not_called()
+        self.assertEqual(to_json(first, version=2), to_json(second, version=2))
+
+    def test_only_changed_catalog_entries_are_parsed(self):
+        builder.update_inventory_tree()
+        self.parse.reset_mock()
+        with open(self.catalog) as f:
+            catalog = f.read()
+        with open(self.catalog, 'w') as f:
+            f.write(catalog.replace('Geotail Comprehensive Plasma Instrument', 'Geotail CPI'))
+        tree = builder.update_inventory_tree()
+        self.assertEqual(self.parsed_datasets(), ['GE_H0_CPI'])
+        self.assertEqual(tree.Geotail.CPI.GE_H0_CPI.description, 'Geotail CPI')
+        self.assertGreater(len(list(tree.ELFIN.ELFIN_A.STATE.ELA_L1_STATE_PRED)), 0)
+
+    def test_only_datasets_with_changed_masters_are_parsed(self):
+        builder.update_inventory_tree()
+        self.parse.reset_mock()
+        hashes = dict(index.get(self.module, builder._CDAWEB_INVENTORY_MASTERS_HASHES_))
+        hashes['erg_pwe_hfa_l3_1min_00000000_v01.cdf'] = 'changed'
+        index.set(self.module, builder._CDAWEB_INVENTORY_MASTERS_HASHES_, hashes)
+        incremental = builder.update_inventory_tree()
+        self.assertEqual(self.parsed_datasets(), ['ERG_PWE_HFA_L3_1MIN'])
+
+        index.pop(self.module, builder._CDAWEB_INVENTORY_TREE_STATE_)
+        full = builder.update_inventory_tree()
+        self.assertEqual(to_json(incremental, version=2), to_json(full, version=2))
+
+    def test_sync_master_folder_only_touches_changed_files(self):
+        hashes = builder._hash_masters(self.masters)
+        extracted = os.path.join(self.tmp.name, 'extracted')
+        os.makedirs(extracted)
+        shutil.copy(os.path.join(self.masters, _MASTERS[0]), extracted)
+        shutil.copy(os.path.join(self.masters, _MASTERS[1]), os.path.join(extracted, _MASTERS[2]))
+        new_hashes = builder._sync_master_cdf_folder(extracted, hashes)
+        self.assertEqual(sorted(os.listdir(self.masters)), sorted([_MASTERS[0], _MASTERS[2]]))
+        self.assertEqual(new_hashes, builder._hash_masters(self.masters))
+        self.assertEqual(new_hashes[_MASTERS[2]], hashes[_MASTERS[1]])
+
+
+if __name__ == '__main__':
+    unittest.main()
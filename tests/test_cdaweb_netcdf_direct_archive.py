@@ -165,6 +165,10 @@ class TestProbeVerdictsAreRemembered(unittest.TestCase):
 
     def setUp(self):
         _codec_can_read.drop_entries()
+        # the probed files don't exist, the decode is mocked and the content can't be sniffed
+        sniffing = patch('speasy.data_providers.cda.sniff_codec', return_value=None)
+        sniffing.start()
+        self.addCleanup(sniffing.stop)
 
     def tearDown(self):
         _codec_can_read.drop_entries()
@@ -198,5 +202,24 @@ class TestProbeVerdictsAreRemembered(unittest.TestCase):
         self.assertEqual(load_variable.call_count, 2)
 
 
+
+@unittest.skipIf(netCDF4 is None, "netCDF4 not installed")
+class TestProbeSniffsTheContent(unittest.TestCase):
+
+    def setUp(self):
+        _codec_can_read.drop_entries()
+
+    def tearDown(self):
+        _codec_can_read.drop_entries()
+
+    def test_a_file_of_another_format_is_not_decoded(self):
+        cdf_file = f"file://{os.path.dirname(os.path.abspath(__file__))}/resources/ac_k2_mfi_20220101_v03.cdf"
+        with patch.object(get_codec('nc'), 'load_variable', return_value=object()) as load_variable:
+            with self.assertLogs('speasy.data_providers.cda', level='WARNING'):
+                self.assertFalse(_codec_can_read(cdf_file, 'nc', 'Magnitude'))
+            load_variable.assert_not_called()
+        self.assertTrue(_codec_can_read(cdf_file, 'cdf', 'Magnitude'))
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -6,11 +6,18 @@ import unittest
 
 from ddt import ddt, data, unpack
 
+import io
 import os
+import pathlib
+import subprocess
+import sys
 import tempfile
 from unittest import mock
 import numpy as np
+import pycdfpp
+from speasy.core import make_utc_datetime
 from speasy.core.codecs import get_codec
+from speasy.core.codecs.bundled_codecs.istp import _buffer_owner
 
 __HERE__ = os.path.dirname(os.path.abspath(__file__))
 
@@ -95,6 +102,135 @@ class TestCDFWriter(unittest.TestCase):
         self.assertEqual(self.v.values.shape, (24, 3))
 
 
+@ddt
+class TestCDFWriterTargets(unittest.TestCase):
+    def setUp(self):
+        self.codec = get_codec("application/x-cdf")
+        self.variables = list(self.codec.load_variables(
+            ["BGSEc", "Magnitude"], f"{__HERE__}/resources/ac_k2_mfi_20220101_v03.cdf").values())
+
+    def _assert_saved(self, saved):
+        cdf = pycdfpp.load(bytes(saved))
+        self.assertEqual(cdf["BGSEc"].compression, pycdfpp.CompressionType.gzip_compression)
+        for variable in self.variables:
+            loaded = self.codec.load_variable(variable.name, bytes(saved), disable_cache=True)
+            np.testing.assert_array_equal(loaded.time, variable.time)
+            np.testing.assert_array_equal(loaded.values, variable.values)
+
+    @data(1, 9)
+    def test_compressed_buffer(self, compression_level):
+        self._assert_saved(self.codec.save_variables(self.variables, compress_variables=True,
+                                                     compression_level=compression_level))
+
+    def test_path_like_and_file_object(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = pathlib.Path(tmp) / "saved.cdf"
+            self.assertTrue(self.codec.save_variables(self.variables, path, compress_variables=True))
+            self._assert_saved(path.read_bytes())
+            with open(path, "wb") as f:
+                self.assertTrue(self.codec.save_variables(self.variables, f, compress_variables=True))
+            self._assert_saved(path.read_bytes())
+        f = io.BytesIO()
+        self.assertTrue(self.codec.save_variables(self.variables, f, compress_variables=True))
+        self._assert_saved(f.getvalue())
+
+    def test_values_are_left_untouched(self):
+        values = [v.values.copy() for v in self.variables]
+        self.codec.save_variables(self.variables, compress_variables=True)
+        for variable, before in zip(self.variables, values):
+            np.testing.assert_array_equal(variable.values, before)
+
+
+class TestOpenedFilesReuse(unittest.TestCase):
+    def setUp(self):
+        from speasy.core.codecs.bundled_codecs.istp import cdf
+        self.cdf = cdf
+        self.codec = get_codec("application/x-cdf")
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "ac_k2_mfi_20220101_v03.cdf")
+        with open(f"{__HERE__}/resources/ac_k2_mfi_20220101_v03.cdf", "rb") as src, open(self.path, "wb") as dst:
+            dst.write(src.read())
+        cdf._opened_files.clear()
+
+    def tearDown(self):
+        self.cdf._opened_files.clear()
+        self.tmp.cleanup()
+
+    def _load(self, variable):
+        return self.codec.load_variable(variable, self.path, disable_cache=True)
+
+    def test_variables_read_one_after_the_other_parse_the_file_once(self):
+        with mock.patch.object(self.cdf.pyistp, "load", wraps=self.cdf.pyistp.load) as load:
+            bgsec, magnitude = self._load("BGSEc"), self._load("Magnitude")
+        self.assertEqual(load.call_count, 1)
+        reference = self.codec.load_variables(["BGSEc", "Magnitude"], f"{__HERE__}/resources/ac_k2_mfi_20220101_v03.cdf")
+        self.assertEqual(bgsec, reference["BGSEc"])
+        self.assertEqual(magnitude, reference["Magnitude"])
+
+    def test_expired_files_are_parsed_again_only_once_changed(self):
+        with mock.patch.object(self.cdf.pyistp, "load", wraps=self.cdf.pyistp.load) as load:
+            self._load("BGSEc")
+            for opened in self.cdf._opened_files._files.values():
+                opened.expires = 0
+            self._load("Magnitude")
+            self.assertEqual(load.call_count, 1)
+            for opened in self.cdf._opened_files._files.values():
+                opened.expires = 0
+            os.utime(self.path, ns=(0, 0))
+            self._load("BGSEc")
+            self.assertEqual(load.call_count, 2)
+
+    def test_budget_drops_least_recently_used_files(self):
+        opened_files = self.cdf._OpenedFiles(budget=10)
+        for name in ("a", "b", "c"):
+            opened_files.put((name, None), self.cdf._OpenedFile(None, (), 4))
+        self.assertIsNone(opened_files.get(("a", None)))
+        self.assertIsNotNone(opened_files.get(("c", None)))
+        opened_files.put(("big", None), self.cdf._OpenedFile(None, (), 11))
+        self.assertIsNone(opened_files.get(("big", None)))
+
+
+@ddt
+class TestTimeRangeLoading(unittest.TestCase):
+    @data(
+        ("2022-01-01T03:00:00", "2022-01-01T07:30:00"),
+        ("2021-12-31T00:00:00", "2022-01-01T02:00:00"),
+        ("2022-01-01T12:00:00", None),
+        ("2023-01-01T00:00:00", "2023-01-02T00:00:00"),
+    )
+    @unpack
+    def test_only_loads_records_in_range(self, start_time, stop_time):
+        codec = get_codec("application/x-cdf")
+        source_file = f"{__HERE__}/resources/ac_k2_mfi_20220101_v03.cdf"
+        full = codec.load_variable("BGSEc", source_file, disable_cache=True)
+        ranged = codec.load_variable("BGSEc", source_file, start_time=start_time, stop_time=stop_time,
+                                     disable_cache=True)
+        expected = full[make_utc_datetime(start_time):make_utc_datetime(stop_time) if stop_time else None]
+        self.assertLess(len(ranged), len(full))
+        self.assertEqual(ranged, expected)
+        self.assertIsNone(ranged.values.base)
+
+
+class TestBuffersOwnership(unittest.TestCase):
+    def setUp(self):
+        self.variables = get_codec("application/x-cdf").load_variables(
+            ["BGSEc", "Magnitude"], f"{__HERE__}/resources/ac_k2_mfi_20220101_v03.cdf")
+
+    def test_time_axis_is_handed_over(self):
+        time = self.variables["BGSEc"].time
+        self.assertIsNotNone(time.base)
+        self.assertNotIsInstance(_buffer_owner(time), pycdfpp.Variable)
+
+    def test_values_do_not_keep_the_cdf_alive(self):
+        for variable in self.variables.values():
+            self.assertIsNone(variable.values.base)
+
+    def test_variables_do_not_share_buffers(self):
+        bgsec, magnitude = self.variables["BGSEc"], self.variables["Magnitude"]
+        self.assertFalse(np.shares_memory(bgsec.time, magnitude.time))
+        self.assertFalse(np.shares_memory(bgsec.values, magnitude.values))
+
+
 @ddt
 class TestCDFWriterPtrAttributes(unittest.TestCase):
 
@@ -135,7 +271,7 @@ class TestListVariables(unittest.TestCase):
             codec.list_variables(f"{__HERE__}/resources/ac_k2_mfi_20220101_v03.cdf")
 
 
-from speasy.core.codecs import get_codec, CodecInterface
+from speasy.core.codecs import get_codec, CodecInterface, register_lazy_codec, sniff_codec
 from speasy.core.codecs import codecs_registry
 from speasy.core import plugins
 from speasy.products import DataContainer, SpeasyVariable, VariableTimeAxis
@@ -262,3 +398,83 @@ class _UserDirValidCodec(CodecInterface):
             finally:
                 codecs_registry.__CODECS__.pop('codec/user-dir-valid', None)
                 codecs_registry.__CODECS__.pop('udv', None)
+
+
+class LazyCodecs(unittest.TestCase):
+
+    def setUp(self):
+        self.modules_dir = tempfile.TemporaryDirectory()
+        with open(os.path.join(self.modules_dir.name, 'lazy_tiny_codec.py'), 'w') as f:
+            f.write(UserDirectoryCodecFailuresAreContained._VALID_CODEC_FILE
+                    .replace('_UserDirValidCodec', '_LazyTinyCodec').replace('user-dir-valid', 'lazy-tiny')
+                    .replace("'udv'", "'lazytiny'"))
+        sys.path.insert(0, self.modules_dir.name)
+
+    def tearDown(self):
+        sys.path.remove(self.modules_dir.name)
+        sys.modules.pop('lazy_tiny_codec', None)
+        for key in ('codec/lazy-tiny', 'lazytiny', 'codec/missing', 'missing'):
+            codecs_registry.__CODECS__.pop(key, None)
+        self.modules_dir.cleanup()
+
+    def test_a_lazy_codec_is_imported_on_first_lookup(self):
+        register_lazy_codec('codec/lazy-tiny', 'lazy_tiny_codec', extensions=['lazytiny'])
+        self.assertNotIn('lazy_tiny_codec', sys.modules)
+        codec = get_codec('lazytiny')
+        self.assertIn('lazy_tiny_codec', sys.modules)
+        self.assertEqual(codec.name, 'codec/lazy-tiny')
+        self.assertIs(get_codec('codec/lazy-tiny'), codec)
+
+    def test_a_lazy_codec_missing_a_dependency_is_dropped(self):
+        register_lazy_codec('codec/missing', 'lazy_tiny_codec', extensions=['missing'],
+                            requires=['a_module_that_does_not_exist'])
+        self.assertIsNone(get_codec('missing'))
+        self.assertNotIn('codec/missing', codecs_registry.__CODECS__)
+        self.assertNotIn('lazy_tiny_codec', sys.modules)
+
+    def test_bundled_codecs_match_their_descriptors(self):
+        for key in ('cdf', 'nc', 'hapi/csv', 'hapi/binary', 'zarr'):
+            codec = get_codec(key)
+            self.assertNotIsInstance(codec, codecs_registry._LazyCodec)
+            self.assertIn(key, [codec.name] + codec.supported_extensions)
+
+    def test_importing_speasy_does_not_load_codec_dependencies(self):
+        env = {**os.environ, "SPEASY_CORE_DISABLED_PROVIDERS": "amda,cda,csa,ssc,archive,uiowaephtool,cdpp3dview"}
+        loaded = subprocess.run(
+            [sys.executable, "-c",
+             "import sys, speasy; print(','.join(m for m in ('pycdfpp', 'pyistp') if m in sys.modules))"],
+            env=env, capture_output=True, text=True, check=True).stdout.strip()
+        self.assertEqual(loaded, "")
+
+
+@ddt
+class ContentSniffing(unittest.TestCase):
+
+    @data(
+        ("ac_k2_mfi_20220101_v03.cdf", "IstpCdf"),
+        ("ge_h0_cpi_00000000_v01.cdf", "IstpCdf"),
+        ("HAPI_sample_csv.csv", "hapi/csv"),
+        ("HAPI_ndData_TimeVarying_Axis.binary", "hapi/binary"),
+    )
+    @unpack
+    def test_sniffs_files(self, filename, codec_name):
+        path = f"{__HERE__}/resources/{filename}"
+        self.assertEqual(sniff_codec(path).name, codec_name)
+        with open(path, 'rb') as f:
+            self.assertEqual(sniff_codec(f.read()).name, codec_name)
+        with open(path, 'rb') as f:
+            f.seek(1)
+            f.seek(0)
+            self.assertEqual(sniff_codec(f).name, codec_name)
+            self.assertEqual(f.tell(), 0)
+
+    def test_sniffs_netcdf(self):
+        codec = get_codec("nc")
+        if codec is None:
+            self.skipTest("netCDF4 is not installed")
+        variable = get_codec("cdf").load_variable("Magnitude", f"{__HERE__}/resources/ac_k2_mfi_20220101_v03.cdf")
+        self.assertIs(sniff_codec(codec.save_variables([variable])), codec)
+
+    def test_unknown_content(self):
+        self.assertIsNone(sniff_codec(b"Time,Magnitude\n2022-01-01T00:00:00Z,1.0\n"))
+        self.assertIsNone(sniff_codec(b""))
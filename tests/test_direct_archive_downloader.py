@@ -1,7 +1,7 @@
 import os
 import tempfile
 import unittest
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from multiprocessing import Pool
 from ddt import ddt, data, unpack
 import numpy as np
@@ -329,6 +329,152 @@ class DirectArchiveDownloader(unittest.TestCase):
 
         self.assertListEqual(sorted(found), sorted(expected))
 
+    def test_random_split_lists_remote_folders_concurrently(self):
+        import threading
+        from unittest import mock
+        import speasy.core.any_files as any_files
+        with tempfile.TemporaryDirectory() as archive:
+            for month in range(1, 13):
+                folder = f"{archive}/2018/{month:02d}"
+                os.makedirs(folder)
+                open(f"{folder}/data_2018{month:02d}01.cdf", 'w').close()
+            server = _LocalHttpArchive(archive)
+            self.addCleanup(server.close)
+            expected = [f"{server.url}/2018/{month:02d}/data_2018{month:02d}01.cdf" for month in range(1, 13)]
+
+            listing_threads = set()
+            list_remote_files = any_files._list_remote_files
+
+            def record_thread(*args, **kwargs):
+                listing_threads.add(threading.get_ident())
+                return list_remote_files(*args, **kwargs)
+
+            with mock.patch.object(any_files, '_list_remote_files', side_effect=record_thread):
+                found = dad.RandomSplitDirectDownload.list_files(
+                    split_frequency='monthly',
+                    url_pattern=server.url + r"/{Y}/{M:02d}/data_\d+\.cdf",
+                    start_time='2018-01-01', stop_time='2018-12-31',
+                    fname_regex=r"data_(?P<start>\d+)\.cdf", date_format="%Y%m%d")
+
+        # listed from several threads, still in chronological order
+        self.assertListEqual(found, expected)
+        self.assertGreater(len(listing_threads), 1)
+
+    def test_range_index_finds_the_files_filter_ranges_keeps(self):
+        day = lambda d, h=0: datetime(2020, 1, d, h, tzinfo=timezone.utc)
+        # overlapping bursts, the long one starting first and ending last, and an open ended last file
+        ranges = [('a', (day(1), day(5))), ('b', (day(2), day(2, 6))), ('c', (day(3), day(3, 6))),
+                  ('d', (day(6), day(7))), ('e', (day(8), None))]
+        index = dad.RangeIndex(ranges)
+        for start, stop in ((day(1), day(1)), (day(2, 12), day(2, 18)), (day(4), day(6)), (day(5), day(5)),
+                            (day(7, 12), day(7, 18)), (day(9), day(20)), (day(1) - timedelta(days=3), day(1))):
+            self.assertListEqual(index.overlapping(start, stop), dad.filter_ranges(ranges, start, stop))
+        self.assertListEqual(dad.RangeIndex([]).overlapping(day(1), day(2)), [])
+
+    def test_files_decoded_by_worker_processes_match_a_serial_read(self):
+        from unittest import mock
+        cdf = spz.core.codecs.get_codec('application/x-cdf')
+        day = cdf.load_variable('BGSEc', f"{__HERE__}/resources/ac_k2_mfi_20220101_v03.cdf")
+        with tempfile.TemporaryDirectory() as archive:
+            for offset in range(3):
+                v = day.copy()
+                v.time[:] = v.time + np.timedelta64(offset, 'D')
+                with open(os.path.join(archive, f"ac_k2_mfi_2022010{offset + 1}_v03.cdf"), 'wb') as f:
+                    f.write(cdf.save_variables([v]))
+            server = _LocalHttpArchive(archive)
+            self.addCleanup(server.close)
+            request = dict(url_pattern=server.url + "/ac_k2_mfi_{Y}{M:02d}{D:02d}_v03.cdf", split_rule='regular',
+                           variable='BGSEc', start_time='2022-01-01T12:00', stop_time='2022-01-03T12:00',
+                           disable_cache=True)
+            with mock.patch.dict(os.environ, {'SPEASY_ARCHIVE_DECODING_WORKERS': '1'}):
+                serial = get_product(**request)
+            with mock.patch.dict(os.environ, {'SPEASY_ARCHIVE_DECODING_WORKERS': '2'}), \
+                mock.patch.object(dad, '_from_shared_memory', wraps=dad._from_shared_memory) as received:
+                parallel = get_product(**request)
+        self.assertEqual(received.call_count, 3)
+        self.assertEqual(len(parallel), 2 * len(day))
+        self.assertEqual(parallel, serial)
+
+    def test_decoding_pool_is_kept_across_requests(self):
+        self.assertIs(dad._cdf_decoding_pool(2), dad._cdf_decoding_pool(2))
+
+    def test_decoding_workers_do_not_initialize_providers(self):
+        from speasy.core.platform import is_decoding_worker
+        from speasy.core.requests_scheduling.request_dispatch import list_providers
+        from unittest import mock
+        self.assertFalse(is_decoding_worker())
+        # the local archive provider would be initialized, workers are spawned with this environment
+        with mock.patch.dict(os.environ, {'SPEASY_CORE_DISABLED_PROVIDERS': 'amda,cda,csa,ssc,uiowaephtool,cdpp3dview'}):
+            pool = dad._cdf_decoding_pool(3)
+            self.assertTrue(pool.submit(is_decoding_worker).result())
+            self.assertEqual(pool.submit(list_providers).result(), [])
+
+    def test_files_are_decoded_in_this_process_by_default(self):
+        from unittest import mock
+        with mock.patch.dict(os.environ):
+            os.environ.pop('SPEASY_ARCHIVE_DECODING_WORKERS', None)
+            self.assertEqual(dad._decoding_workers(), 1)
+
+    def test_shared_memory_blocks_are_unlinked_when_a_variable_can_not_be_rebuilt(self):
+        from multiprocessing.shared_memory import SharedMemory
+        cdf = spz.core.codecs.get_codec('application/x-cdf')
+        v = cdf.load_variable('BGSEc', f"{__HERE__}/resources/ac_k2_mfi_20220101_v03.cdf")
+        _, broken, broken_sizes = dad._to_shared_memory(v)
+        shared = dad._to_shared_memory(v)
+        with self.assertRaises(Exception):
+            dad._from_shared_memory_all({'broken': (b'not a pickle', broken, broken_sizes), 'BGSEc': shared})
+        for name in (broken, shared[1]):
+            with self.assertRaises(FileNotFoundError):
+                SharedMemory(name=name)
+
+    def test_only_records_in_range_are_read_from_a_file_parsed_once(self):
+        from unittest import mock
+        from speasy.core.codecs.bundled_codecs.istp import cdf as istp_cdf
+        istp_cdf._opened_files.clear()
+        url = f"{__HERE__}/resources/ac_k2_mfi_20220101_v03.cdf"
+        with mock.patch.object(istp_cdf.pyistp, 'load', wraps=istp_cdf.pyistp.load) as load:
+            morning = dad._read_cdf(url, 'BGSEc', None, '2022-01-01T01', '2022-01-01T05')
+            evening = dad._read_cdf(url, 'BGSEc', None, '2022-01-01T18', '2022-01-01T20')
+        self.assertEqual(load.call_count, 1)
+        whole = spz.core.codecs.get_codec('application/x-cdf').load_variable('BGSEc', url, disable_cache=True)
+        self.assertEqual(len(morning), 4)
+        self.assertEqual(morning, whole[datetime(2022, 1, 1, 1):datetime(2022, 1, 1, 5)])
+        self.assertEqual(evening, whole[datetime(2022, 1, 1, 18):datetime(2022, 1, 1, 20)])
+        # the records are copied out of the file, not a view of the whole day
+        self.assertIsNone(morning.values.base)
+
+    def test_get_products_reads_every_variable_from_each_file_once(self):
+        from unittest import mock
+        from speasy.core.direct_archive_downloader import get_products
+        from speasy.core.codecs.bundled_codecs.istp import cdf as istp_cdf
+        cdf = spz.core.codecs.get_codec('application/x-cdf')
+        day = cdf.load_variables(['BGSEc', 'Magnitude'], f"{__HERE__}/resources/ac_k2_mfi_20220101_v03.cdf")
+        with tempfile.TemporaryDirectory() as archive:
+            for offset in range(3):
+                shifted = []
+                for v in day.values():
+                    v = v.copy()
+                    v.time[:] = v.time + np.timedelta64(offset, 'D')
+                    shifted.append(v)
+                with open(os.path.join(archive, f"ac_k2_mfi_2022010{offset + 1}_v03.cdf"), 'wb') as f:
+                    f.write(cdf.save_variables(shifted))
+            server = _LocalHttpArchive(archive)
+            self.addCleanup(server.close)
+            request = dict(url_pattern=server.url + "/ac_k2_mfi_{Y}{M:02d}{D:02d}_v03.cdf", split_rule='regular',
+                           start_time='2022-01-01T12:00', stop_time='2022-01-03T12:00', disable_cache=True)
+            istp_cdf._opened_files.clear()
+            with mock.patch.dict(os.environ, {'SPEASY_ARCHIVE_DECODING_WORKERS': '1'}), \
+                mock.patch.object(istp_cdf.pyistp, 'load', wraps=istp_cdf.pyistp.load) as load:
+                products = get_products(variables=['BGSEc', 'Magnitude', 'missing'], **request)
+            self.assertEqual(load.call_count, 3)
+            for name in ('BGSEc', 'Magnitude'):
+                self.assertEqual(products[name], get_product(variable=name, **request))
+            self.assertIsNone(products['missing'])
+            with mock.patch.dict(os.environ, {'SPEASY_ARCHIVE_DECODING_WORKERS': '2'}):
+                parallel = get_products(variables=['BGSEc', 'Magnitude'], **request)
+            self.assertEqual(parallel['BGSEc'], products['BGSEc'])
+            self.assertEqual(parallel['Magnitude'], products['Magnitude'])
+
     @data(
         (
                 "https://cdaweb.gsfc.nasa.gov/pub/data/arase/pwe/hfa/l3/1min/{Y}/erg_pwe_hfa_l3_1min_{Y}{M:02d}{D:02d}_v05_11.cdf",
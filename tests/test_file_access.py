@@ -188,6 +188,66 @@ def _mock_http_response(status=200, body=b"DATA", last_modified="Mon, 01 Jan 202
     return resp
 
 
+def _mock_listing_response(status=200, files=(), etag='"v1"'):
+    resp = MagicMock()
+    resp.status_code = status
+    resp.ok = status in (200, 304)
+    resp.bytes = "".join(f'<a href="{f}">{f}</a>\n' for f in files).encode()
+    resp.headers = {"etag": etag, "last-modified": "Mon, 01 Jan 2024 00:00:00 GMT"}
+    return resp
+
+
+class RemoteListingCaching(unittest.TestCase):
+    """Folder listings are cached per folder with their validators: within 12 hours they are trusted, then a
+    conditional GET revalidates them and an unchanged folder (304) is neither downloaded nor parsed again."""
+
+    def setUp(self):
+        self.url = "https://test.invalid/data/"
+        drop_item(f"remote_listing/{self.url}")
+
+    def tearDown(self):
+        drop_item(f"remote_listing/{self.url}")
+
+    def _expire(self):
+        key = f"remote_listing/{self.url}"
+        entry = get_item(key)
+        entry.created -= timedelta(hours=13)
+        add_item(key=key, item=entry)
+
+    def test_listing_is_fetched_once_within_its_lifetime(self):
+        resp = _mock_listing_response(files=["a.cdf", "b.cdf", "c.txt"])
+        with patch("speasy.core.any_files.http.get", return_value=resp) as get:
+            for _ in range(3):
+                self.assertListEqual(list_files(self.url, r".*\.cdf"), ["a.cdf", "b.cdf"])
+        self.assertEqual(1, get.call_count)
+
+    def test_unchanged_listing_is_revalidated_with_a_conditional_request(self):
+        with patch("speasy.core.any_files.http.get", return_value=_mock_listing_response(files=["a.cdf"])):
+            list_files(self.url, r".*\.cdf")
+        self._expire()
+        with patch("speasy.core.any_files.http.get", return_value=_mock_listing_response(status=304)) as get:
+            self.assertListEqual(list_files(self.url, r".*\.cdf"), ["a.cdf"])
+            self.assertListEqual(list_files(self.url, r".*\.cdf"), ["a.cdf"])
+        self.assertEqual(1, get.call_count)
+        self.assertEqual('"v1"', get.call_args.kwargs["headers"]["If-None-Match"])
+
+    def test_force_refresh_picks_up_a_changed_listing(self):
+        with patch("speasy.core.any_files.http.get", return_value=_mock_listing_response(files=["a.cdf"])):
+            list_files(self.url, r".*\.cdf")
+        changed = _mock_listing_response(files=["a.cdf", "b.cdf"], etag='"v2"')
+        with patch("speasy.core.any_files.http.get", return_value=changed) as get:
+            self.assertListEqual(list_files(self.url, r".*\.cdf", force_refresh=True), ["a.cdf", "b.cdf"])
+        self.assertEqual(1, get.call_count)
+        self.assertEqual(('"v2"', "Mon, 01 Jan 2024 00:00:00 GMT"), get_item(f"remote_listing/{self.url}").version)
+
+    def test_error_pages_are_not_cached(self):
+        with patch("speasy.core.any_files.http.get", return_value=_mock_listing_response(status=502)):
+            self.assertListEqual(list_files(self.url, r".*"), [])
+        with patch("speasy.core.any_files.http.get", return_value=_mock_listing_response(files=["a.cdf"])) as get:
+            self.assertListEqual(list_files(self.url, r".*"), ["a.cdf"])
+        self.assertEqual(1, get.call_count)
+
+
 class MaxAgeCaching(unittest.TestCase):
     """A master/skeleton CDF is fetched once per data file in a multi-file
     request (e.g. one per day of a week-long range) unless callers opt into
@@ -1,7 +1,20 @@
+import json
+import os
+import tempfile
+import threading
 import unittest
+import uuid
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from unittest import mock
+
+import numpy as np
 from ddt import data, ddt, unpack
 
-from speasy.core.hapi.client import HapiClient, HapiEndpoint
+from speasy.core.codecs import get_codec
+from speasy.core.hapi.client import HapiClient, HapiEndpoint, _cached_json
 from speasy.core.hapi.provider import HapiProvider
 from speasy.core.hapi.exceptions import HapiRequestError, HapiServerError, HapiNoData
 from speasy.products.variable import SpeasyVariable
@@ -11,6 +24,67 @@ AMDA_SERVER_ROOT = "https://amda.irap.omp.eu/service"
 HAPITEST33_SERVER_ROOT = "https://hapi-server.org/servers/TestData3.3"
 CDAWEB_SERVER_ROOT = "https://cdaweb.gsfc.nasa.gov"
 
+__HERE__ = os.path.dirname(os.path.abspath(__file__))
+
+
+class _LocalHapiServer:
+    """Serves the 48 hourly records of HAPI_sample_csv_multiple_vars.csv as dataset 'ace' and logs /data requests."""
+
+    def __init__(self, output_formats, max_request_duration=None):
+        variables = get_codec('hapi/csv').load_variables(
+            file=os.path.join(__HERE__, 'resources', 'HAPI_sample_csv_multiple_vars.csv'),
+            variables=['Magnitude', 'BGSEc'], disable_cache=True)
+        self.info = {"HAPI": "3.2", "status": {"code": 1200, "message": "OK"}}
+        if max_request_duration:
+            self.info["maxRequestDuration"] = max_request_duration
+        self.requests = []
+        self.data_status = None
+        server = self
+        _cached_json.drop_entries()
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = {k: v[0] for k, v in parse_qs(url.query).items()}
+                content_type = None
+                if url.path.endswith('/capabilities'):
+                    body = json.dumps({"HAPI": "3.2", "outputFormats": output_formats,
+                                       "status": {"code": 1200, "message": "OK"}}).encode()
+                elif url.path.endswith('/info'):
+                    body = json.dumps(server.info).encode()
+                elif server.data_status is not None:
+                    server.requests.append(query)
+                    body = json.dumps({"HAPI": "3.2", "status": server.data_status}).encode()
+                    content_type = 'application/json'
+                else:
+                    server.requests.append(query)
+                    start, stop = (np.datetime64(query[k].rstrip('Z'), 'ns') for k in ('start', 'stop'))
+                    with tempfile.TemporaryDirectory() as tmp:
+                        path = os.path.join(tmp, 'data')
+                        get_codec(f"hapi/{query['format']}").save_variables(
+                            variables=[variables[name][start:stop] for name in query['parameters'].split(',')],
+                            file=path)
+                        with open(path, 'rb') as f:
+                            body = f.read()
+                self.send_response(200)
+                self.send_header('Content-Length', str(len(body)))
+                if content_type:
+                    self.send_header('Content-Type', content_type)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
 @ddt
 class TestHapiClient(unittest.TestCase):
 
@@ -50,6 +124,124 @@ class TestHapiClient(unittest.TestCase):
         self.assertIsInstance(result['vector'], SpeasyVariable)
 
 
+@ddt
+class TestHapiClientTransport(unittest.TestCase):
+
+    def get_data(self, output_formats, max_request_duration=None):
+        server = _LocalHapiServer(output_formats, max_request_duration)
+        try:
+            result = HapiClient(server.url).get_data('ace', '1997-09-02T00:00Z', '1997-09-04T00:00Z',
+                                                     ['Magnitude', 'BGSEc'])
+            return result, server.requests
+        finally:
+            server.close()
+
+    @data(
+        (['csv', 'binary', 'json'], 'binary'),
+        (['csv', 'json'], 'csv'),
+    )
+    @unpack
+    def test_negotiates_output_format(self, output_formats, expected):
+        result, requests = self.get_data(output_formats)
+        self.assertEqual([r['format'] for r in requests], [expected])
+        self.assertEqual(result['BGSEc'].values.shape, (48, 3))
+
+    def test_json_status_with_http_200(self):
+        server = _LocalHapiServer(['csv', 'binary'])
+        try:
+            client = HapiClient(server.url)
+            server.data_status = {"code": 1201, "message": "OK - no data for time range"}
+            with self.assertRaises(HapiNoData):
+                client.get_data('ace', '1997-09-02T00:00Z', '1997-09-04T00:00Z', ['Magnitude'])
+            server.data_status = {"code": 1406, "message": "Bad request - unknown dataset id"}
+            with self.assertRaises(HapiRequestError):
+                client.get_data('ace', '1997-09-02T00:00Z', '1997-09-04T00:00Z', ['Magnitude'])
+        finally:
+            server.close()
+
+    def test_splits_requests_by_max_request_duration(self):
+        result, requests = self.get_data(['csv', 'binary'], 'PT12H')
+        self.assertEqual(len(requests), 4)
+        self.assertEqual(sorted(r['start'] for r in requests)[1], '1997-09-02T12:00:00.000000Z')
+        expected, _ = self.get_data(['binary'])
+        for name in ('Magnitude', 'BGSEc'):
+            self.assertEqual(len(result[name]), 48)
+            np.testing.assert_array_equal(result[name].time, expected[name].time)
+            np.testing.assert_array_equal(result[name].values, expected[name].values)
+
+
+class TestHapiProviderCache(unittest.TestCase):
+
+    def setUp(self):
+        self.server = _LocalHapiServer(['binary', 'csv'])
+        self.server.info["modificationDate"] = "2020-01-01T00:00:00Z"
+        self.provider = HapiProvider(self.server.url)
+        self.dataset = f"ace-{uuid.uuid4().hex}"
+
+    def tearDown(self):
+        self.server.close()
+
+    def get_data(self):
+        return self.provider.data(self.dataset, '1997-09-02T06:00Z', '1997-09-03T06:00Z', ['Magnitude', 'BGSEc'])
+
+    def test_repeated_requests_are_served_from_cache(self):
+        first = self.get_data()
+        requests = len(self.server.requests)
+        self.assertGreater(requests, 0)
+        second = self.get_data()
+        self.assertEqual(len(self.server.requests), requests)
+        for name in ('Magnitude', 'BGSEc'):
+            self.assertEqual(len(second[name]), 24)
+            np.testing.assert_array_equal(second[name].time, first[name].time)
+            np.testing.assert_array_equal(second[name].values, first[name].values)
+
+    def test_parameters_are_fetched_in_a_single_request(self):
+        self.get_data()
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(self.server.requests[0]['parameters'], 'Magnitude,BGSEc')
+
+    def test_only_uncached_parameters_are_requested(self):
+        self.provider.data(self.dataset, '1997-09-02T06:00Z', '1997-09-03T06:00Z', ['Magnitude'])
+        self.assertEqual(len(self.get_data()['BGSEc']), 24)
+        self.assertEqual([r['parameters'] for r in self.server.requests], ['Magnitude', 'BGSEc'])
+
+    def test_newer_modification_date_outdates_cached_fragments(self):
+        self.get_data()
+        requests = len(self.server.requests)
+        self.server.info["modificationDate"] = "2021-01-01T00:00:00Z"
+        _cached_json.drop_entries()
+        self.assertEqual(len(self.get_data()['BGSEc']), 24)
+        self.assertGreater(len(self.server.requests), requests)
+
+    def test_advancing_stop_date_keeps_cached_fragments(self):
+        del self.server.info["modificationDate"]
+        self.server.info["stopDate"] = "2020-01-01T00:00:00Z"
+        self.get_data()
+        requests = len(self.server.requests)
+        self.server.info["stopDate"] = "2021-01-01T00:00:00Z"
+        _cached_json.drop_entries()
+        self.assertEqual(len(self.get_data()['BGSEc']), 24)
+        self.assertEqual(len(self.server.requests), requests)
+
+    def test_fragments_of_datasets_without_modification_date_expire(self):
+        del self.server.info["modificationDate"]
+        with mock.patch('speasy.core.hapi.provider._UNVERSIONED_FRAGMENTS_RETENTION', timedelta(0)):
+            self.get_data()
+            requests = len(self.server.requests)
+            self.assertEqual(len(self.get_data()['BGSEc']), 24)
+        self.assertGreater(len(self.server.requests), requests)
+
+    def test_no_data_returned_by_the_client(self):
+        with mock.patch.object(self.provider.hapi_client, 'get_data', return_value=None):
+            with self.assertRaises(HapiNoData):
+                self.get_data()
+
+    def test_disable_cache(self):
+        self.provider.data(self.dataset, '1997-09-02T06:00Z', '1997-09-03T06:00Z', ['BGSEc'], disable_cache=True)
+        self.provider.data(self.dataset, '1997-09-02T06:00Z', '1997-09-03T06:00Z', ['BGSEc'], disable_cache=True)
+        self.assertEqual(len(self.server.requests), 2)
+
+
 @ddt
 class TestHapiProvider(unittest.TestCase):
 
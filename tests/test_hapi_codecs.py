@@ -4,6 +4,7 @@ import json
 import os
 import tempfile
 import unittest
+import unittest.mock
 
 import numpy as np
 from ddt import data, ddt, unpack
@@ -130,6 +131,30 @@ class TestHapiCsvCodec(unittest.TestCase):
         self.assertEqual(variables['SC_pos_GSE'].unit, 'km')
         self.assertEqual(variables['SC_pos_GSE'].meta['description'], 'ACE s/c position, 3 comp. in GSE coord.')
 
+    def test_reads_contiguous_parameters_by_chunks(self):
+        path = os.path.join(__HERE__, 'resources', 'HAPI_sample_csv_multiple_vars.csv')
+        whole = hapi_csv.reader.load_hapi_csv(path)
+        with unittest.mock.patch.object(hapi_csv.reader, '_CHUNK_ROWS', 5):
+            chunked = hapi_csv.reader.load_hapi_csv(path)
+        for expected, parameter in zip(whole.parameters, chunked.parameters):
+            self.assertTrue(parameter.values.flags.c_contiguous)
+            self.assertEqual(parameter.values.dtype, expected.values.dtype)
+            np.testing.assert_array_equal(parameter.values, expected.values)
+        self.assertEqual(len(chunked.time_axis), 48)
+        self.assertEqual(chunked.time_axis[-1], np.datetime64("1997-09-03T23:00:00", "ns"))
+
+    def test_reads_non_seekable_streams(self):
+        path = os.path.join(__HERE__, 'resources', 'HAPI_sample_csv_multiple_vars.csv')
+        with open(path, 'rb') as f:
+            pipe_out, pipe_in = os.pipe()
+            with os.fdopen(pipe_out, 'rb') as stream:
+                with os.fdopen(pipe_in, 'wb') as writer:
+                    writer.write(f.read())
+                streamed = hapi_csv.reader.load_hapi_csv(stream)
+        expected = hapi_csv.reader.load_hapi_csv(path)
+        for expected_parameter, parameter in zip(expected.parameters, streamed.parameters):
+            np.testing.assert_array_equal(parameter.values, expected_parameter.values)
+
     @data(
         ('HAPI_ndData_TimeVarying_Axis.csv', { "centers": "frequency_centers_time_varying" }),
         ('HAPI_ndData_TimeVarying_Axis.csv', {"centers": [0.1, 0.2, 0.3]})
@@ -419,3 +444,26 @@ class TestHapiBinaryCodec(unittest.TestCase):
                 variables = hapi_binary_codec.load_variables(file=output_binary_file, variables=[var_name], disable_cache=True)
                 spz_var = variables[var_name]
                 self.assertTrue(spz_var.axes[1].is_time_dependent)
+
+    @data(
+        ("2020-01-01T00:00:00.123456789Z", "2020-01-01T00:00:00.123456789"),
+        ("2020-02-29T23:59:59Z", "2020-02-29T23:59:59"),
+        ("2020-060T12:30Z", "2020-02-29T12:30"),
+        ("1969-12-31", "1969-12-31"),
+        ("2020-01-01 00:00:00Z", "2020-01-01T00:00:00"),
+    )
+    @unpack
+    def test_parses_isotimes(self, isotime, expected):
+        times = np.array([isotime.encode()] * 3, dtype=f"S{len(isotime) + 2}")
+        self.assertTrue(np.all(hapi_binary.reader._parse_isotimes(times) == np.datetime64(expected, 'ns')))
+
+    def test_reads_contiguous_parameters_by_chunks(self):
+        path = os.path.join(__HERE__, 'resources', 'HAPI_amda_imf_all.binary')
+        whole = hapi_binary.reader.load_hapi_binary(path)
+        with unittest.mock.patch.object(hapi_binary.reader, '_CHUNK_BYTES', 100):
+            chunked = hapi_binary.reader.load_hapi_binary(path)
+        for expected, parameter in zip(whole.parameters, chunked.parameters):
+            self.assertTrue(parameter.values.flags.c_contiguous)
+            self.assertTrue(parameter.values.flags.writeable)
+            np.testing.assert_array_equal(parameter.values, expected.values)
+        self.assertEqual(chunked.time_axis[0], np.datetime64("1997-09-02T17:01:00", "ns"))
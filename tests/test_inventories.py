@@ -1,10 +1,14 @@
 import os
+import pickle
+import threading
 import unittest
 from ddt import ddt, data, unpack
 
 import speasy as spz
-from speasy.core.inventory.indexes import from_dict, to_dict, SpeasyIndex, DatasetIndex
-from speasy.core.dataprovider import DataProvider
+from speasy.core.inventory.indexes import from_dict, to_dict, to_json, SpeasyIndex, DatasetIndex, ParameterIndex, walk_inventory, \
+    inventory_hash, merge_inventories
+from speasy.core.dataprovider import DataProvider, PROVIDERS
+from speasy.inventories import tree
 from speasy.data_providers.cda._inventory_builder._cdf_masters_parser import update_tree
 
 __HERE__ = os.path.dirname(os.path.abspath(__file__))
@@ -82,3 +86,204 @@ class FromDictAndToDictPreserveInventory(unittest.TestCase):
         param = dataset.__dict__.get('ela_att_solution_date')
         self.assertIsNotNone(param)
         self.assertInventoryEqual(root, from_dict(to_dict(root, version=2), version=2))
+
+
+class SpeasyIndexAttributesAndChildren(unittest.TestCase):
+    def setUp(self):
+        self.root = SpeasyIndex(name='root', provider='test', uid='root', meta={'description': 'root node'})
+        self.dataset = DatasetIndex(name='dataset', provider='test', uid='ds', meta={'start_date': '2020-01-01'})
+        self.root.ds = self.dataset
+        self.dataset.__dict__['param'] = ParameterIndex(name='param', provider='test', uid='ds/param')
+
+    def test_attribute_access(self):
+        self.assertIs(self.root.ds, self.dataset)
+        self.assertEqual(self.root.description, 'root node')
+        self.assertEqual(self.root.ds.param.spz_uid(), 'ds/param')
+        self.assertEqual(self.dataset.__spz_name__, 'dataset')
+        with self.assertRaises(AttributeError):
+            _ = self.root.missing
+
+    def test_dict_view_behaves_like_the_instance_dict(self):
+        entries = self.root.__dict__
+        self.assertEqual(set(entries.keys()),
+                         {'description', 'ds', '__spz_provider__', '__spz_name__', '__spz_uid__', '__spz_type__'})
+        self.assertEqual(entries['__spz_type__'], 'SpeasyIndex')
+        entries['description'] = 'changed'
+        self.assertEqual(self.root.description, 'changed')
+        del entries['description']
+        self.assertNotIn('description', self.root.__dict__)
+        self.assertIn('ds', dir(self.root))
+
+    def test_clear_keeps_identity(self):
+        self.root.clear()
+        self.assertEqual(list(walk_inventory(self.root)), [self.root])
+        self.assertEqual(self.root.spz_uid(), 'root')
+
+    def test_walk_inventory_is_not_recursive(self):
+        node = self.root
+        for depth in range(5000):
+            child = SpeasyIndex(name=f'n{depth}', provider='test', uid=f'n{depth}')
+            node.__dict__['child'] = child
+            node = child
+        self.assertEqual(sum(1 for _ in walk_inventory(self.root)), 5003)
+
+    def test_pickle_round_trip(self):
+        restored = pickle.loads(pickle.dumps(self.root))
+        self.assertEqual(restored, self.root)
+        self.assertIsInstance(restored.ds.param, ParameterIndex)
+
+    def test_subclasses_without_slots_still_work(self):
+        with self.assertWarns(DeprecationWarning):
+            class PluginParameterIndex(ParameterIndex):
+                def __init__(self, name: str, provider: str, uid: str, meta=None):
+                    super().__init__(name, provider, uid, meta)
+                    self.unit = 'nT'
+
+        param = PluginParameterIndex(name='b', provider='plugin', uid='b', meta={'description': 'field'})
+        self.dataset.b = param
+        self.assertEqual(param.__dict__['unit'], 'nT')
+        self.assertEqual(param.__dict__['description'], 'field')
+        self.assertIs(self.root.ds.b, param)
+
+
+def make_tree(datasets, build_date='2024-01-01'):
+    root = SpeasyIndex(name='root', provider='hashtest', uid='hashtest', meta={'build_date': build_date})
+    root.mission = SpeasyIndex(name='mission', provider='hashtest', uid='mission')
+    for uid, params in datasets.items():
+        dataset = DatasetIndex(name=uid, provider='hashtest', uid=uid, meta={'start_date': '2020-01-01'})
+        for param, units in params.items():
+            dataset.__dict__[param] = ParameterIndex(name=param, provider='hashtest', uid=f'{uid}/{param}',
+                                                     meta={'units': units})
+        root.mission.__dict__[uid] = dataset
+    return root
+
+
+class InventoryHashesAndDiff(unittest.TestCase):
+    DATASETS = {'ds1': {'Bx': 'nT', 'By': 'nT'}, 'ds2': {'Np': 'cm-3'}}
+
+    def test_same_trees_have_the_same_hash(self):
+        self.assertEqual(inventory_hash(make_tree(self.DATASETS)), inventory_hash(make_tree(self.DATASETS)))
+        self.assertEqual(inventory_hash(make_tree(self.DATASETS)),
+                         inventory_hash(make_tree(self.DATASETS, build_date='2025-01-01')))
+        changed = {'ds1': {'Bx': 'nT', 'By': 'T'}, 'ds2': {'Np': 'cm-3'}}
+        self.assertNotEqual(inventory_hash(make_tree(self.DATASETS)), inventory_hash(make_tree(changed)))
+
+    def test_merge_only_reports_changed_branches(self):
+        orig = make_tree(self.DATASETS)
+        self.assertFalse(merge_inventories(orig, make_tree(self.DATASETS)))
+        new = make_tree({'ds1': {'Bx': 'nT', 'Bz': 'nT'}, 'ds2': {'Np': 'cm-3'}, 'ds3': {'V': 'km/s'}})
+        diff = merge_inventories(orig, new)
+        self.assertEqual([node.spz_uid() for node in diff.removed], ['ds1/By'])
+        self.assertEqual(sorted(node.spz_uid() for node in diff.added), ['ds1/Bz', 'ds3'])
+        self.assertEqual([new.spz_uid() for _, new in diff.replaced], ['hashtest', 'mission', 'ds1'])
+        self.assertIs(new.mission.ds2, orig.mission.ds2)
+        self.assertIs(new.mission.ds1.Bx, orig.mission.ds1.Bx)
+        self.assertIsNot(new.mission.ds1, orig.mission.ds1)
+
+
+class IncrementalInventoryUpdate(unittest.TestCase):
+    class HashTestProvider(DataProvider):
+        def __init__(self, datasets):
+            self.datasets = datasets
+            self.private = {'private': {'secret': 'nT'}}
+            super().__init__('hashtest', inventory_disable_proxy=True)
+
+        def build_inventory(self, root: SpeasyIndex) -> SpeasyIndex:
+            for key, node in make_tree(self.datasets).__dict__.items():
+                if isinstance(node, SpeasyIndex):
+                    root.__dict__[key] = node
+            return root
+
+        def build_private_inventory(self, root: SpeasyIndex) -> SpeasyIndex:
+            root.mine = make_tree(self.private).mission
+            return root
+
+    def setUp(self):
+        self.provider = self.HashTestProvider(dict(InventoryHashesAndDiff.DATASETS))
+
+    def tearDown(self):
+        PROVIDERS.pop('hashtest', None)
+        tree.__dict__.pop('hashtest', None)
+
+    def test_unchanged_inventory_keeps_its_nodes(self):
+        root = tree.hashtest
+        parameter = self.provider.flat_inventory.parameters['ds1/Bx']
+        self.provider.update_inventory()
+        self.assertIs(tree.hashtest.mission.ds1.Bx, parameter)
+        self.assertIs(tree.hashtest.mission.ds2, root.mission.ds2)
+        self.assertIs(self.provider.flat_inventory.parameters['ds1/Bx'], parameter)
+
+    def test_private_inventory_is_not_added_to_the_published_tree(self):
+        root, flat = tree.hashtest, self.provider.flat_inventory
+        private = root.mine
+        self.provider.private = {'private2': {'secret': 'nT'}}
+        self.provider.update_inventory()
+        self.assertIs(root.mine, private)
+        self.assertEqual(sorted(flat.parameters), ['ds1/Bx', 'ds1/By', 'ds2/Np', 'private/secret'])
+        self.assertEqual(sorted(self.provider.flat_inventory.parameters), ['ds1/Bx', 'ds1/By', 'ds2/Np',
+                                                                           'private2/secret'])
+        self.assertIn('private2', tree.hashtest.mine.__dict__)
+
+    def test_changes_are_applied_to_the_flat_inventory(self):
+        parameter = self.provider.flat_inventory.parameters['ds2/Np']
+        self.provider.datasets = {'ds1': {'Bx': 'nT'}, 'ds2': {'Np': 'cm-3'}, 'ds3': {'V': 'km/s'}}
+        self.provider.private = {'private2': {'secret': 'nT'}}
+        self.provider.update_inventory()
+        flat = self.provider.flat_inventory
+        self.assertEqual(sorted(flat.parameters), ['ds1/Bx', 'ds2/Np', 'ds3/V', 'private2/secret'])
+        self.assertEqual(sorted(flat.datasets), ['ds1', 'ds2', 'ds3', 'private2'])
+        self.assertIs(flat.parameters['ds2/Np'], parameter)
+        self.assertIs(tree.hashtest.mission.ds2.Np, parameter)
+        self.assertIs(flat.datasets['ds1'], tree.hashtest.mission.ds1)
+
+    def test_changed_inventory_is_swapped_not_edited(self):
+        root, flat = tree.hashtest, self.provider.flat_inventory
+        self.provider.datasets = {'ds1': {'Bx': 'nT'}}
+        self.provider.update_inventory()
+        self.assertIsNot(tree.hashtest, root)
+        self.assertIsNot(self.provider.flat_inventory, flat)
+        self.assertIs(spz.inventories.flat_inventories.hashtest, self.provider.flat_inventory)
+        # whoever still holds the previous inventory sees it whole
+        self.assertEqual(sorted(flat.parameters), ['ds1/Bx', 'ds1/By', 'ds2/Np', 'private/secret'])
+        self.assertIn('ds2', root.mission.__dict__)
+        self.assertEqual(sorted(self.provider.flat_inventory.parameters), ['ds1/Bx', 'private/secret'])
+
+    def test_background_refresh(self):
+        from speasy.core.inventory.refresh import InventoryRefresher
+        refresher = InventoryRefresher()
+        self.provider.datasets = {'ds3': {'V': 'km/s'}}
+        refresher.refresh([self.provider]).result(timeout=60)
+        self.assertIn('ds3/V', self.provider.flat_inventory.parameters)
+
+        updated = threading.Event()
+        self.provider.update_inventory = updated.set
+        refresher.start(0.001, providers=[self.provider])
+        try:
+            self.assertTrue(refresher.running)
+            self.assertTrue(updated.wait(timeout=60))
+        finally:
+            refresher.stop()
+        self.assertFalse(refresher.running)
+
+
+class CdaMastersParsing(unittest.TestCase):
+    @staticmethod
+    def make_tree():
+        root = SpeasyIndex(name='root', provider='cda', uid='root')
+        for master in ('ela_l1_state_pred_00000000_v01.cdf', 'ge_h0_cpi_00000000_v01.cdf',
+                       'erg_pwe_hfa_l3_1min_00000000_v01.cdf', 'missing_00000000_v01.cdf'):
+            uid = master.split('_00000000')[0].upper()
+            root.__dict__[uid] = DatasetIndex(name=uid, provider='cda', uid=uid,
+                                              meta={'mastercdf': master, 'serviceprovider_ID': uid,
+                                                    'start_date': '2018-01-01T00:00:00Z',
+                                                    'stop_date': '2030-01-01T00:00:00Z'})
+        return root
+
+    def test_parallel_parsing_gives_the_serial_tree(self):
+        serial, parallel = self.make_tree(), self.make_tree()
+        update_tree(serial, master_cdf_dir=f"{__HERE__}/resources", workers=1)
+        update_tree(parallel, master_cdf_dir=f"{__HERE__}/resources", workers=3)
+        self.assertGreater(len(list(serial.GE_H0_CPI)), 0)
+        # compared as JSON, FILLVAL can be NaN
+        self.assertEqual(to_json(serial, version=2), to_json(parallel, version=2))
+        self.assertEqual(list(to_dict(serial.GE_H0_CPI, version=2)), list(to_dict(parallel.GE_H0_CPI, version=2)))
@@ -0,0 +1,123 @@
+import os
+import pickle
+import tempfile
+import unittest
+
+from speasy.core.inventory import ProviderInventory
+from speasy.core.inventory.indexes import (SpeasyIndex, ParameterIndex, DatasetIndex, ComponentIndex,
+                                           _children, inventory_hash, to_dict)
+from speasy.core.inventory.snapshot import load_snapshot, store_snapshot, write_snapshot, snapshot_of
+
+
+def loaded_children(node):
+    return list(_children(node).values())
+
+
+def make_inventory(datasets=3, parameters=4):
+    root = SpeasyIndex(name='test', provider='test', uid='test')
+    mission = SpeasyIndex(name='mission', provider='test', uid='mission', meta={'description': 'a mission'})
+    root.__dict__['mission'] = mission
+    for d in range(datasets):
+        dataset = DatasetIndex(name=f'dataset {d}', provider='test', uid=f'ds{d}',
+                               meta={'start_date': '2020-01-01', 'stop_date': '2021-01-01', 'version': d,
+                                     'labels': ['x', 'y']})
+        mission.__dict__[f'ds{d}'] = dataset
+        for p in range(parameters):
+            parameter = ParameterIndex(name=f'param {p}', provider='test', uid=f'ds{d}/p{p}',
+                                       meta={'dataset': f'ds{d}', 'units': 'nT', 'FILLVAL': -1e31})
+            dataset.__dict__[f'p{p}'] = parameter
+            parameter.__dict__['x'] = ComponentIndex(name='x', provider='test', uid=f'ds{d}/p{p}/x')
+    return root
+
+
+class InventorySnapshotRoundTrip(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'inventory.spzinv')
+        self.inventory = make_inventory()
+        write_snapshot(self.inventory, self.path)
+        self.loaded = load_snapshot(self.path)
+
+    def tearDown(self):
+        self.loaded = None
+        self.tmp.cleanup()
+
+    def test_preserves_inventory(self):
+        self.assertEqual(to_dict(self.inventory, version=2), to_dict(self.loaded, version=2))
+
+    def test_preserves_types_and_meta(self):
+        parameter = self.loaded.mission.ds1.p2
+        self.assertIsInstance(parameter, ParameterIndex)
+        self.assertEqual(parameter.FILLVAL, -1e31)
+        self.assertEqual(self.loaded.mission.ds1.version, 1)
+        self.assertEqual(self.loaded.mission.ds1.labels, ['x', 'y'])
+
+    def test_preserves_hashes_without_loading_children(self):
+        self.assertEqual(inventory_hash(self.loaded), inventory_hash(make_inventory()))
+        self.assertEqual(loaded_children(self.loaded), [])
+
+    def test_stores_the_hashes_of_the_tree_as_written(self):
+        inventory = make_inventory(datasets=2)
+        inventory_hash(inventory)
+        inventory.mission.__dict__['ds2'] = make_inventory().mission.ds2
+        write_snapshot(inventory, self.path)
+        self.assertEqual(inventory_hash(load_snapshot(self.path)), inventory_hash(make_inventory()))
+
+    def test_children_are_loaded_on_access(self):
+        self.assertEqual(loaded_children(self.loaded), [])
+        self.assertIn('mission', self.loaded.__dict__)
+        self.assertEqual(len(loaded_children(self.loaded)), 1)
+
+    def test_pickling_materializes_the_tree(self):
+        restored = pickle.loads(pickle.dumps(self.loaded))
+        self.assertEqual(to_dict(self.inventory, version=2), to_dict(restored, version=2))
+
+    def test_missing_or_corrupted_snapshot(self):
+        self.assertIsNone(load_snapshot(os.path.join(self.tmp.name, 'missing.spzinv')))
+        corrupted = os.path.join(self.tmp.name, 'corrupted.spzinv')
+        with open(corrupted, 'wb') as f:
+            f.write(b'not a snapshot')
+        self.assertIsNone(load_snapshot(corrupted))
+
+
+class InventorySnapshotFlatIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        path = store_snapshot(make_inventory(), self.tmp.name, 'test')
+        self.root = load_snapshot(path)
+        self.flat = ProviderInventory()
+        self.flat.update(self.root)
+
+    def tearDown(self):
+        self.root = None
+        self.flat = None
+        self.tmp.cleanup()
+
+    def test_lookups_do_not_walk_the_tree(self):
+        self.assertIsNotNone(snapshot_of(self.root))
+        parameter = self.flat.parameters['ds2/p3']
+        self.assertEqual(parameter.spz_uid(), 'ds2/p3')
+        self.assertEqual(loaded_children(self.root), [])
+
+    def test_flat_index_counts(self):
+        self.assertEqual(len(self.flat.datasets), 3)
+        self.assertEqual(len(self.flat.parameters), 12)
+        self.assertEqual(len(self.flat.components), 12)
+        self.assertEqual(sorted(self.flat.datasets), ['ds0', 'ds1', 'ds2'])
+        self.assertNotIn('ds3', self.flat.datasets)
+
+    def test_flat_index_is_mutable(self):
+        extra = DatasetIndex(name='extra', provider='test', uid='extra')
+        self.flat.datasets['extra'] = extra
+        del self.flat.datasets['ds0']
+        self.assertIs(self.flat.datasets['extra'], extra)
+        self.assertNotIn('ds0', self.flat.datasets)
+        self.assertEqual(len(self.flat.datasets), 3)
+
+    def test_store_snapshot_replaces_previous_ones(self):
+        store_snapshot(make_inventory(), self.tmp.name, 'test')
+        self.assertEqual(len([f for f in os.listdir(self.tmp.name) if f.startswith('test-')]), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,6 +3,7 @@
 
 """Tests for the ISTP NetCDF codec (speasy.core.codecs.bundled_codecs.istp_netcdf)."""
 
+import io
 import os
 import unittest
 import numpy as np
@@ -74,6 +75,27 @@ class TestNetCDFCodecRead:
         assert var.time.dtype == np.dtype("datetime64[ns]")
 
 
+class TestNetCDFCodecInMemoryWrite:
+
+    @pytest.fixture
+    def var(self, codec, nc_path):
+        return codec.load_variable("DENSITY", file=nc_path, disable_cache=True)
+
+    def test_save_to_stream(self, codec, var):
+        stream = io.BytesIO()
+        assert codec.save_variables([var], stream) is True
+        assert stream.getvalue() == bytes(codec.save_variables([var]))
+
+    def test_compression_and_chunking(self, codec, var):
+        buf = codec.save_variables([var], compression="zlib", complevel=6, chunk_records=4)
+        with netCDF4.Dataset("saved.nc", memory=bytes(buf)) as ds:
+            assert ds["DENSITY"].filters()["zlib"] is True
+            assert ds["DENSITY"].filters()["complevel"] == 6
+            assert ds["DENSITY"].chunking() == [4] + list(var.values.shape[1:])
+        var2 = codec.load_variable("DENSITY", file=bytes(buf), disable_cache=True)
+        np.testing.assert_array_equal(var.values, var2.values)
+
+
 @pytest.mark.skipif(not os.path.exists(AC_MFI), reason="real CDAWeb file not present")
 class TestNetCDFCodecWrite:
 
@@ -0,0 +1,135 @@
+import os
+import tempfile
+import unittest
+import uuid
+
+import speasy as spz
+from speasy.core.index import index
+from speasy.core.inventory import ProviderInventory
+from speasy.core.inventory.indexes import SpeasyIndex, DatasetIndex, ParameterIndex, merge_inventories
+from speasy.core.inventory.search import ProductSearch, ProviderSearchIndex, tokenize
+from speasy.core.inventory.snapshot import load_snapshot, write_snapshot
+
+
+def make_inventory(provider):
+    root = SpeasyIndex(name=provider, provider=provider, uid=provider, meta={'build_date': '2024-01-01'})
+    ace = SpeasyIndex(name='ACE', provider=provider, uid='ACE')
+    mag = SpeasyIndex(name='MAG', provider=provider, uid='MAG')
+    swe = SpeasyIndex(name='SWEPAM', provider=provider, uid='SWEPAM')
+    root.ACE = ace
+    ace.MAG = mag
+    ace.SWEPAM = swe
+    mag.AC_H0_MFI = DatasetIndex(name='AC_H0_MFI', provider=provider, uid='AC_H0_MFI',
+                                 meta={'description': 'H0 - ACE Magnetic Field 16-Second Level 2 Data'})
+    mag.AC_H0_MFI.BGSEc = ParameterIndex(name='BGSEc', provider=provider, uid='AC_H0_MFI/BGSEc',
+                                         meta={'CATDESC': 'Magnetic field vector in GSE coordinates', 'UNITS': 'nT'})
+    mag.AC_H0_MFI.Magnitude = ParameterIndex(name='Magnitude', provider=provider, uid='AC_H0_MFI/Magnitude',
+                                             meta={'CATDESC': 'B-field magnitude', 'UNITS': 'nT'})
+    swe.AC_H0_SWE = DatasetIndex(name='AC_H0_SWE', provider=provider, uid='AC_H0_SWE',
+                                 meta={'description': 'H0 - ACE Solar Wind Experiment 64-Second Level 2 Data'})
+    swe.AC_H0_SWE.Np = ParameterIndex(name='Np', provider=provider, uid='AC_H0_SWE/Np',
+                                      meta={'CATDESC': 'Solar Wind Proton Number Density', 'UNITS': '#/cc'})
+    return root
+
+
+def document_scores(search_index, tokens):
+    return dict(zip(search_index.documents, zip(*(m.tolist() for m in search_index.scores(tokens)))))
+
+
+class ProductSearchTest(unittest.TestCase):
+    def setUp(self):
+        self.provider = f'test_search_{uuid.uuid4().hex}'
+        self.root = make_inventory(self.provider)
+        self.flat = ProviderInventory()
+        self.flat.update(self.root)
+        self.search = ProductSearch()
+        self.search.inventory_updated(self.provider, self.root, self.flat, aliases=['alias'])
+
+    def tearDown(self):
+        if index.contains('product-search', self.provider):
+            index.pop('product-search', self.provider)
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize('AC_H0_MFI/BGSEc'), ['ac', 'h0', 'mfi', 'bgsec'])
+
+    def test_exact_match_ranks_first(self):
+        results = self.search.search('BGSEc')
+        self.assertIs(results[0], self.flat.parameters['AC_H0_MFI/BGSEc'])
+
+    def test_all_words_matched_ranks_first(self):
+        results = self.search.search('solar wind density')
+        self.assertIs(results[0], self.flat.parameters['AC_H0_SWE/Np'])
+
+    def test_searches_ancestor_names_and_units(self):
+        self.assertIn(self.flat.parameters['AC_H0_SWE/Np'], self.search.search('swepam'))
+        self.assertEqual({p.spz_uid() for p in self.search.search('nT mag')[:2]},
+                         {'AC_H0_MFI/BGSEc', 'AC_H0_MFI/Magnitude'})
+
+    def test_fuzzy_and_prefix_matches(self):
+        self.assertIs(self.search.search('magnetc field')[0], self.flat.datasets['AC_H0_MFI'])
+        self.assertIn(self.flat.parameters['AC_H0_MFI/Magnitude'], self.search.search('magni'))
+
+    def test_max_results_and_provider_filter(self):
+        self.assertEqual(len(self.search.search('ace', max_results=2)), 2)
+        self.assertEqual(len(self.search.search('ace', provider='alias')), 5)
+        self.assertEqual(self.search.search('   '), [])
+        with self.assertRaises(ValueError):
+            self.search.search('ace', provider='not a provider')
+
+    def test_index_is_reloaded_when_inventory_did_not_change(self):
+        self.search.search('ace')
+        other = ProductSearch()
+        other.inventory_updated(self.provider, self.root, self.flat)
+        self.assertEqual(other.search('solar wind'), self.search.search('solar wind'))
+
+    def test_inventory_update_is_picked_up(self):
+        self.search.search('ace')
+        self.root.ACE.MAG.AC_H0_MFI.Bx = ParameterIndex(name='Bx', provider=self.provider, uid='AC_H0_MFI/Bx')
+        self.flat.update(self.root)
+        self.search.inventory_updated(self.provider, self.root, self.flat)
+        self.assertIs(self.search.search('bx')[0], self.flat.parameters['AC_H0_MFI/Bx'])
+
+    def test_inventory_diff_is_applied_to_the_index(self):
+        search_index = self.search._provider_index(self.provider)
+        new_root = make_inventory(self.provider)
+        del new_root.ACE.SWEPAM.__dict__['AC_H0_SWE']
+        new_root.ACE.MAG.AC_H0_MFI.Bx = ParameterIndex(name='Bx', provider=self.provider, uid='AC_H0_MFI/Bx',
+                                                       meta={'CATDESC': 'Bx component', 'UNITS': 'nT'})
+        new_root.ACE.MAG.AC_H0_MFI.description = 'ACE magnetometer'
+        diff = merge_inventories(self.root, new_root)
+        flat = ProviderInventory()
+        flat.update(new_root)
+        self.search.inventory_updated(self.provider, new_root, flat, diff=diff)
+        updated = self.search._indexes[self.provider]
+        self.assertIsNot(updated, search_index)
+        rebuilt = ProviderSearchIndex.build(new_root)
+        self.assertEqual(sorted(updated.documents), sorted(rebuilt.documents))
+        for query in (['bx'], ['solar', 'wind'], ['magnetometer'], ['magnetic'], ['nt', 'mag']):
+            self.assertEqual(document_scores(updated, query), document_scores(rebuilt, query))
+        self.assertIs(self.search.search('bx')[0], flat.parameters['AC_H0_MFI/Bx'])
+        self.assertEqual(self.search.search('swepam proton'), [])
+
+    def test_snapshot_products_are_indexed_without_building_them(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'inventory.spzinv')
+            write_snapshot(self.root, path)
+            root = load_snapshot(path)
+            from_snapshot = ProviderSearchIndex.build(root)
+            self.assertTrue(root.__dict__['ACE']._spz_pending)
+            from_tree = ProviderSearchIndex.build(self.root)
+            for query in (['swepam'], ['solar', 'wind'], ['nt', 'mag']):
+                self.assertEqual(document_scores(from_snapshot, query), document_scores(from_tree, query))
+            del root
+
+    def test_state_round_trip(self):
+        search_index = ProviderSearchIndex.build(self.root)
+        restored = ProviderSearchIndex.from_state(search_index.state(0))
+        self.assertEqual([m.tolist() for m in restored.scores(['solar', 'wind'])],
+                         [m.tolist() for m in search_index.scores(['solar', 'wind'])])
+
+    def test_find_product_is_exposed(self):
+        self.assertIsInstance(spz.find_product('zzzzzzzzz_no_such_product'), list)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,7 +4,9 @@
 """Tests for `speasy` package."""
 import unittest
 from datetime import datetime, timezone
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
+
+from packaging.version import Version
 
 from speasy.core.dataprovider import DataProvider
 from speasy.core.inventory.indexes import SpeasyIndex
@@ -98,3 +100,51 @@ class GetInventoryConditionalRequest(unittest.TestCase):
 
         self.assertEqual(http_get.call_args.kwargs["headers"]["If-Modified-Since"],
                          "Thu, 01 Jan 2026 00:00:00 GMT")
+
+    def _get_with_saved_inventory(self, response, saved_date, saved_proxy_version="1.0.0"):
+        from speasy.core.proxy import GetInventory
+
+        saved_inventory = SpeasyIndex(name="root", provider="mockprovider", uid="root")
+        saved_inventory.build_date = "2026-01-01T00:00:00+00:00"
+        stored = {}
+
+        def fake_index_get(module, key, default=None):
+            return {"proxy_inventories": saved_inventory,
+                    "proxy_inventories_save_date": saved_date,
+                    "proxy_inventories_etag": '"abc"',
+                    "proxy_inventories_proxy_version": saved_proxy_version}.get(module, default)
+
+        with patch("speasy.core.proxy.index.get", side_effect=fake_index_get), \
+                patch("speasy.core.proxy.index.set", side_effect=lambda m, k, v: stored.__setitem__(m, v)), \
+                patch("speasy.core.proxy._CURRENT_PROXY_SERVER_VERSION", Version("1.0.0")), \
+                patch("speasy.core.proxy.http.get", return_value=response) as http_get:
+            inventory = GetInventory.get("mockprovider")
+        return inventory, saved_inventory, http_get, stored
+
+    def test_not_modified_keeps_the_saved_inventory_and_renews_it(self):
+        response = MagicMock(status_code=304, headers={"ETag": '"abc"'})
+        inventory, saved, http_get, stored = self._get_with_saved_inventory(
+            response, datetime(2000, 1, 1, tzinfo=timezone.utc))
+        self.assertIs(inventory, saved)
+        self.assertEqual(http_get.call_args.kwargs["headers"]["If-None-Match"], '"abc"')
+        self.assertGreater(stored["proxy_inventories_save_date"], datetime(2000, 1, 1, tzinfo=timezone.utc))
+        self.assertNotIn("proxy_inventories", stored)
+
+    def test_fresh_inventory_is_revalidated_when_the_proxy_version_changed(self):
+        fresh = datetime.now(tz=timezone.utc)
+        _, saved, http_get, _ = self._get_with_saved_inventory(MagicMock(status_code=304, headers={}), fresh)
+        http_get.assert_not_called()
+        _, _, http_get, stored = self._get_with_saved_inventory(MagicMock(status_code=304, headers={}), fresh,
+                                                                saved_proxy_version="0.9.0")
+        http_get.assert_called_once()
+        self.assertEqual(stored["proxy_inventories_proxy_version"], "1.0.0")
+
+    def test_new_inventory_without_etag_forgets_the_previous_one(self):
+        from speasy.core.proxy import _mark_inventory_saved
+
+        with patch("speasy.core.proxy.index") as index:
+            index.contains.return_value = True
+            _mark_inventory_saved("mockprovider", None, revalidated=True)
+            index.pop.assert_not_called()
+            _mark_inventory_saved("mockprovider", None)
+            index.pop.assert_called_once_with("proxy_inventories_etag", "mockprovider")
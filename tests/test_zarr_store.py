@@ -0,0 +1,104 @@
+import json
+import os
+import tempfile
+import unittest
+
+import numpy as np
+from ddt import data, ddt
+
+from speasy.core import make_utc_datetime
+from speasy.core.codecs import get_codec
+from speasy.core.data_containers import DataContainer
+from speasy.products import SpeasyVariable
+
+try:
+    import pyzstd
+except ImportError:
+    pyzstd = None
+
+__HERE__ = os.path.dirname(os.path.abspath(__file__))
+
+
+@ddt
+class ZarrStoreCodec(unittest.TestCase):
+    def setUp(self):
+        self.codec = get_codec("zarr")
+        self.variables = get_codec("cdf").load_variables(
+            ["BGSEc", "Magnitude"], f"{__HERE__}/resources/ac_k2_mfi_20220101_v03.cdf")
+        self.spectrum = get_codec("hapi/binary").load_variables(
+            ["spectra_time_dependent_bins"], f"{__HERE__}/resources/HAPI_ndData_TimeVarying_Axis.binary",
+            disable_cache=True)["spectra_time_dependent_bins"]
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = os.path.join(self.tmp.name, "archive.zarr")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_codec_resolution(self):
+        self.assertIsNotNone(self.codec)
+
+    @data("zlib", "zstd", None)
+    def test_round_trip(self, compression):
+        if compression == "zstd" and pyzstd is None:
+            self.skipTest("pyzstd is not installed")
+        variables = list(self.variables.values()) + [self.spectrum]
+        self.assertTrue(self.codec.save_variables(variables, self.store, compression=compression, chunk_records=7))
+        self.assertEqual(self.codec.list_variables(self.store), [v.name for v in variables])
+        loaded = self.codec.load_variables([v.name for v in variables], self.store)
+        for variable in variables:
+            self.assertEqual(loaded[variable.name], variable)
+            self.assertEqual(loaded[variable.name].columns, variable.columns)
+
+    def test_appends_incrementally(self):
+        full = self.variables["BGSEc"]
+        middle = len(full) // 2
+        self.codec.save_variables([full[:middle]], self.store, chunk_records=5)
+        # overlapping records are already in the store and are skipped
+        self.codec.save_variables([full[middle - 3:middle + 4]], self.store)
+        self.codec.save_variables([full[middle - 3:]], self.store)
+        self.assertEqual(self.codec.load_variable("BGSEc", self.store, disable_cache=True), full)
+        time = json.load(open(os.path.join(self.store, "BGSEc", "time", ".zattrs")))
+        self.assertEqual(len(time["chunk_first"]), -(-len(full) // 5))
+        self.assertEqual(np.datetime64(time["chunk_last"][-1], 'ns'), full.time[-1])
+
+    def test_loads_what_was_just_appended(self):
+        full = self.variables["BGSEc"]
+        middle = len(full) // 2
+        self.codec.save_variables([full[:middle]], self.store)
+        self.assertEqual(self.codec.load_variable("BGSEc", self.store), full[:middle])
+        self.codec.save_variables([full[middle:]], self.store)
+        self.assertEqual(self.codec.load_variable("BGSEc", self.store), full)
+
+    def test_only_reads_chunks_in_range(self):
+        full = self.variables["BGSEc"]
+        self.codec.save_variables([full], self.store, chunk_records=4)
+        for chunk in ("0.0", f"{len(full) // 4 - 1}.0"):
+            os.remove(os.path.join(self.store, "BGSEc", "values", chunk))
+        ranged = self.codec.load_variables(["BGSEc"], self.store, start_time="2022-01-01T04:00:00",
+                                           stop_time="2022-01-01T07:30:00")
+        self.assertEqual(ranged["BGSEc"],
+                         full[make_utc_datetime("2022-01-01T04:00:00"):make_utc_datetime("2022-01-01T07:30:00")])
+        empty = self.codec.load_variable("BGSEc", self.store, start_time="2023-01-01", disable_cache=True)
+        self.assertEqual(len(empty), 0)
+        self.assertEqual(empty.values.shape[1:], full.values.shape[1:])
+
+    def test_zarr_v2_layout(self):
+        self.codec.save_variables([self.variables["BGSEc"]], self.store, chunk_records=1000)
+        array = json.load(open(os.path.join(self.store, "BGSEc", "values", ".zarray")))
+        self.assertEqual(array["zarr_format"], 2)
+        self.assertEqual(array["shape"], list(self.variables["BGSEc"].values.shape))
+        self.assertEqual(array["chunks"], [1000, 3])
+        self.assertTrue(os.path.exists(os.path.join(self.store, "BGSEc", ".zgroup")))
+
+    def test_rejects_mismatching_records(self):
+        bgsec = self.variables["BGSEc"]
+        self.codec.save_variables([self.variables["Magnitude"][:100]], self.store)
+        with self.assertRaises(ValueError):
+            self.codec.save_variables([SpeasyVariable(axes=bgsec.axes, values=DataContainer(
+                bgsec.values, name="Magnitude"))], self.store)
+        with self.assertRaises(ValueError):
+            self.codec.save_variables([bgsec], None)
+
+
+if __name__ == '__main__':
+    unittest.main()